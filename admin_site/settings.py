@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -45,6 +46,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "bulletinboard.middleware.MediaMiddleware",
+    "bulletinboard.middleware.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -79,13 +82,40 @@ WSGI_APPLICATION = "admin_site.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        # mysql backend with connection pool (bulletinboard/backends/pool.py)
+        "ENGINE": "bulletinboard.backends.mysql",
         "OPTIONS": {
             "read_default_file": str(BASE_DIR / "db.cnf"),
         },
+        # with pool, connection goes back to pool at end of request (0).
+        # without pool, seconds to keep connection of the thread (None: unlimited)
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 0)),
+        "POOL": {
+            "ENABLED": os.environ.get("DB_POOL_ENABLED", "1") == "1",
+            "MAX_SIZE": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+            "TIMEOUT": float(os.environ.get("DB_POOL_TIMEOUT", 5)),
+            "MAX_AGE": int(os.environ.get("DB_POOL_MAX_AGE", 3600)),
+            "HEALTH_CHECK": True,
+        },
     }
 }
 
+# Read replicas: comma separated option files of replica servers (e.g. replica1.cnf,replica2.cnf).
+# Read-only views read from a replica, writes and other views use default (primary)
+DATABASE_REPLICAS = []
+for number, option_file in enumerate(filter(None, os.environ.get("DB_REPLICA_CNF", "").split(",")), 1):
+    alias = "replica{}".format(number)
+    DATABASES[alias] = dict(DATABASES["default"], OPTIONS={"read_default_file": option_file},
+                            TEST={"MIRROR": "default"})
+    DATABASE_REPLICAS.append(alias)
+# tests of replica routing need a second database ("replica", not replicated and not in DATABASE_REPLICAS)
+if sys.argv[1:2] == ["test"] and "replica" not in DATABASES:
+    DATABASES["replica"] = dict(DATABASES["default"], TEST={"NAME": "test_bulletinboard_replica"})
+DATABASE_ROUTERS = ["bulletinboard.routers.ReplicaRouter"]
+# seconds to read from primary after a write of the browser (read-your-writes),
+# post list pages read from a replica are not cached this long after a change (replication lag)
+REPLICA_STICKY_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -131,11 +161,84 @@ AUTH_USER_MODEL = "bulletinboard.User"
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # In case media folder is at different location, likes /var/www/media
 MEDIA_URL = '/media/'
+# name: (max width, max height) of profile thumbnails made on upload (needs Pillow)
+THUMBNAIL_SIZES = {"medium": (150, 150), "large": (300, 300)}
+# uploaded profile image with more pixels (width * height) is rejected before the confirm page
+PROFILE_MAX_PIXELS = 25000000
+# profile images are stored by sha256 of content, unreferenced image is deleted
+# unless it is linked again in last MEDIA_STORE_GRACE seconds
+MEDIA_STORE_GRACE = 60
+# temp uploads (abandoned confirm pages, csv imports) older than TMP_UPLOAD_TTL seconds are deleted
+# by sweep_tmp_uploads command, or by a thread of each process every TMP_SWEEP_INTERVAL seconds (None: off)
+TMP_UPLOAD_TTL = 86400
+TMP_SWEEP_BATCH_SIZE = 500
+TMP_SWEEP_MAX_BATCHES = 10
+TMP_SWEEP_INTERVAL = None
+# media files are served with ETag / Last-Modified / Range, other than content addressed profiles
+# (cached forever) browser caches them MEDIA_MAX_AGE seconds.
+# Only upload/ is public, confirm page previews in tmp/ need login (do not alias MEDIA_ROOT publicly).
+# MEDIA_ACCEL "x-accel-redirect" (nginx internal location MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT)
+# or "x-sendfile" lets the front proxy send the file instead of a python worker
+MEDIA_MAX_AGE = 3600
+MEDIA_ACCEL = os.environ.get("MEDIA_ACCEL") or None
+MEDIA_ACCEL_PREFIX = "/protected-media/"
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Post list pagination: "keyset" (cursor, no COUNT/OFFSET) or "offset" (page number)
+POST_LIST_PAGINATION = os.environ.get("POST_LIST_PAGINATION", "keyset")
+# Rows per database query of streaming post list csv download
+CSV_EXPORT_CHUNK_SIZE = 2000
+# Rows per bulk insert of post csv upload
+CSV_IMPORT_BATCH_SIZE = 1000
+# Uploads bigger than this (bytes) are imported in background worker pool
+CSV_IMPORT_ASYNC_THRESHOLD = 1024 * 1024
+CSV_IMPORT_WORKERS = 2
+# running import job not done in this many seconds (worker was killed) is queued again
+# by run_csv_import_jobs, keep it longer than the longest import
+CSV_IMPORT_STALE_SECONDS = 3600
+
+# Post list page cache. Local memory cache is per process, set POST_LIST_CACHE_BACKEND
+# and POST_LIST_CACHE_LOCATION to share it between processes
+# (e.g. django.core.cache.backends.redis.RedisCache, redis://127.0.0.1:6379/1)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "post_list": {
+        "BACKEND": os.environ.get("POST_LIST_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("POST_LIST_CACHE_LOCATION", "post-list"),
+        # seconds until cached page is evicted, least recently used pages are evicted over MAX_ENTRIES
+        "TIMEOUT": 300,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    # session cache, set SESSION_CACHE_BACKEND and SESSION_CACHE_LOCATION to a cache shared between
+    # processes (e.g. redis). Default dummy cache reads every session from database (a local memory
+    # cache would give old sessions to other processes)
+    "sessions": {
+        "BACKEND": os.environ.get("SESSION_CACHE_BACKEND", "django.core.cache.backends.dummy.DummyCache"),
+        "LOCATION": os.environ.get("SESSION_CACHE_LOCATION", "sessions"),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+POST_LIST_CACHE = "post_list"
+# Cache of search result counts, seconds until a search result is counted again
+LIST_COUNT_CACHE = "default"
+LIST_COUNT_ESTIMATE_TIMEOUT = 60
+# seconds a confirm page of post/user form can be saved (pending data is in signed form token)
+CONFIRM_TOKEN_MAX_AGE = 3600
+# Sessions are read from "sessions" cache (database on cache miss), unchanged sessions are not saved
+# and changed sessions are written to database at once. Only a change of SESSION_BATCH_KEYS (data which
+# is safe to lose, e.g. ["last_seen"]) is written in batches of SESSION_DB_BATCH_SIZE sessions or every
+# SESSION_DB_FLUSH_INTERVAL seconds; it is lost if the process is killed before the batch (see README)
+SESSION_ENGINE = "bulletinboard.backends.session"
+SESSION_CACHE_ALIAS = "sessions"
+SESSION_BATCH_KEYS = ()
+SESSION_DB_BATCH_SIZE = 100
+SESSION_DB_FLUSH_INTERVAL = 5
 LOGIN_REDIRECT_URL = "/"
 LOGIN_URL = "/accounts/login"
 ACCOUNT_EMAIL_REQUIRED = True
@@ -13,17 +13,21 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path("blog/", include("blog.urls"))
 """
+import re
 from django.contrib import admin
 from django.urls import path, include
 from django.urls.conf import re_path
 # from django.views.generic import RedirectView
 from django.conf import settings
-from django.conf.urls.static import static
+
+from bulletinboard.views import serve_media
 
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("bulletinboard.urls")),
     # path("", RedirectView.as_view(url="")),
-    re_path(r"^accounts/", include("django.contrib.auth.urls"))
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    re_path(r"^accounts/", include("django.contrib.auth.urls")),
+    # media with ETag, Last-Modified and Range (answered by MediaMiddleware before this view)
+    re_path(r"^{}(?P<path>.*)$".format(re.escape(settings.MEDIA_URL.lstrip("/"))), serve_media, name="media"),
+]
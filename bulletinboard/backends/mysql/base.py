@@ -0,0 +1,14 @@
+"""
+MySQL backend with connection pool (ENGINE: bulletinboard.backends.mysql)
+"""
+from django.db.backends.mysql import base
+
+from ..pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+
+    @staticmethod
+    def ping(connection):
+        # mysqlclient ping is a round trip without query, it raises error if server has gone away
+        connection.ping()
@@ -0,0 +1,258 @@
+"""
+Connection pool shared by the threads of a process.
+Django keeps one connection per thread (CONN_MAX_AGE reuses it only in same thread),
+pooled backends return the connection to this pool when django closes it
+(end of request with CONN_MAX_AGE = 0) and take an idle one on next connect.
+"""
+import threading
+import time
+
+# defaults of "POOL" in DATABASES setting
+POOL_DEFAULTS = {
+    # use the pool (False: same as django backend)
+    "ENABLED": True,
+    # max connections of this process (in use + idle)
+    "MAX_SIZE": 10,
+    # seconds to wait for a free connection before error
+    "TIMEOUT": 5,
+    # seconds until a connection is closed and opened again (None: no limit)
+    "MAX_AGE": 3600,
+    # check idle connection with ping before it is used
+    "HEALTH_CHECK": True,
+}
+
+
+class PoolTimeout(Exception):
+    """
+    Raised when no connection is free in TIMEOUT seconds
+    """
+    pass
+
+
+class ConnectionPool:
+    """
+    Pool of DB-API connections.
+    Param: max_size, timeout (seconds to wait), max_age (seconds to reuse a connection),
+    health_check (ping idle connection on checkout)
+    """
+
+    def __init__(self, max_size=10, timeout=5, max_age=3600, health_check=True):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.health_check = health_check
+        self._idle = []
+        self._opened_at = {}
+        self._in_use = 0
+        self._condition = threading.Condition()
+        self.checkouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.health_failures = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    @property
+    def size(self):
+        return self._in_use + len(self._idle)
+
+    def _expired(self, connection):
+        return self.max_age is not None and \
+            time.monotonic() - self._opened_at.get(id(connection), 0) >= self.max_age
+
+    def _close(self, connection, health_failure=False):
+        with self._condition:
+            self._opened_at.pop(id(connection), None)
+            self.discarded += 1
+            if health_failure:
+                self.health_failures += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def acquire(self, connect, ping=None):
+        """
+        Take an idle connection or open new one.
+        Idle connection which is too old or fails ping is closed and next one is tried.
+        Param: connect (function to open new connection), ping (function to check connection)
+        Return: DB-API connection
+        """
+        start = time.monotonic()
+        waited = False
+        with self._condition:
+            while True:
+                if self._idle:
+                    connection = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self.size < self.max_size:
+                    connection = None
+                    self._in_use += 1
+                    break
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    raise PoolTimeout("No database connection is free in {} seconds (pool size {})".format(
+                        self.timeout, self.max_size))
+                waited = True
+                self._condition.wait(remaining)
+            self.checkouts += 1
+            if waited:
+                wait_time = time.monotonic() - start
+                self.waits += 1
+                self.wait_time += wait_time
+                self.max_wait_time = max(self.max_wait_time, wait_time)
+        # open, ping and close outside of lock, other threads do not wait for network
+        try:
+            while connection is not None:
+                if self._expired(connection):
+                    self._close(connection)
+                elif self.health_check and ping is not None and not self._ping(ping, connection):
+                    self._close(connection, health_failure=True)
+                else:
+                    return connection
+                connection = self._take_idle()
+            connection = connect()
+        except BaseException:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.created += 1
+            self._opened_at[id(connection)] = time.monotonic()
+        return connection
+
+    def _take_idle(self):
+        with self._condition:
+            return self._idle.pop() if self._idle else None
+
+    @staticmethod
+    def _ping(ping, connection):
+        try:
+            ping(connection)
+            return True
+        except Exception:
+            return False
+
+    def release(self, connection, discard=False):
+        """
+        Return connection to pool (close it if discard or too old)
+        Param: DB-API connection, discard (connection is broken)
+        """
+        if discard or self._expired(connection):
+            self._close(connection)
+        with self._condition:
+            self._in_use -= 1
+            if not discard and id(connection) in self._opened_at:
+                self._idle.append(connection)
+            self._condition.notify()
+
+    def close_idle(self):
+        """
+        Close all idle connections
+        """
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._close(connection)
+
+    def stats(self):
+        """
+        Pool metrics
+        Return: dictionary of in use, idle, wait time and counters
+        """
+        with self._condition:
+            return {
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                "checkouts": self.checkouts,
+                "created": self.created,
+                "discarded": self.discarded,
+                "health_failures": self.health_failures,
+                "waits": self.waits,
+                "wait_time_total": round(self.wait_time, 6),
+                "wait_time_max": round(self.max_wait_time, 6),
+                "wait_time_avg": round(self.wait_time / self.waits, 6) if self.waits else 0.0,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_settings(settings_dict):
+    """
+    "POOL" setting of database merged with defaults
+    """
+    options = dict(POOL_DEFAULTS)
+    options.update(settings_dict.get("POOL") or {})
+    return options
+
+
+def get_pool(alias, settings_dict):
+    """
+    Pool of database alias (created at first use)
+    """
+    with _pools_lock:
+        if alias not in _pools:
+            options = pool_settings(settings_dict)
+            _pools[alias] = ConnectionPool(
+                max_size=options["MAX_SIZE"], timeout=options["TIMEOUT"],
+                max_age=options["MAX_AGE"], health_check=options["HEALTH_CHECK"])
+        return _pools[alias]
+
+
+def pool_stats():
+    """
+    Metrics of every pool of this process
+    Return: dictionary of database alias and pool metrics
+    """
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Database wrapper mixin which takes connections from the pool and returns them on close.
+    Backend class sets ping(connection) for health check.
+    """
+
+    def pool_enabled(self):
+        return pool_settings(self.settings_dict)["ENABLED"]
+
+    @staticmethod
+    def ping(connection):
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        finally:
+            cursor.close()
+
+    def get_new_connection(self, conn_params):
+        if not self.pool_enabled():
+            return super().get_new_connection(conn_params)
+        pool = get_pool(self.alias, self.settings_dict)
+        try:
+            return pool.acquire(lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params),
+                                self.ping)
+        except PoolTimeout as error:
+            raise self.Database.OperationalError(str(error)) from error
+
+    def _close(self):
+        if self.connection is None or not self.pool_enabled():
+            return super()._close()
+        pool = get_pool(self.alias, self.settings_dict)
+        connection = self.connection
+        # connection closed in transaction or after error is not given to other threads
+        discard = self.in_atomic_block or self.errors_occurred
+        if not discard:
+            try:
+                if not self.get_autocommit():
+                    connection.rollback()
+            except Exception:
+                discard = True
+        pool.release(connection, discard=discard)
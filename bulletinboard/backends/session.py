@@ -0,0 +1,196 @@
+"""
+Session engine over cache with database fallback (SESSION_ENGINE = "bulletinboard.backends.session").
+Session is read from SESSION_CACHE_ALIAS cache, database is only read on cache miss.
+Save is skipped when session data is not changed, other saves are written to database at once.
+Only a change of SESSION_BATCH_KEYS (data which is safe to lose, e.g. last activity time) is written
+to cache at once and to database in batches (SESSION_DB_BATCH_SIZE sessions, every
+SESSION_DB_FLUSH_INTERVAL seconds in a thread and at process exit). Batched changes are kept in the
+memory of the process: if the process is killed (SIGKILL, out of memory) changes of last
+SESSION_DB_FLUSH_INTERVAL seconds are lost, and other processes read the old value from database
+on cache miss. A batch only updates sessions which are still in database, so it does not bring
+a logged out session back.
+Without shared cache (e.g. redis) with more than one process, use a dummy session cache
+(other process would read an old session from its own cache).
+"""
+import atexit
+import logging
+import threading
+import time
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.db import connections, router, transaction
+
+logger = logging.getLogger(__name__)
+
+# session key: (session model, encoded data, expire date) waiting for next batch (change of batch keys only)
+_pending = {}
+_pending_lock = threading.Lock()
+# held while a batch is written, so a deleted session is not written again by the batch
+_flush_lock = threading.RLock()
+_flushed_at = time.monotonic()
+_flusher = None
+_counters = {"skipped": 0, "saved": 0, "queued": 0, "batches": 0, "written": 0}
+
+
+def flush_sessions():
+    """
+    Write sessions waiting for batch to database, one SELECT and one UPDATE for the batch.
+    Sessions deleted from database meanwhile (logout, expired) are not written again.
+    Return: number of written sessions
+    """
+    global _flushed_at
+    with _flush_lock:
+        with _pending_lock:
+            pending = dict(_pending)
+            _pending.clear()
+            _flushed_at = time.monotonic()
+        if not pending:
+            return 0
+        models = {}
+        for session_key, (model, session_data, expire_date) in pending.items():
+            models.setdefault(model, []).append(model(
+                session_key=session_key, session_data=session_data, expire_date=expire_date))
+        written = 0
+        try:
+            for model, sessions in models.items():
+                using = router.db_for_write(model)
+                with transaction.atomic(using=using):
+                    stored = set(model.objects.using(using).select_for_update().filter(
+                        session_key__in=[session.session_key for session in sessions]
+                    ).values_list("session_key", flat=True))
+                    sessions = [session for session in sessions if session.session_key in stored]
+                    model.objects.using(using).bulk_update(sessions, ["session_data", "expire_date"])
+                written += len(sessions)
+        except Exception:
+            # try again with next batch, unless the session is saved again meanwhile
+            logger.exception("Writing %s sessions to database failed", len(pending))
+            with _pending_lock:
+                for session_key, value in pending.items():
+                    _pending.setdefault(session_key, value)
+            return 0
+        with _pending_lock:
+            _counters["batches"] += 1
+            _counters["written"] += written
+        return written
+
+
+def _flush_periodically(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            if time.monotonic() - _flushed_at >= interval:
+                flush_sessions()
+        except Exception:
+            logger.exception("Session batch is failed")
+        finally:
+            connections.close_all()
+
+
+def start_periodic_flush():
+    """
+    Start flush thread of this process once if SESSION_DB_FLUSH_INTERVAL (seconds) is set
+    Return: True if thread is running
+    """
+    global _flusher
+    interval = getattr(settings, "SESSION_DB_FLUSH_INTERVAL", 5)
+    if not interval:
+        return False
+    with _pending_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_periodically, args=(interval,),
+                                        name="session-flusher", daemon=True)
+            _flusher.start()
+    return True
+
+
+def session_stats():
+    """
+    Counters of this process
+    Return: dictionary of skipped saves, saves written at once, queued saves, batches, written sessions
+    and waiting sessions
+    """
+    with _pending_lock:
+        return dict(_counters, pending=len(_pending))
+
+
+atexit.register(flush_sessions)
+
+
+class SessionStore(CachedDBStore):
+    """
+    Cached database session which skips unchanged saves and writes changes of SESSION_BATCH_KEYS
+    to database in batches
+    """
+
+    def _serialized(self, data):
+        return self.serializer().dumps(data)
+
+    def _durable(self, data):
+        """
+        Serialized session data without SESSION_BATCH_KEYS
+        """
+        batch_keys = getattr(settings, "SESSION_BATCH_KEYS", ())
+        return self._serialized({key: value for key, value in data.items() if key not in batch_keys})
+
+    def _remember(self, data):
+        self._saved_data = self._serialized(data)
+        self._saved_durable = self._durable(data)
+
+    def load(self):
+        data = None
+        with _pending_lock:
+            pending = _pending.get(self._session_key) if self._session_key else None
+        if pending is not None:
+            # cache entry was evicted before the batch is written
+            data = self._cache.get(self.cache_key)
+            if data is None:
+                data = self.decode(pending[1])
+        else:
+            data = super().load()
+        self._remember(data)
+        return data
+
+    def save(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        if self.session_key is not None and not must_create:
+            if self._serialized(data) == getattr(self, "_saved_data", None):
+                # only "modified" flag is set (e.g. same value is set again)
+                with _pending_lock:
+                    _counters["skipped"] += 1
+                return
+            if self._durable(data) == getattr(self, "_saved_durable", None):
+                self._queue(data)
+                return
+        # new session, login, logout and any change of other keys is in database before the response
+        with _flush_lock:
+            with _pending_lock:
+                if self.session_key is not None:
+                    _pending.pop(self.session_key, None)
+                _counters["saved"] += 1
+            super().save(must_create)
+        self._remember(data)
+
+    def _queue(self, data):
+        """
+        Write session to cache now and to database with next batch
+        """
+        self._cache.set(self.cache_key, data, self.get_expiry_age())
+        with _pending_lock:
+            _pending[self.session_key] = (self.model, self.encode(data), self.get_expiry_date())
+            _counters["queued"] += 1
+            due = len(_pending) >= getattr(settings, "SESSION_DB_BATCH_SIZE", 100)
+        self._remember(data)
+        if due:
+            flush_sessions()
+        else:
+            start_periodic_flush()
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        with _flush_lock:
+            with _pending_lock:
+                _pending.pop(session_key, None)
+            super().delete(session_key)
@@ -0,0 +1,13 @@
+"""
+SQLite backend with connection pool (ENGINE: bulletinboard.backends.sqlite3)
+"""
+from django.db.backends.sqlite3 import base
+
+from ..pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+
+    def pool_enabled(self):
+        # in-memory database is removed when its connection is closed, django keeps it open
+        return super().pool_enabled() and not self.is_in_memory_db()
@@ -0,0 +1,111 @@
+import datetime
+import uuid
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from ..models import ConfirmNonce
+
+CONFIRM_SALT = "bulletinboard.confirm"
+
+
+class ConfirmSerializer(signing.JSONSerializer):
+    """
+    JSON serializer of confirm token (date of form data is saved as ISO string)
+    """
+
+    def dumps(self, obj):
+        return DjangoJSONEncoder(separators=(",", ":")).encode(obj).encode("latin-1")
+
+
+class ConfirmTokenUsed(Exception):
+    """
+    Raised when confirm token is already saved (double submit)
+    """
+    pass
+
+
+def confirm_token(request, data, secrets=None):
+    """
+    Signed token of confirm page, rendered as hidden confirm_token field.
+    Pending form data is kept in the token instead of the session, so form steps do not write the session.
+    Token can be read but not changed by the browser, secrets (e.g. password hash) are kept in
+    ConfirmNonce table instead of the token.
+    Token has a nonce, it can be saved only once (see use_confirm_token()).
+    Param: request (client request), pending data of form (dictionary), secrets (optional dictionary)
+    Return: token string
+    """
+    nonce = uuid.uuid4().hex
+    if secrets:
+        ConfirmNonce.objects.create(nonce=nonce, secrets=secrets)
+    return signing.dumps({"path": request.path, "user": request.user.id, "nonce": nonce,
+                          "secret": bool(secrets), "data": data},
+                         salt=CONFIRM_SALT, serializer=ConfirmSerializer, compress=True)
+
+
+def load_confirm_token(request):
+    """
+    Signed value of posted confirm_token
+    Return: value or None if token is missing, changed, expired or made for another page or user
+    """
+    token = request.POST.get("confirm_token")
+    if not token:
+        return None
+    try:
+        value = signing.loads(token, salt=CONFIRM_SALT, serializer=ConfirmSerializer,
+                              max_age=getattr(settings, "CONFIRM_TOKEN_MAX_AGE", 3600))
+    except signing.BadSignature:
+        return None
+    if value.get("path") != request.path or value.get("user") != request.user.id or not value.get("nonce"):
+        return None
+    return value
+
+
+def read_confirm_token(request):
+    """
+    Pending data of confirm_token posted with the form, with its secrets.
+    Token is not used up here, save it with use_confirm_token() in the transaction which saves the data.
+    Param: request (client request)
+    Return: pending data of form or None if token is missing, changed, expired, saved already
+    or made for another page or user
+    """
+    value = load_confirm_token(request)
+    if value is None:
+        return None
+    stored = ConfirmNonce.objects.filter(nonce=value["nonce"]).values("secrets", "used_at").first()
+    if stored is not None and stored["used_at"] is not None:
+        return None
+    if value.get("secret"):
+        if stored is None:
+            return None
+        return dict(value["data"], **stored["secrets"])
+    return value["data"]
+
+
+def use_confirm_token(request):
+    """
+    Mark posted confirm token as saved. Call it in the transaction which saves the pending data,
+    so the token can be posted again if the save is rolled back.
+    Unique nonce row lets only one request (of any process) save the token.
+    Param: request (client request)
+    raise ConfirmTokenUsed if token is saved already (or invalid)
+    """
+    value = load_confirm_token(request)
+    if value is None:
+        raise ConfirmTokenUsed
+    now = timezone.now()
+    max_age = getattr(settings, "CONFIRM_TOKEN_MAX_AGE", 3600)
+    # expired tokens can not be loaded, their nonces are not needed
+    ConfirmNonce.objects.filter(created_at__lt=now - datetime.timedelta(seconds=max_age)).delete()
+    if value.get("secret"):
+        used = ConfirmNonce.objects.filter(nonce=value["nonce"], used_at__isnull=True).update(used_at=now)
+        if not used:
+            raise ConfirmTokenUsed
+        return
+    try:
+        with transaction.atomic():
+            ConfirmNonce.objects.create(nonce=value["nonce"], created_at=now, used_at=now)
+    except IntegrityError:
+        raise ConfirmTokenUsed
@@ -0,0 +1,115 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Case, F, Value, When
+
+from ..models import ListCounter
+from ..routers import PRIMARY
+
+
+def post_scope(user):
+    """
+    Counter scope of post list shown to the user (admin: all live posts, user: own live posts)
+    """
+    return "post:all" if user.type == "0" else "post:user:{}".format(user.id)
+
+
+def user_scope(user):
+    """
+    Counter scope of user list shown to the user (admin: all live users, user: created users)
+    """
+    return "user:all" if user.type == "0" else "user:user:{}".format(user.id)
+
+
+def post_scopes(created_user_id):
+    """
+    Counter scopes which count a live post of the owner
+    """
+    return ["post:all", "post:user:{}".format(created_user_id)]
+
+
+def user_scopes(created_user_id):
+    """
+    Counter scopes which count a live user created by the given user
+    """
+    return ["user:all", "user:user:{}".format(created_user_id)]
+
+
+def add_count(scopes, amount, using="default"):
+    """
+    Add amount to counters of scopes in one UPDATE (inside caller's transaction).
+    Counters which are not counted yet are skipped, they are counted at first read.
+    Param: list of scopes, amount (negative for delete), database alias
+    """
+    if amount:
+        ListCounter.objects.using(using).filter(scope__in=scopes).update(
+            value=F("value") + amount)
+
+
+def add_counts(amounts, using="default"):
+    """
+    Add different amount to counters of many scopes in one UPDATE (inside caller's transaction)
+    Param: dictionary of scope and amount, database alias
+    """
+    amounts = {scope: amount for scope, amount in amounts.items() if amount}
+    if amounts:
+        ListCounter.objects.using(using).filter(scope__in=amounts).update(value=F("value") + Case(
+            *[When(scope=scope, then=Value(amount)) for scope, amount in amounts.items()],
+            default=Value(0), output_field=BigIntegerField()))
+
+
+def get_count(scope, queryset):
+    """
+    Live row count of scope. Count the queryset once and save it if counter is not ready.
+    Param: scope, queryset of scope (live rows without search filter)
+    Return: row count
+    """
+    value = ListCounter.objects.filter(scope=scope).values_list("value", flat=True).first()
+    if value is None:
+        # count on primary, counter of replica can be behind.
+        # alias is not taken from the router, saving a counter is not a write of the browser
+        # (it would pin the browser to the primary)
+        using = PRIMARY
+        value = queryset.using(using).count()
+        try:
+            with transaction.atomic(using=using):
+                ListCounter.objects.using(using).create(scope=scope, value=value)
+        except IntegrityError:
+            # counted by another request at same time
+            pass
+    return value
+
+
+def reset_counts(scopes=None, using="default"):
+    """
+    Drop counters, they are counted again at next read (fix drift of rows changed outside of app)
+    Param: list of scopes (optional, all counters)
+    """
+    counters = ListCounter.objects.using(using).all()
+    if scopes is not None:
+        counters = counters.filter(scope__in=scopes)
+    counters.delete()
+
+
+def list_count(scope, queryset, search="", searched=None):
+    """
+    Row count of list for paginator.
+    Live row count is read from counter of scope. Count of searched list is an estimate,
+    cached for LIST_COUNT_ESTIMATE_TIMEOUT seconds. Cache key has live row count of scope,
+    so it is counted again when rows are added or deleted (edited rows can be old until timeout).
+    Param: scope, queryset of scope (live rows), search parameters (string, empty if not searched),
+    searched queryset
+    Return: row count
+    """
+    total = get_count(scope, queryset)
+    if not search:
+        return total
+    cache = caches[getattr(settings, "LIST_COUNT_CACHE", "default")]
+    key = "list_count:{}:{}:{}".format(
+        scope, total, hashlib.sha1(search.encode()).hexdigest())
+    value = cache.get(key)
+    if value is None:
+        value = searched.count()
+        cache.set(key, value, getattr(settings, "LIST_COUNT_ESTIMATE_TIMEOUT", 60))
+    return value
@@ -0,0 +1,32 @@
+import csv
+
+from .pagination import KeysetPaginator
+
+POST_CSV_FIELDS = ["id", "title", "description", "status", "created_user_id",
+                   "updated_user_id", "delete_user_id", "deleted_at", "created_at", "updated_at"]
+
+
+class Echo:
+    """
+    File like object which return the written value instead of buffering it
+    (csv.writer writes one row and the value is yielded to response)
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_post_csv(post_list, chunk_size):
+    """
+    Generate csv lines of post list chunk by chunk
+    Param: post queryset, rows per database query
+    return: generator of csv lines (header at first)
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(POST_CSV_FIELDS)
+    rows = post_list.values_list(*POST_CSV_FIELDS)
+    id_index = POST_CSV_FIELDS.index("id")
+    updated_index = POST_CSV_FIELDS.index("updated_at")
+    paginator = KeysetPaginator(rows, chunk_size, ordering=("-updated_at", "-id"))
+    for chunk in paginator.chunks(key=lambda row: [row[updated_index], row[id_index]]):
+        yield "".join(writer.writerow(row) for row in chunk)
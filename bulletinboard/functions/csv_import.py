@@ -0,0 +1,88 @@
+import codecs
+import csv
+import time
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Post
+from .counters import add_count, post_scopes
+from .post_cache import invalidate_post_list_on_commit
+
+
+class InvalidCsvRow(Exception):
+    """
+    Raised when a csv row does not have 3 columns
+    """
+    pass
+
+
+def read_csv_upload(uploaded_file, encoding="utf-8-sig"):
+    """
+    Read csv rows directly from uploaded file.
+    Uploaded chunks are decoded incrementally line by line, so whole file is never loaded.
+    Param: Django's uploaded file
+    return: iterator of csv rows
+    """
+    return csv.reader(codecs.iterdecode(uploaded_file, encoding), delimiter=",")
+
+
+def check_csv_row(data):
+    """
+    For cvs import data validation
+    Param: data of csv (iterator of rows)
+    return: generator of valid rows, raise InvalidCsvRow at first invalid row or empty data
+    """
+    empty = True
+    for row in data:
+        if len(row) != 3:
+            raise InvalidCsvRow("Post upload csv must have 3 columns")
+        empty = False
+        yield row
+    if empty:
+        raise InvalidCsvRow("Post upload csv must have 3 columns")
+
+
+def import_posts(rows, user, batch_size, now=None):
+    """
+    Insert posts of csv rows with bulk_create in batches inside one transaction.
+    Rows are consumed as stream, so only one batch is in memory.
+    Any error of rows (InvalidCsvRow) rolls back whole import.
+    All posts of one import share same created/updated time.
+    Param: valid csv rows (title, description, status), import user, rows per insert,
+    created/updated time (optional, now)
+    return: (number of imported posts, elapsed seconds)
+    """
+    start = time.perf_counter()
+    now = now or timezone.now()
+    count = 0
+    batch = []
+    with transaction.atomic():
+        for row in rows:
+            batch.append(Post(
+                title=row[0],
+                description=row[1],
+                status=row[2],
+                user=user,
+                created_user_id=user.id,
+                updated_user_id=user.id,
+                created_at=now,
+                updated_at=now
+            ))
+            if len(batch) >= batch_size:
+                Post.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            Post.objects.bulk_create(batch)
+            count += len(batch)
+        # bulk_create does not send post_save
+        add_count(post_scopes(user.id), count)
+        invalidate_post_list_on_commit(user.id)
+    return count, time.perf_counter() - start
+
+
+def rows_per_second(count, seconds):
+    """
+    Import speed for report
+    """
+    return count / seconds if seconds > 0 else float(count)
@@ -0,0 +1,48 @@
+from django.db.models import OuterRef, Subquery
+
+from ..models import User
+
+# max ids of one batch detail request (a list page has 5 rows)
+MAX_BATCH_IDS = 100
+
+
+def parse_ids(ids):
+    """
+    Parse comma separated ids of batch detail request
+    Param: ids string (e.g. "1,2,3")
+    return: list of int id (invalid ids are ignored)
+    """
+    return [int(id) for id in ids.split(",") if id.strip().isdigit()][:MAX_BATCH_IDS]
+
+
+def user_name(field):
+    """
+    Subquery of user name for user id column
+    """
+    return Subquery(User.objects.filter(pk=OuterRef(field)).values("name")[:1])
+
+
+def detail_structs(queryset, exclude=()):
+    """
+    Detail data of detail dialog in one query with created and updated user name.
+    Same structure of django's json serializer ("model", "pk", "fields")
+    plus "created_user_name" and "updated_user_name".
+    Param: queryset, excluded field names (e.g. password)
+    return: list of dictionary
+    """
+    model = queryset.model
+    fields = [field.name for field in model._meta.concrete_fields
+              if not field.primary_key and field.name not in exclude]
+    rows = queryset.values(
+        "pk",
+        *fields,
+        created_user_name=user_name("created_user_id"),
+        updated_user_name=user_name("updated_user_id"),
+    )
+    return [{
+        "model": model._meta.label_lower,
+        "pk": row["pk"],
+        "fields": {field: row[field] for field in fields},
+        "created_user_name": row["created_user_name"],
+        "updated_user_name": row["updated_user_name"],
+    } for row in rows]
@@ -1,6 +1,24 @@
+import errno
 import os
+import shutil
+import uuid
 from django.conf import settings
 
+# bytes copied at once when temp folder is on another filesystem than upload folder
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def temp_name(name):
+    """
+    Collision free name of temp file (uploaded name is only used for extension)
+    Param: name of uploaded file
+    return: random name with extension (e.g. 3f2a...9c.jpg)
+    """
+    ext = os.path.splitext(os.path.basename(name))[1].lower()
+    if not ext[1:].isalnum():
+        ext = ""
+    return uuid.uuid4().hex + ext
+
 
 def save_temp(f):
     """
@@ -8,42 +26,68 @@ def save_temp(f):
     Param: Django's form file (type: InMemoryFile)
     return: name of file
     """
-    with open("media/tmp/"+f.name, "wb+") as destination:
+    name = temp_name(f.name)
+    os.makedirs(os.path.join(settings.MEDIA_ROOT, "tmp"), exist_ok=True)
+    # "x": never overwrite a file of another upload
+    with open(os.path.join(settings.MEDIA_ROOT, "tmp", name), "xb") as destination:
         for chunk in f.chunks():
             destination.write(chunk)
-        return f.name
+    return name
 
 
-def handle_uploaded_file(fname):
+def copy_file(source, destination):
     """
-    Upload profile from temp file
-    param: file name of temp file
+    Copy file in chunks to a temp name in destination folder and rename it,
+    so destination is never seen half written
+    Param: source path, destination path
     """
-    with open("media/tmp/"+fname, "rb") as tmp:
-        img_str = tmp.read()
-        with open("media/upload/"+fname, "wb+") as upload:
-            upload.write(img_str)
+    partial = os.path.join(os.path.dirname(destination), ".{}.part".format(uuid.uuid4().hex))
+    try:
+        with open(source, "rb") as src, open(partial, "xb") as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+        os.replace(partial, destination)
+    except BaseException:
+        if os.path.exists(partial):
+            os.unlink(partial)
+        raise
 
 
-def remove_temp(f):
+def move_file(source, destination):
     """
-    Remove temp file after save
-    param: file name
+    Move file by rename (atomic, nothing copied),
+    it is copied in chunks if source is on another filesystem.
+    param: source path, destination path
     """
-    if (f):
-        os.unlink(str(settings.BASE_DIR)+"\\media\\tmp\\"+f)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    try:
+        os.replace(source, destination)
+    except OSError as error:
+        if error.errno != errno.EXDEV:
+            raise
+        copy_file(source, destination)
+        os.unlink(source)
 
 
-def check_route(current_route, previousRoute, request):
+def link_file(source, destination):
     """
-    Checking is_confirm_page session flag and control its bugs
-    param: current route, previous route and request from view
+    Hard link file to destination (nothing copied, source is kept),
+    it is copied in chunks if links are not possible (other filesystem).
+    param: source path, destination path
     """
-    if previousRoute is not None:
-        splittedRoute = previousRoute.split("/")
-        if (splittedRoute[-2] == "create"):
-            if (splittedRoute[-3] != current_route):
-                request.session["save_confirm_page"] = False
-        else:
-            if (splittedRoute[-3] != current_route):
-                request.session["save_confirm_page"] = False
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        copy_file(source, destination)
+
+
+def remove_temp(f):
+    """
+    Remove temp file of cancelled confirm page
+    param: file name
+    """
+    if (f):
+        try:
+            os.unlink(os.path.join(settings.MEDIA_ROOT, "tmp", os.path.basename(f)))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,186 @@
+import codecs
+import csv
+import datetime
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from ..models import CsvImportJob
+from .csv_import import import_posts
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+class StaleJob(Exception):
+    """
+    Raised when a running job is queued again before it is done
+    """
+    pass
+
+
+def get_executor():
+    """
+    Worker pool of this process for csv import jobs (created at first use)
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "CSV_IMPORT_WORKERS", 2),
+            thread_name_prefix="csv-import")
+    return _executor
+
+
+def queue_import_job(uploaded_file, user):
+    """
+    Save uploaded csv under media/tmp and queue import job.
+    Job is given to worker pool after the transaction of request is committed.
+    Param: Django's uploaded file, import user
+    return: queued job
+    """
+    file_path = "tmp/import-{}.csv".format(uuid.uuid4().hex)
+    with open(os.path.join(settings.MEDIA_ROOT, file_path), "wb") as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+    job = CsvImportJob.objects.create(
+        user=user, file_path=file_path, total_bytes=uploaded_file.size)
+    transaction.on_commit(lambda: get_executor().submit(run_import_job_in_thread, job.id))
+    return job
+
+
+def run_import_job_in_thread(job_id):
+    """
+    Run job in worker thread and close database connections of the thread
+    """
+    try:
+        run_import_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def count_bytes(csv_file, job):
+    """
+    Yield lines of file and count read bytes to job.bytes_done
+    """
+    for line in csv_file:
+        job.bytes_done += len(line)
+        yield line
+
+
+def check_job_file(job, path, batch_size):
+    """
+    Read whole csv of job before import and count rows without 3 columns to job.rows_failed.
+    Progress (bytes_done) is saved every batch_size rows, so poller can see percent and ETA.
+    Param: job, csv file path, rows between progress saves
+    return: error message or "" if every row (header too) has 3 columns
+    """
+    rows = 0
+    first_failed = None
+    with open(path, "rb") as csv_file:
+        reader = csv.reader(codecs.iterdecode(count_bytes(csv_file, job), "utf-8-sig"))
+        for i, row in enumerate(reader):
+            rows += 1
+            if len(row) != 3:
+                job.rows_failed += 1
+                first_failed = first_failed or i + 1
+            if rows % batch_size == 0:
+                job.save(update_fields=["bytes_done", "rows_failed"])
+    job.save(update_fields=["bytes_done", "rows_failed"])
+    if not rows:
+        return "Post upload csv must have 3 columns"
+    if job.rows_failed:
+        return "Post upload csv must have 3 columns ({} rows, first at line {})".format(
+            job.rows_failed, first_failed)
+    return ""
+
+
+def run_import_job(job_id):
+    """
+    Import csv of queued job with same result as import in request: whole file is checked first
+    and a file with any row without 3 columns (or not utf-8) fails without saving posts.
+    Posts are inserted in one transaction, so a failed or stopped import saves nothing
+    and the job can be queued again (requeue_stale_jobs()).
+    Progress of the check is saved every batch, so poller can see percent and ETA
+    (percent is 100 while checked posts are inserted).
+    Param: id of job
+    return: False if job is already taken by another worker
+    """
+    started_at = timezone.now()
+    claimed = CsvImportJob.objects.filter(pk=job_id, status="0").update(
+        status="1", started_at=started_at, bytes_done=0, rows_done=0, rows_failed=0, error="")
+    if not claimed:
+        return False
+    job = CsvImportJob.objects.select_related("user").get(pk=job_id)
+    batch_size = getattr(settings, "CSV_IMPORT_BATCH_SIZE", 1000)
+    path = os.path.join(settings.MEDIA_ROOT, job.file_path)
+    try:
+        error = check_job_file(job, path, batch_size)
+        if not error:
+            with transaction.atomic():
+                with open(path, "rb") as csv_file:
+                    rows = csv.reader(codecs.iterdecode(csv_file, "utf-8-sig"))
+                    job.rows_done, seconds = import_posts(islice(rows, 1, None), job.user, batch_size)
+                # job queued again by requeue_stale_jobs() is imported by another worker
+                if not CsvImportJob.objects.select_for_update().filter(
+                        pk=job_id, status="1", started_at=started_at).exists():
+                    raise StaleJob
+                job.status = "2"
+                job.finished_at = timezone.now()
+                job.save()
+            os.unlink(path)
+            return True
+    except StaleJob:
+        logger.warning("csv import job %s is queued again, import is rolled back", job_id)
+        return True
+    except (UnicodeDecodeError, csv.Error):
+        error = "Please choose csv format"
+    except Exception as exception:
+        logger.exception("csv import job %s is failed", job_id)
+        error = str(exception)[:255]
+    # failed job saved nothing
+    if CsvImportJob.objects.filter(pk=job_id, status="1", started_at=started_at).update(
+            status="3", error=error, rows_done=0, finished_at=timezone.now()):
+        if os.path.exists(path):
+            os.unlink(path)
+    return True
+
+
+def requeue_stale_jobs(max_age=None):
+    """
+    Queue again jobs left running by a stopped worker (e.g. killed process).
+    Nothing of a running job is saved until it is done, so it is imported again from start.
+    Param: seconds since job is started (default CSV_IMPORT_STALE_SECONDS)
+    return: number of queued jobs
+    """
+    max_age = getattr(settings, "CSV_IMPORT_STALE_SECONDS", 3600) if max_age is None else max_age
+    return CsvImportJob.objects.filter(
+        status="1", started_at__lt=timezone.now() - datetime.timedelta(seconds=max_age)
+    ).update(status="0", started_at=None, bytes_done=0, rows_failed=0)
+
+
+def job_progress(job):
+    """
+    Progress data of job for polling
+    return: dictionary of status, rows done, rows failed, percent and ETA seconds
+    """
+    percent = 100.0 if job.status == "2" else 0.0
+    eta = None
+    if job.status == "1" and job.total_bytes:
+        percent = min(job.bytes_done * 100.0 / job.total_bytes, 100.0)
+        elapsed = (timezone.now() - job.started_at).total_seconds()
+        if job.bytes_done and elapsed > 0:
+            eta = (job.total_bytes - job.bytes_done) / (job.bytes_done / elapsed)
+    return {
+        "status": job.get_status_display(),
+        "rows_done": job.rows_done,
+        "rows_failed": job.rows_failed,
+        "percent": round(percent, 1),
+        "eta_seconds": None if eta is None else round(eta, 1),
+        "error": job.error,
+    }
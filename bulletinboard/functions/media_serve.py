@@ -0,0 +1,195 @@
+"""
+Media file responses with ETag, Last-Modified (304 Not Modified) and single byte Range (206).
+Only profile images (upload/) are public, confirm page previews of save_temp() (tmp/) are for
+logged in users and other files of MEDIA_ROOT (e.g. csv imports in tmp/) are never served.
+With MEDIA_ACCEL the file is sent by the front proxy (nginx X-Accel-Redirect, apache/lighttpd X-Sendfile),
+Django only checks the path and conditional headers.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404
+from django.http.response import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+from .helpers import COPY_CHUNK_SIZE
+from .media_store import is_stored
+
+# content addressed files never change
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+PUBLIC_FOLDER = "upload/"
+# temp name of save_temp() (uuid hex with extension)
+PREVIEW_NAME = re.compile(r"^tmp/[0-9a-f]{32}(\.[a-z0-9]+)?$")
+
+
+class RangeNotSatisfiable(Exception):
+    """
+    Raised when range starts after end of file
+    """
+    pass
+
+
+def is_public(path):
+    """
+    True if media path is a profile image or thumbnail, served to anyone
+    """
+    return path.startswith(PUBLIC_FOLDER)
+
+
+def is_preview(path):
+    """
+    True if media path is a temp upload of confirm page, served to logged in users
+    """
+    return PREVIEW_NAME.match(path) is not None
+
+
+def media_file(path):
+    """
+    Absolute path of media file
+    Param: path under MEDIA_URL
+    Return: file path, raise Http404 if it is not a public file or preview, outside of MEDIA_ROOT,
+    hidden or not a file
+    """
+    if not (is_public(path) or is_preview(path)) or any(part.startswith(".") for part in path.split("/")):
+        raise Http404("Media file is not found.")
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Media file is not found.")
+    if not os.path.isfile(full_path):
+        raise Http404("Media file is not found.")
+    return full_path
+
+
+def media_etag(path, stat):
+    """
+    Strong ETag of media file, content hash of content addressed file
+    or modified time and size of other files
+    """
+    if is_stored(path):
+        return '"{}"'.format(os.path.splitext(os.path.basename(path))[0])
+    return '"{:x}-{:x}"'.format(stat.st_mtime_ns, stat.st_size)
+
+
+def parse_range(header, size):
+    """
+    Byte range of Range header (one range only, other ranges are ignored and whole file is sent)
+    Param: Range header, file size
+    Return: (first byte, last byte) or None for whole file, raise RangeNotSatisfiable
+    """
+    match = BYTE_RANGE.match(header.strip())
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        if int(last) == 0:
+            raise RangeNotSatisfiable
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    """
+    True if Range can be used (no If-Range or If-Range is current ETag / Last-Modified)
+    """
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith(('"', "W/")):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def read_range(path, start, length):
+    """
+    Yield bytes of file range in chunks
+    """
+    with open(path, "rb") as media:
+        media.seek(start)
+        while length > 0:
+            chunk = media.read(min(COPY_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def cache_control(path):
+    if is_preview(path):
+        return "private, no-cache"
+    if is_stored(path):
+        return "public, max-age={}, immutable".format(IMMUTABLE_MAX_AGE)
+    return "public, max-age={}".format(getattr(settings, "MEDIA_MAX_AGE", 3600))
+
+
+def media_response(request, path):
+    """
+    Response of media file for GET or HEAD request
+    Param: request (client request), path under MEDIA_URL
+    Return: 304 if browser has same file, 206 for Range, 416 if Range is after end of file,
+    empty response with X-Accel-Redirect / X-Sendfile if MEDIA_ACCEL is set, or whole file
+    """
+    full_path = media_file(path)
+    stat = os.stat(full_path)
+    etag = media_etag(path, stat)
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type, encoding = mimetypes.guess_type(full_path)
+        if encoding or not content_type:
+            content_type = "application/octet-stream"
+        response = file_response(request, path, full_path, stat.st_size, content_type,
+                                 etag, last_modified)
+    if response.status_code in (200, 206, 304):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        response["Cache-Control"] = cache_control(path)
+    return response
+
+
+def file_response(request, path, full_path, size, content_type, etag, last_modified):
+    accel = getattr(settings, "MEDIA_ACCEL", None)
+    if accel == "x-accel-redirect":
+        # proxy sends the file of internal location and answers Range itself
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = getattr(settings, "MEDIA_ACCEL_PREFIX", "/protected-media/") + quote(path)
+        return response
+    if accel == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = full_path
+        return response
+    byte_range = None
+    if "HTTP_RANGE" in request.META and if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.META["HTTP_RANGE"], size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = "bytes */{}".format(size)
+            return response
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=content_type)
+        response["Content-Length"] = size
+    elif byte_range is not None:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(full_path, start, end - start + 1), status=206, content_type=content_type)
+        response["Content-Range"] = "bytes {}-{}/{}".format(start, end, size)
+        response["Content-Length"] = end - start + 1
+    else:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    response["Accept-Ranges"] = "bytes"
+    return response
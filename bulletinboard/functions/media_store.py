@@ -0,0 +1,115 @@
+"""
+Content addressed store of profile images.
+Image is saved as upload/<first 2 hex>/<sha256 of bytes>.<ext>, so same image uploaded
+again is not written again and the URL of a file never changes (browser can cache it forever).
+Reference count of a file is the number of users whose profile is its path (user_profile_idx).
+StoredMedia row of the file is locked while it is stored or released, so a file is never deleted
+by release() while another request is linking the same image.
+Store the file before the transaction which saves the user and release(name, reserved=True) after it:
+committed user keeps the file, rolled back user releases it.
+"""
+import hashlib
+import os
+import re
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import StoredMedia, User
+from .helpers import COPY_CHUNK_SIZE, link_file
+from .thumbnails import make_thumbnails, thumbnail_name, thumbnail_sizes
+
+STORE_FOLDER = "upload"
+STORED_NAME = re.compile(r"^upload/[0-9a-f]{2}/[0-9a-f]{64}(\.[a-z0-9]+)?$")
+
+
+def file_digest(path):
+    """
+    sha256 of file read in chunks
+    Param: file path
+    return: hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(COPY_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_stored(name):
+    """
+    True if media path is a content addressed file (content of path never changes)
+    """
+    return bool(name) and STORED_NAME.match(name) is not None
+
+
+def locked_media(name):
+    """
+    StoredMedia row of file locked until the end of the transaction (created at first use)
+    """
+    StoredMedia.objects.get_or_create(name=name)
+    return StoredMedia.objects.select_for_update().get(name=name)
+
+
+def store_temp(fname):
+    """
+    Link temp file of save_temp() to the store and reserve it for the user which is saved next.
+    Temp file is kept (confirm page can be saved again), remove it after the user is saved.
+    If same content is stored already nothing is written.
+    Param: file name of temp file
+    return: media path of stored file (e.g. upload/3f/3f2a...9c.jpg)
+    """
+    tmp = os.path.join(settings.MEDIA_ROOT, "tmp", os.path.basename(fname))
+    digest = file_digest(tmp)
+    ext = os.path.splitext(fname)[1].lower()
+    name = "{}/{}/{}{}".format(STORE_FOLDER, digest[:2], digest, ext)
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    with transaction.atomic():
+        media = locked_media(name)
+        if not os.path.exists(path):
+            link_file(tmp, path)
+            make_thumbnails(name)
+        media.reserved += 1
+        media.linked_at = timezone.now()
+        media.save()
+    return name
+
+
+def release(name, reserved=False):
+    """
+    Delete stored file and its thumbnails if no user refers to it and no request is saving a user with it.
+    Reservation of store_temp() older than MEDIA_STORE_GRACE seconds (request was stopped) is ignored.
+    Param: media path of old profile (files which are not content addressed are kept),
+    reserved (True to end own reservation of store_temp() after the user is saved or rolled back)
+    return: True if file is deleted
+    """
+    if not is_stored(name):
+        return False
+    grace = timedelta(seconds=getattr(settings, "MEDIA_STORE_GRACE", 60))
+    with transaction.atomic():
+        media = locked_media(name)
+        if reserved and media.reserved > 0:
+            media.reserved -= 1
+            media.save(update_fields=["reserved"])
+        if User.objects.filter(profile=name).exists() or \
+                (media.reserved > 0 and timezone.now() - media.linked_at < grace):
+            return False
+        media.delete()
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        if not os.path.exists(path):
+            return False
+        os.unlink(path)
+        for size in thumbnail_sizes():
+            try:
+                os.unlink(os.path.join(settings.MEDIA_ROOT, thumbnail_name(name, size)))
+            except FileNotFoundError:
+                pass
+    return True
+
+
+def release_on_commit(name):
+    """
+    release() after the transaction which changed the profile is committed
+    """
+    transaction.on_commit(lambda: release(name))
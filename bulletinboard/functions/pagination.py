@@ -0,0 +1,196 @@
+import base64
+import json
+import math
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    """
+    Raised when a page cursor token can not be decoded
+    """
+    pass
+
+
+class CountedPaginator(Paginator):
+    """
+    Page number paginator with known total rows, so COUNT(*) query is not run
+    Param: object_list (queryset), per_page (rows per page), count (total rows)
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
+
+
+class KeysetPage:
+    """
+    One page of keyset paginator.
+    Same interface of django's Page which is used by templates
+    (iteration, has_next, has_previous, number) and cursor tokens of next and previous page.
+    """
+
+    def __init__(self, object_list, number, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return "<Page {}>".format(self.number)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Cursor based paginator.
+    Seek to the page by the ordering values of last (or first) row of current page
+    instead of OFFSET, so every page cost same as first page and no COUNT(*) query is run.
+    Param: object_list (queryset), per_page (rows per page),
+    ordering (unique ordering fields, last one must be unique such as id),
+    count (optional total rows to show "Page X of Y")
+    """
+
+    def __init__(self, object_list, per_page, ordering=("-updated_at", "-id"), count=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.count = count
+
+    @property
+    def num_pages(self):
+        """
+        Total page count if total rows is given, else None (unknown)
+        """
+        if self.count is None:
+            return None
+        return max(1, math.ceil(self.count / self.per_page))
+
+    @staticmethod
+    def encode_cursor(values, number, direction):
+        """
+        Encode ordering values of boundary row into opaque url safe token
+        """
+        data = json.dumps({"v": values, "n": number, "d": direction},
+                          cls=DjangoJSONEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, token):
+        """
+        Decode cursor token into (values, number, direction)
+        """
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values, number, direction = data["v"], int(data["n"]), data["d"]
+        except (ValueError, TypeError, KeyError):
+            raise InvalidCursor("Invalid page cursor")
+        if direction not in ("next", "prev") or not isinstance(values, list) \
+                or len(values) != len(self.ordering):
+            raise InvalidCursor("Invalid page cursor")
+        return values, max(number, 1), direction
+
+    def _field_names(self):
+        return [field.lstrip("-") for field in self.ordering]
+
+    def _row_values(self, obj):
+        return [getattr(obj, name) for name in self._field_names()]
+
+    def _seek_filter(self, values, reverse):
+        """
+        Build (a < x) OR (a = x AND b < y) ... filter for rows after the given values
+        """
+        names = self._field_names()
+        seek = Q()
+        for i, field in enumerate(self.ordering):
+            descending = field.startswith("-") != reverse
+            lookup = "{}__{}".format(names[i], "lt" if descending else "gt")
+            condition = Q(**{lookup: values[i]})
+            for name, value in zip(names[:i], values[:i]):
+                condition &= Q(**{name: value})
+            seek |= condition
+        return seek
+
+    def _reverse_ordering(self):
+        return [field[1:] if field.startswith("-") else "-" + field for field in self.ordering]
+
+    def _fetch(self, values, reverse, limit):
+        """
+        Fetch limit rows after (or before if reverse) the given ordering values
+        """
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, reverse))
+        queryset = queryset.order_by(
+            *(self._reverse_ordering() if reverse else self.ordering))
+        return list(queryset[:limit])
+
+    def chunks(self, key=None):
+        """
+        Iterate all rows as lists of per_page rows, each chunk seeks from last row of previous chunk.
+        Memory is bounded by per_page on every database
+        (mysql driver has no server side cursor, so QuerySet.iterator() loads whole result).
+        param: key (function to get ordering values of a row, needed for values_list queryset)
+        """
+        key = key or self._row_values
+        values = None
+        while True:
+            rows = self._fetch(values, False, self.per_page)
+            if rows:
+                yield rows
+            if len(rows) < self.per_page:
+                return
+            values = key(rows[-1])
+
+    def page(self, cursor=None):
+        """
+        Return page of given cursor token (first page if cursor is empty)
+        """
+        values, number, direction = None, 1, "next"
+        if cursor:
+            values, number, direction = self.decode_cursor(cursor)
+        reverse = direction == "prev"
+        rows = self._fetch(values, reverse, self.per_page + 1)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(
+                self._row_values(rows[-1]), number + 1, "next")
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(
+                self._row_values(rows[0]), number - 1, "prev")
+        return KeysetPage(rows, number, self, next_cursor, previous_cursor)
+
+    def get_page(self, cursor=None):
+        """
+        Same as page() but return first page for invalid cursor
+        """
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
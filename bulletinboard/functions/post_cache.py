@@ -0,0 +1,121 @@
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+
+from .pagination import KeysetPage
+
+# generation of every scope (bumped when user name on any post may be changed)
+GLOBAL_SCOPE = "global"
+# scope of admin user post list (all live posts)
+ALL_SCOPE = "all"
+
+
+def get_cache():
+    """
+    Cache of post list pages (POST_LIST_CACHE alias of CACHES setting)
+    """
+    return caches[getattr(settings, "POST_LIST_CACHE", "post_list")]
+
+
+def user_scope(user):
+    """
+    Scope of post list shown to the user. Admin sees all posts, normal user sees own posts.
+    """
+    return ALL_SCOPE if user.type == "0" else "user:{}".format(user.id)
+
+
+def _generation_key(scope):
+    return "post_list:gen:{}".format(scope)
+
+
+def _new_generation():
+    # time of change is a part of generation, see cache_page()
+    return "{:.3f}-{}".format(time.time(), uuid.uuid4().hex[:12])
+
+
+class PageCacheKey(str):
+    """
+    Cache key of a page with time of latest invalidation of its scopes
+    """
+
+    def __new__(cls, key, changed_at):
+        obj = super().__new__(cls, key)
+        obj.changed_at = changed_at
+        return obj
+
+
+def page_cache_key(user, cursor):
+    """
+    Cache key of a post list page. Key contains current generation of global and user scope,
+    so invalidation only writes new generation and old pages are never read again
+    (they are evicted by TIMEOUT and MAX_ENTRIES of cache backend).
+    Get the key before querying the page, so a page queried during invalidation
+    is saved under old generation.
+    Param: login user, page cursor token
+    """
+    cache = get_cache()
+    scope = user_scope(user)
+    keys = [_generation_key(GLOBAL_SCOPE), _generation_key(scope)]
+    generations = cache.get_many(keys)
+    missing = [key for key in keys if key not in generations]
+    if missing:
+        # new (or evicted) generation must not match pages cached before
+        for key in missing:
+            cache.add(key, _new_generation(), None)
+        generations.update(cache.get_many(missing))
+    changed_at = max(float(str(generations.get(key, "0")).split("-")[0]) for key in keys)
+    return PageCacheKey("post_list:page:{}:{}:{}:{}".format(
+        scope, generations.get(keys[0]), generations.get(keys[1]), cursor or ""), changed_at)
+
+
+def invalidate_post_list(*created_user_ids):
+    """
+    Drop cached post list pages which can show posts of the given owners
+    (admin list and owner lists) in one cache write. Drop pages of every scope if owner is not given.
+    Param: created_user_id of changed posts (optional)
+    """
+    if created_user_ids:
+        scopes = [ALL_SCOPE] + ["user:{}".format(user_id) for user_id in set(created_user_ids)]
+    else:
+        scopes = [GLOBAL_SCOPE]
+    get_cache().set_many({_generation_key(scope): _new_generation() for scope in scopes}, None)
+
+
+def invalidate_post_list_on_commit(*created_user_ids, using="default"):
+    """
+    Drop cached post list pages now and again after commit,
+    so a page which another request cached before commit is dropped too.
+    Param: created_user_id of changed posts (optional), database alias
+    """
+    invalidate_post_list(*created_user_ids)
+    if connections[using].in_atomic_block:
+        transaction.on_commit(
+            lambda: invalidate_post_list(*created_user_ids), using=using)
+
+
+def get_cached_page(key, paginator):
+    """
+    Cached keyset page of post list
+    Param: page_cache_key(), paginator of page
+    Return: KeysetPage or None if not cached
+    """
+    data = get_cache().get(key)
+    if data is None:
+        return None
+    rows, number, next_cursor, previous_cursor, paginator.count = data
+    return KeysetPage(rows, number, paginator, next_cursor, previous_cursor)
+
+
+def cache_page(key, page, min_age=0):
+    """
+    Save keyset page of post list (rows are model instances, only row count of paginator is saved).
+    Page read from a replica is not saved until min_age seconds after latest invalidation,
+    because the replica can be behind the primary and old rows would be cached under new generation.
+    Param: page_cache_key(), KeysetPage, min_age (seconds, replication lag)
+    """
+    if time.time() - key.changed_at < min_age:
+        return
+    get_cache().set(key, (list(page.object_list), page.number, page.next_cursor,
+                          page.previous_cursor, page.paginator.count))
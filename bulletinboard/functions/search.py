@@ -0,0 +1,121 @@
+import re
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+POST_TABLE = "bulletinboard_post"
+FTS_TABLE = "bulletinboard_post_fts"
+MYSQL_FULLTEXT_INDEX = "post_fulltext_idx"
+# mysql's default innodb_ft_min_token_size, shorter words are not indexed
+MYSQL_MIN_TOKEN = 3
+
+SQLITE_TRIGGERS = {
+    # keep fts index same with post table on insert, update and delete (bulk_create too)
+    "bulletinboard_post_fts_insert": """
+        CREATE TRIGGER IF NOT EXISTS bulletinboard_post_fts_insert AFTER INSERT ON bulletinboard_post
+        BEGIN
+            INSERT INTO bulletinboard_post_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """,
+    "bulletinboard_post_fts_delete": """
+        CREATE TRIGGER IF NOT EXISTS bulletinboard_post_fts_delete AFTER DELETE ON bulletinboard_post
+        BEGIN
+            INSERT INTO bulletinboard_post_fts(bulletinboard_post_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+    """,
+    "bulletinboard_post_fts_update": """
+        CREATE TRIGGER IF NOT EXISTS bulletinboard_post_fts_update AFTER UPDATE OF title, description
+        ON bulletinboard_post
+        BEGIN
+            INSERT INTO bulletinboard_post_fts(bulletinboard_post_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO bulletinboard_post_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """,
+}
+
+
+def create_search_index(connection):
+    """
+    Create full text index of post title and description.
+    MySQL: FULLTEXT index. SQLite: FTS5 external content table and sync triggers.
+    Safe to call many times (sqlite table rebuild of migration drops triggers,
+    so missing triggers are created again and index is rebuilt).
+    param: database connection
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT COUNT(*) FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+                [POST_TABLE, MYSQL_FULLTEXT_INDEX])
+            if not cursor.fetchone()[0]:
+                cursor.execute("ALTER TABLE {} ADD FULLTEXT INDEX {} (title, description)".format(
+                    POST_TABLE, MYSQL_FULLTEXT_INDEX))
+        elif connection.vendor == "sqlite":
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [POST_TABLE])
+            existing = {row[0] for row in cursor.fetchall()}
+            cursor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS {} USING fts5("
+                "title, description, content='{}', content_rowid='id')".format(FTS_TABLE, POST_TABLE))
+            for name, sql in SQLITE_TRIGGERS.items():
+                if name not in existing:
+                    cursor.execute(sql)
+            if not set(SQLITE_TRIGGERS) <= existing:
+                cursor.execute(
+                    "INSERT INTO {0}({0}) VALUES ('rebuild')".format(FTS_TABLE))
+
+
+def drop_search_index(connection):
+    """
+    Drop full text index of post
+    param: database connection
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "mysql":
+            cursor.execute("ALTER TABLE {} DROP INDEX {}".format(
+                POST_TABLE, MYSQL_FULLTEXT_INDEX))
+        elif connection.vendor == "sqlite":
+            for name in SQLITE_TRIGGERS:
+                cursor.execute("DROP TRIGGER IF EXISTS {}".format(name))
+            cursor.execute("DROP TABLE IF EXISTS {}".format(FTS_TABLE))
+
+
+def search_posts(post_list, keyword, connection):
+    """
+    Filter post queryset by keyword with full text index and annotate relevance as "rank"
+    (bigger is more relevant). Use icontains for other database.
+    param: post queryset, search keyword, database connection
+    return: (filtered queryset, ordering of search result)
+    """
+    ordering = ("-updated_at", "-id")
+    words = re.findall(r"\w+", keyword or "")
+    if connection.vendor == "mysql":
+        words = [word for word in words if len(word) >= MYSQL_MIN_TOKEN]
+    if not words:
+        if keyword:
+            return post_list.filter(Q(title__icontains=keyword) | Q(description__icontains=keyword)), ordering
+        return post_list, ordering
+    if connection.vendor == "mysql":
+        match = "MATCH ({0}.title, {0}.description) AGAINST (%s IN BOOLEAN MODE)".format(
+            connection.ops.quote_name(POST_TABLE))
+        query = " ".join("+{}*".format(word) for word in words)
+        post_list = post_list.annotate(
+            rank=RawSQL(match, [query])).filter(rank__gt=0)
+    elif connection.vendor == "sqlite":
+        # every word is quoted for fts5 syntax, prefix match like "LIKE word%"
+        query = " ".join('"{}"*'.format(word) for word in words)
+        # fts table is joined once, MATCH and bm25 are read from the same row of the join
+        post_list = post_list.extra(
+            tables=[FTS_TABLE],
+            where=["{0}.rowid = {1}.id".format(FTS_TABLE, connection.ops.quote_name(POST_TABLE)),
+                   "{0} MATCH %s".format(FTS_TABLE)],
+            params=[query])
+        # bm25 is smaller for better match, title is weighted more than description
+        post_list = post_list.annotate(rank=RawSQL("-bm25({0}, 10.0, 1.0)".format(FTS_TABLE), []))
+    else:
+        return post_list.filter(Q(title__icontains=keyword) | Q(description__icontains=keyword)), ordering
+    return post_list, ("-rank",) + ordering
@@ -0,0 +1,63 @@
+from collections import Counter
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import DELETED, ListCounter, Post
+from .counters import add_counts
+from .post_cache import invalidate_post_list_on_commit
+
+# max posts of one bulk delete request
+MAX_BULK_DELETE = 500
+
+
+def soft_delete_posts(posts, delete_user_id):
+    """
+    Soft delete many posts with one UPDATE in one transaction.
+    Deleted rows are locked first, so list counters are decreased by rows which are really deleted,
+    then counters and post list caches are updated once for all posts.
+    Param: queryset of live posts to delete (already scoped by user permission), deleting user id
+    Return: number of deleted posts
+    """
+    using = posts.db
+    with transaction.atomic(using=using):
+        rows = list(posts.select_for_update().values_list("id", "created_user_id"))
+        if not rows:
+            return 0
+        deleted = posts.filter(pk__in=[row[0] for row in rows]).update(
+            delete_user_id=delete_user_id, deleted_at=timezone.now(), live_state=DELETED)
+        owners = Counter(row[1] for row in rows)
+        amounts = {"post:all": -deleted}
+        amounts.update({"post:user:{}".format(owner): -count for owner, count in owners.items()})
+        add_counts(amounts, using=using)
+        invalidate_post_list_on_commit(*owners, using=using)
+    return deleted
+
+
+def deactivate_users(users, delete_user_id):
+    """
+    Soft delete many users and all their posts in one transaction.
+    Users and posts are deleted with one UPDATE each (posts are found by post_owner_live_idx),
+    so no row is loaded per post. Post counters of deactivated users become 0 without counting.
+    Param: queryset of live users to delete (already scoped by user permission), deleting user id
+    Return: (number of deleted users, number of deleted posts)
+    """
+    using = users.db
+    with transaction.atomic(using=using):
+        rows = list(users.select_for_update().values_list("id", "created_user_id"))
+        if not rows:
+            return 0, 0
+        user_ids = [row[0] for row in rows]
+        now = timezone.now()
+        deleted_users = users.filter(pk__in=user_ids).update(
+            delete_user_id=delete_user_id, deleted_at=now, live_state=DELETED)
+        deleted_posts = Post.live.using(using).filter(created_user_id__in=user_ids).update(
+            delete_user_id=delete_user_id, deleted_at=now, live_state=DELETED)
+        creators = Counter(row[1] for row in rows)
+        amounts = {"user:all": -deleted_users, "post:all": -deleted_posts}
+        amounts.update({"user:user:{}".format(creator): -count for creator, count in creators.items()})
+        add_counts(amounts, using=using)
+        ListCounter.objects.using(using).filter(
+            scope__in=["post:user:{}".format(user_id) for user_id in user_ids]).update(value=0)
+        if deleted_posts:
+            invalidate_post_list_on_commit(*user_ids, using=using)
+    return deleted_users, deleted_posts
@@ -0,0 +1,115 @@
+import logging
+import os
+from django.conf import settings
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional, original profile is shown without it
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# name: (max width, max height) of profile thumbnails
+DEFAULT_THUMBNAIL_SIZES = {"medium": (150, 150), "large": (300, 300)}
+
+
+def thumbnail_sizes():
+    return getattr(settings, "THUMBNAIL_SIZES", DEFAULT_THUMBNAIL_SIZES)
+
+
+def thumbnail_name(profile, size):
+    """
+    Media path of thumbnail (e.g. upload/a.png -> upload/thumbs/medium/a.png.jpg)
+    Param: media path of profile image, size name
+    """
+    folder, name = os.path.split(profile)
+    return os.path.join(folder, "thumbs", size, name + ".jpg").replace("\\", "/")
+
+
+def image_error(upload):
+    """
+    Check uploaded profile before the confirm page, only the image header is read.
+    Param: uploaded file
+    Return: error message or None if it is an image of at most PROFILE_MAX_PIXELS pixels
+    (None without Pillow)
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(upload) as image:
+            width, height = image.size
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return "profile must be an image"
+    finally:
+        upload.seek(0)
+    max_pixels = getattr(settings, "PROFILE_MAX_PIXELS", 25000000)
+    if width * height > max_pixels:
+        return "profile image must be at most {} pixels".format(max_pixels)
+    return None
+
+
+def make_thumbnails(profile):
+    """
+    Make JPEG thumbnail of every size of THUMBNAIL_SIZES for uploaded profile image.
+    Aspect ratio is kept, transparent background is white.
+    Image is decoded at reduced scale (JPEG draft) and reduced to the largest size first,
+    so a big image is not converted at full size.
+    Param: media path of profile image (e.g. upload/a.png)
+    Return: list of media path of thumbnails (empty if Pillow is not installed or file is not an image)
+    """
+    if Image is None or not profile:
+        return []
+    sizes = thumbnail_sizes()
+    largest = (max(box[0] for box in sizes.values()), max(box[1] for box in sizes.values()))
+    names = []
+    try:
+        with Image.open(os.path.join(settings.MEDIA_ROOT, profile)) as original:
+            # exif orientation may swap width and height
+            original.draft("RGB", (max(largest), max(largest)))
+            image = ImageOps.exif_transpose(original)
+            if image.mode == "P":
+                # palette image is resized without smoothing
+                image = image.convert("RGBA")
+            image.thumbnail(largest, Image.LANCZOS, reducing_gap=3.0)
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            else:
+                image = image.convert("RGB")
+            for size, box in sizes.items():
+                thumbnail = image.copy()
+                thumbnail.thumbnail(box, Image.LANCZOS)
+                name = thumbnail_name(profile, size)
+                os.makedirs(os.path.dirname(os.path.join(settings.MEDIA_ROOT, name)), exist_ok=True)
+                thumbnail.save(os.path.join(settings.MEDIA_ROOT, name), "JPEG", quality=85, optimize=True)
+                names.append(name)
+    except (OSError, ValueError, Image.DecompressionBombError) as error:
+        logger.warning("Thumbnail of %s is not made: %s", profile, error)
+    return names
+
+
+def thumbnail_url(profile, size="medium"):
+    """
+    URL of profile thumbnail, URL of original image if thumbnail is not made
+    Param: media path of profile image, size name
+    Return: URL or empty string if user has no profile
+    """
+    if not profile:
+        return ""
+    name = thumbnail_name(profile, size)
+    if os.path.exists(os.path.join(settings.MEDIA_ROOT, name)):
+        return settings.MEDIA_URL + name
+    return settings.MEDIA_URL + profile
+
+
+def add_profile_thumbnails(rows, size="medium"):
+    """
+    Add thumbnail URL of profile to user detail data of detail_structs()
+    Param: list of user detail data, size name
+    Return: same list
+    """
+    for row in rows:
+        row["profile_thumbnail"] = thumbnail_url(row["fields"].get("profile"), size)
+    return rows
@@ -0,0 +1,106 @@
+"""
+Sweeper of temp uploads left in media/tmp by abandoned confirm pages and csv imports.
+Run sweep_tmp_uploads command from cron, or set TMP_SWEEP_INTERVAL to sweep in a thread of each process.
+"""
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from django.db import connections
+
+from ..models import CsvImportJob
+
+logger = logging.getLogger(__name__)
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+def sweep_tmp_uploads(ttl=None, batch_size=None, dry_run=False):
+    """
+    Delete files in MEDIA_ROOT/tmp not changed in ttl seconds, at most batch_size files.
+    Files of queued or running csv import jobs and hidden files (e.g. .gitkeep) are kept.
+    Param: ttl (seconds, default TMP_UPLOAD_TTL), batch_size (default TMP_SWEEP_BATCH_SIZE),
+    dry_run (count files without deleting)
+    return: number of deleted files and reclaimed bytes
+    """
+    ttl = getattr(settings, "TMP_UPLOAD_TTL", 86400) if ttl is None else ttl
+    batch_size = getattr(settings, "TMP_SWEEP_BATCH_SIZE", 500) if batch_size is None else batch_size
+    cutoff = time.time() - ttl
+    active = set(CsvImportJob.objects.filter(status__in=("0", "1")).values_list("file_path", flat=True))
+    deleted = reclaimed = 0
+    try:
+        entries = os.scandir(os.path.join(settings.MEDIA_ROOT, "tmp"))
+    except FileNotFoundError:
+        return 0, 0
+    with entries:
+        for entry in entries:
+            if deleted >= batch_size:
+                break
+            if entry.name.startswith(".") or "tmp/" + entry.name in active:
+                continue
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_mtime >= cutoff:
+                    continue
+                if not dry_run:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                # removed by the request or another sweeper
+                continue
+            deleted += 1
+            reclaimed += stat.st_size
+    return deleted, reclaimed
+
+
+def sweep_all(ttl=None, batch_size=None, max_batches=None, dry_run=False):
+    """
+    sweep_tmp_uploads() in batches until no old file is left
+    Param: ttl, batch_size, max_batches (optional limit), dry_run
+    return: number of deleted files, reclaimed bytes and batches
+    """
+    batch_size = getattr(settings, "TMP_SWEEP_BATCH_SIZE", 500) if batch_size is None else batch_size
+    deleted = reclaimed = batches = 0
+    while max_batches is None or batches < max_batches:
+        files, size = sweep_tmp_uploads(ttl, batch_size, dry_run)
+        batches += 1
+        deleted += files
+        reclaimed += size
+        # dry run counts same files again
+        if files < batch_size or dry_run:
+            break
+    return deleted, reclaimed, batches
+
+
+def _sweep_periodically(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            deleted, reclaimed, batches = sweep_all(max_batches=getattr(settings, "TMP_SWEEP_MAX_BATCHES", 10))
+            if deleted:
+                logger.info("Temp upload sweep deleted %s files (%s bytes) in %s batches",
+                            deleted, reclaimed, batches)
+        except Exception:
+            logger.exception("Temp upload sweep is failed")
+        finally:
+            connections.close_all()
+
+
+def start_periodic_sweep():
+    """
+    Start sweeper thread of this process once if TMP_SWEEP_INTERVAL (seconds) is set
+    return: True if thread is running
+    """
+    global _sweeper
+    interval = getattr(settings, "TMP_SWEEP_INTERVAL", None)
+    if not interval:
+        return False
+    with _sweeper_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(target=_sweep_periodically, args=(interval,),
+                                        name="tmp-sweeper", daemon=True)
+            _sweeper.start()
+    return True
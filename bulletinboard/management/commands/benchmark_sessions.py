@@ -0,0 +1,90 @@
+"""
+Benchmark of session database queries per request.
+Run requests through SessionMiddleware with database sessions, with the cached session engine
+and with the cached session engine batching the changed key ("requests" in SESSION_BATCH_KEYS) in a transaction (rolled back at the end) and report database queries and time per request.
+Part of requests set session data again with the same value (like the old confirm page flags),
+every --change-every request changes the data.
+usage: python manage.py benchmark_sessions --requests 1000 --sessions 50 --change-every 10
+"""
+import time
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http.response import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from bulletinboard.backends.session import flush_sessions
+
+DB_ENGINE = "django.contrib.sessions.backends.db"
+BATCH_ENGINE = "bulletinboard.backends.session"
+
+
+class Rollback(Exception):
+    """
+    Raised to roll back the benchmark sessions
+    """
+    pass
+
+
+def session_view(request):
+    """
+    View which reads the session on every request and sets data on some requests
+    """
+    request.session.get("_auth_user_id")
+    number = request.session.get("requests", 0)
+    if request.change:
+        request.session["requests"] = number + 1
+    elif request.touch:
+        request.session["requests"] = number
+    return HttpResponse()
+
+
+class Command(BaseCommand):
+    help = "Benchmark database queries per request of database sessions and cached batch sessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000,
+                            help="number of requests")
+        parser.add_argument("--sessions", type=int, default=50,
+                            help="number of browser sessions")
+        parser.add_argument("--change-every", type=int, default=10,
+                            help="every n-th request changes session data")
+        parser.add_argument("--touch-every", type=int, default=2,
+                            help="every n-th request sets same session data again")
+
+    def handle(self, *args, **options):
+        for engine, batch_keys in ((DB_ENGINE, ()), (BATCH_ENGINE, ()), (BATCH_ENGINE, ("requests",))):
+            try:
+                with transaction.atomic():
+                    with override_settings(SESSION_ENGINE=engine, SESSION_BATCH_KEYS=batch_keys):
+                        self.measure(engine, batch_keys, options)
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def measure(self, engine, batch_keys, options):
+        middleware = SessionMiddleware(session_view)
+        factory = RequestFactory()
+        cookies = {}
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for number in range(options["requests"]):
+                browser = number % options["sessions"]
+                request = factory.get("/")
+                if browser in cookies:
+                    request.COOKIES[settings.SESSION_COOKIE_NAME] = cookies[browser]
+                request.change = browser not in cookies or number % options["change_every"] == 0
+                request.touch = number % options["touch_every"] == 0
+                response = middleware(request)
+                if settings.SESSION_COOKIE_NAME in response.cookies:
+                    cookies[browser] = response.cookies[settings.SESSION_COOKIE_NAME].value
+            # sessions waiting for batch are counted too
+            flush_sessions()
+            total = time.perf_counter() - start
+        self.stdout.write("engine: {} (batch keys: {})".format(engine, ", ".join(batch_keys) or "-"))
+        self.stdout.write("database queries: {} ({:.2f} per request)".format(
+            len(queries), len(queries) / options["requests"]))
+        self.stdout.write("time: {:.1f} ms ({:.3f} ms per request)".format(
+            total * 1000, total * 1000 / options["requests"]))
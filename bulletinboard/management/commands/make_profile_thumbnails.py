@@ -0,0 +1,32 @@
+"""
+Make thumbnails of profiles uploaded before thumbnails are made on upload.
+usage: python manage.py make_profile_thumbnails [--force]
+"""
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bulletinboard.functions import thumbnails
+from bulletinboard.models import User
+
+
+class Command(BaseCommand):
+    help = "Make missing thumbnails of user profiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true",
+                            help="make thumbnails again even if they exist")
+
+    def handle(self, *args, **options):
+        if thumbnails.Image is None:
+            raise CommandError("Pillow is not installed")
+        made = 0
+        profiles = User.objects.exclude(profile="").values_list("profile", flat=True).distinct()
+        for profile in profiles.iterator():
+            if not options["force"] and all(
+                    os.path.exists(os.path.join(settings.MEDIA_ROOT, thumbnails.thumbnail_name(profile, size)))
+                    for size in thumbnails.thumbnail_sizes()):
+                continue
+            if thumbnails.make_thumbnails(profile):
+                made += 1
+        self.stdout.write("thumbnails of {} profiles are made".format(made))
@@ -0,0 +1,23 @@
+"""
+Drop post/user list counters, they are counted again at next view of the list.
+Run after rows are changed outside of the app (admin site, sql) to fix page counts.
+usage: python manage.py reset_list_counters [--scope post:all ...]
+"""
+from django.core.management.base import BaseCommand
+
+from bulletinboard.functions.counters import reset_counts
+from bulletinboard.functions.post_cache import invalidate_post_list
+
+
+class Command(BaseCommand):
+    help = "Drop list counters so they are counted again"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scope", action="append", dest="scopes",
+                            help="counter scope to drop (all counters if not given)")
+
+    def handle(self, *args, **options):
+        reset_counts(options["scopes"])
+        # cached post list pages have page count too
+        invalidate_post_list()
+        self.stdout.write("list counters are reset")
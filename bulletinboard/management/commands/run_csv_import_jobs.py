@@ -0,0 +1,38 @@
+"""
+Worker of queued csv import jobs (no message broker is needed, jobs are in database).
+Web process runs jobs in its own thread pool; this command picks up jobs which are
+left queued (e.g. web process was restarted) or can be used as dedicated worker.
+Jobs left running longer than CSV_IMPORT_STALE_SECONDS (worker was killed) are queued again first.
+usage: python manage.py run_csv_import_jobs [--loop] [--interval 5]
+"""
+import time
+from django.core.management.base import BaseCommand
+
+from bulletinboard.functions.import_jobs import requeue_stale_jobs, run_import_job
+from bulletinboard.models import CsvImportJob
+
+
+class Command(BaseCommand):
+    help = "Run queued csv import jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true",
+                            help="keep polling for new jobs")
+        parser.add_argument("--interval", type=float, default=5,
+                            help="seconds between polling")
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale_jobs()
+            if requeued:
+                self.stdout.write("{} stale running jobs are queued again".format(requeued))
+            job_ids = list(CsvImportJob.objects.filter(
+                status="0").order_by("created_at").values_list("id", flat=True))
+            for job_id in job_ids:
+                if run_import_job(job_id):
+                    job = CsvImportJob.objects.get(pk=job_id)
+                    self.stdout.write("job {}: {} ({} rows done, {} rows failed)".format(
+                        job_id, job.get_status_display(), job.rows_done, job.rows_failed))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
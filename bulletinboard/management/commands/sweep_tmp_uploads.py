@@ -0,0 +1,27 @@
+"""
+Delete temp uploads in media/tmp left by abandoned confirm pages and csv imports.
+usage: python manage.py sweep_tmp_uploads [--ttl 86400] [--batch-size 500] [--max-batches 10] [--dry-run]
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bulletinboard.functions.tmp_sweeper import sweep_all
+
+
+class Command(BaseCommand):
+    help = "Delete temp uploads older than TTL in batches and report reclaimed bytes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ttl", type=int, default=getattr(settings, "TMP_UPLOAD_TTL", 86400),
+                            help="seconds since last change of deleted files")
+        parser.add_argument("--batch-size", type=int, default=getattr(settings, "TMP_SWEEP_BATCH_SIZE", 500))
+        parser.add_argument("--max-batches", type=int, default=None,
+                            help="stop after this number of batches (all old files if not given)")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="count old files without deleting")
+
+    def handle(self, *args, **options):
+        deleted, reclaimed, batches = sweep_all(
+            options["ttl"], options["batch_size"], options["max_batches"], options["dry_run"])
+        self.stdout.write("{} {} files, {} bytes in {} batches".format(
+            "found" if options["dry_run"] else "deleted", deleted, reclaimed, batches))
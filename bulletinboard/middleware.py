@@ -0,0 +1,43 @@
+from django.conf import settings
+
+from .functions.media_serve import is_public, media_response
+from .routers import PIN_COOKIE, start_request
+
+
+class MediaMiddleware:
+    """
+    Answer GET and HEAD of public media (profile images) before session, auth and database middleware,
+    so an image request does not load the session or touch the database.
+    Other media urls (confirm page previews) go to serve_media view which checks the login.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # media on other host (e.g. https://cdn...) is not served here
+        self.prefix = settings.MEDIA_URL if settings.MEDIA_URL.startswith("/") else None
+
+    def __call__(self, request):
+        if self.prefix and request.method in ("GET", "HEAD") and request.path_info.startswith(self.prefix):
+            path = request.path_info[len(self.prefix):]
+            if is_public(path):
+                return media_response(request, path)
+        return self.get_response(request)
+
+
+class ReplicaMiddleware:
+    """
+    Read-your-writes of replica router.
+    A request which writes (or any POST) pins the browser to primary database
+    for REPLICA_STICKY_SECONDS with a cookie, so next pages do not read old data from a replica.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = start_request(pinned=PIN_COOKIE in request.COOKIES)
+        response = self.get_response(request)
+        if state.wrote or request.method == "POST":
+            response.set_cookie(PIN_COOKIE, "1", max_age=getattr(settings, "REPLICA_STICKY_SECONDS", 5),
+                                httponly=True, samesite="Lax")
+        return response
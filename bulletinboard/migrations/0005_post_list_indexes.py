@@ -0,0 +1,21 @@
+# Generated by Django 4.0.1 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulletinboard', '0004_alter_post_created_at_alter_post_deleted_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['created_user_id', 'delete_user_id', 'deleted_at', 'updated_at'], name='post_owner_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['delete_user_id', 'deleted_at', 'updated_at'], name='post_live_idx'),
+        ),
+    ]
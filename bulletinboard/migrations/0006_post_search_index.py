@@ -0,0 +1,24 @@
+# Generated by Django 4.0.1 on 2026-10-18 10:00
+
+from django.db import migrations
+
+from bulletinboard.functions.search import create_search_index, drop_search_index
+
+
+def forwards(apps, schema_editor):
+    create_search_index(schema_editor.connection)
+
+
+def backwards(apps, schema_editor):
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulletinboard', '0005_post_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.0.1 on 2026-10-18 19:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulletinboard', '0007_post_updated_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CsvImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_path', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('0', 'queued'), ('1', 'running'), ('2', 'done'), ('3', 'failed')], default='0', max_length=1)),
+                ('total_bytes', models.BigIntegerField(default=0)),
+                ('bytes_done', models.BigIntegerField(default=0)),
+                ('rows_done', models.IntegerField(default=0)),
+                ('rows_failed', models.IntegerField(default=0)),
+                ('error', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
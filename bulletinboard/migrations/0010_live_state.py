@@ -0,0 +1,56 @@
+# Generated by Django 4.0.1 on 2026-10-18 19:59
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def mark_deleted_rows(apps, schema_editor):
+    deleted = Q(delete_user_id__isnull=False) | Q(deleted_at__isnull=False)
+    for name in ("Post", "User"):
+        model = apps.get_model("bulletinboard", name)
+        model.objects.using(schema_editor.connection.alias).filter(deleted).update(live_state="0")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulletinboard', '0009_listcounter'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_owner_live_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_live_idx',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='live_state',
+            field=models.CharField(choices=[('1', 'live'), ('0', 'deleted')], default='1', max_length=1),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='live_state',
+            field=models.CharField(choices=[('1', 'live'), ('0', 'deleted')], default='1', max_length=1),
+        ),
+        migrations.RunPython(mark_deleted_rows, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['created_user_id', 'live_state', 'updated_at'], name='post_owner_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['live_state', 'updated_at'], name='post_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['created_user_id', 'live_state', 'updated_at'], name='user_owner_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['live_state', 'updated_at'], name='user_live_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.1 on 2026-10-18 20:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulletinboard', '0010_live_state'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['profile'], name='user_profile_idx'),
+        ),
+    ]
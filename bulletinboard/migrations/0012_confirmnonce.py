@@ -0,0 +1,24 @@
+# Generated by Django 4.0.1 on 2026-10-18 20:59
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulletinboard', '0011_user_profile_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConfirmNonce',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nonce', models.CharField(max_length=32, unique=True)),
+                ('secrets', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('used_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.1 on 2026-10-18 21:04
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulletinboard', '0012_confirmnonce'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('reserved', models.IntegerField(default=0)),
+                ('linked_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
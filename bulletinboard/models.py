@@ -45,7 +45,41 @@ class UserManager(BaseUserManager):
         return user
 
 
-class User(AbstractBaseUser):
+# live_state of soft delete: a char column is compared with "=", so the index is used
+# (boolean column is compiled as "WHERE is_live" which can not seek the index)
+LIVE = "1"
+DELETED = "0"
+LIVE_STATE = ((LIVE, "live"), (DELETED, "deleted"))
+
+
+class LiveManager(models.Manager):
+    """
+    Manager of live (not soft deleted) rows, filtered by indexed live_state column
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(live_state=LIVE)
+
+
+class LiveMixin:
+    """
+    Keep live_state column same with soft delete columns (delete_user_id, deleted_at) on save.
+    Queryset update() of soft delete columns must set live_state too.
+    """
+
+    @property
+    def is_live(self):
+        return self.live_state == LIVE
+
+    def save(self, *args, **kwargs):
+        self.live_state = LIVE if self.delete_user_id is None and self.deleted_at is None else DELETED
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"delete_user_id", "deleted_at"} & set(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"live_state"}
+        super().save(*args, **kwargs)
+
+
+class User(LiveMixin, AbstractBaseUser):
     username = None
     name = models.CharField(max_length=30)
     email = models.EmailField(
@@ -71,6 +105,7 @@ class User(AbstractBaseUser):
     created_at = models.DateField(default=timezone.now)
     updated_at = models.DateField(default=timezone.now)
     deleted_at = models.DateField(null=True, blank=True)
+    live_state = models.CharField(max_length=1, choices=LIVE_STATE, default=LIVE)
 
     is_staff = models.BooleanField(default=True)
     is_superuser = models.BooleanField(default=True)
@@ -79,9 +114,21 @@ class User(AbstractBaseUser):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []  # Email & Password are required by default.
     objects = UserManager()
+    live = LiveManager()
 
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [
+            # user list of normal user (scoped by creator)
+            models.Index(
+                fields=["created_user_id", "live_state", "updated_at"],
+                name="user_owner_live_idx",
+            ),
+            # user list of admin user (all live users)
+            models.Index(fields=["live_state", "updated_at"], name="user_live_idx"),
+            # reference count of profile image in media store
+            models.Index(fields=["profile"], name="user_profile_idx"),
+        ]
 
     def __str__(self):
         return self.email
@@ -97,7 +144,7 @@ class User(AbstractBaseUser):
         return True
 
 
-class Post(models.Model):
+class Post(LiveMixin, models.Model):
     title = models.CharField(max_length=255)
     description = models.CharField(max_length=255)
     POST_STATUS = (("0", "inactive"), ("1", "active"))
@@ -114,9 +161,91 @@ class Post(models.Model):
     created_at = models.DateField()
     updated_at = models.DateField()
     deleted_at = models.DateField(null=True, blank=True)
+    live_state = models.CharField(max_length=1, choices=LIVE_STATE, default=LIVE)
+
+    objects = models.Manager()
+    live = LiveManager()
 
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [
+            # post list of normal user (scoped by owner)
+            models.Index(
+                fields=["created_user_id", "live_state", "updated_at"],
+                name="post_owner_live_idx",
+            ),
+            # post list of admin user (all live posts)
+            models.Index(fields=["live_state", "updated_at"], name="post_live_idx"),
+            # post list csv download (all posts)
+            models.Index(fields=["updated_at", "id"], name="post_updated_idx"),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class CsvImportJob(models.Model):
+    JOB_STATUS = (("0", "queued"), ("1", "running"),
+                  ("2", "done"), ("3", "failed"))
+    user = models.ForeignKey("User", on_delete=models.CASCADE)
+    file_path = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=1,
+        choices=JOB_STATUS,
+        blank=False,
+        default="0",
+    )
+    total_bytes = models.BigIntegerField(default=0)
+    bytes_done = models.BigIntegerField(default=0)
+    rows_done = models.IntegerField(default=0)
+    rows_failed = models.IntegerField(default=0)
+    error = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return self.file_path
+
+
+class ListCounter(models.Model):
+    """
+    Live row count of a post/user list scope, kept up to date on create, soft delete and import
+    instead of COUNT(*) on every page view
+    """
+    scope = models.CharField(max_length=64, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return "{}: {}".format(self.scope, self.value)
+
+
+class ConfirmNonce(models.Model):
+    """
+    Nonce of confirm page token (functions/confirm.py). Row is inserted when the token is saved,
+    unique nonce lets every process save a token only once. Token with secrets (password hash)
+    inserts the row when the confirm page is shown, secrets are not put in the page.
+    """
+    nonce = models.CharField(max_length=32, unique=True)
+    secrets = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    used_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.nonce
+
+
+class StoredMedia(models.Model):
+    """
+    Content addressed file of media_store. Row is locked while the file is stored or released,
+    reserved counts requests which stored the file but did not finish saving their user yet.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    reserved = models.IntegerField(default=0)
+    linked_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,82 @@
+"""
+Database router of read replicas.
+Views decorated with read_replica read from a replica of DATABASE_REPLICAS,
+everything else (and every write) uses the primary ("default") database.
+After a write the browser is pinned to the primary for REPLICA_STICKY_SECONDS
+(ReplicaMiddleware sets a cookie), so users read their own writes.
+"""
+import contextvars
+import functools
+import random
+from django.conf import settings
+
+PRIMARY = "default"
+PIN_COOKIE = "db_primary_pin"
+
+
+class ReplicaState:
+    """
+    Routing state of current request
+    """
+
+    def __init__(self, pinned=False):
+        # browser wrote in last REPLICA_STICKY_SECONDS
+        self.pinned = pinned
+        # view allows replica read
+        self.read_replica = False
+        # this request wrote to primary
+        self.wrote = False
+
+
+_state = contextvars.ContextVar("replica_state", default=None)
+
+
+def start_request(pinned=False):
+    """
+    Set new routing state for a request (called by ReplicaMiddleware)
+    """
+    state = ReplicaState(pinned)
+    _state.set(state)
+    return state
+
+
+def end_request():
+    """
+    Drop routing state after response is sent (streamed response too)
+    """
+    _state.set(None)
+
+
+def read_replica(view):
+    """
+    Decorator of read-only view, its queries (and streamed response) read from a replica
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        if state is not None:
+            state.read_replica = True
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        state = _state.get()
+        if not replicas or state is None or not state.read_replica or state.pinned or state.wrote:
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas have same data as primary
+        return True
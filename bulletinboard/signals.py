@@ -0,0 +1,100 @@
+"""
+Signal receivers of bulletinboard app (connected in BulletinboardConfig.ready)
+"""
+from django.db import connections
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .functions.counters import add_count, post_scopes, user_scopes
+from .functions.post_cache import invalidate_post_list_on_commit
+from .functions.search import POST_TABLE, create_search_index
+from .functions.tmp_sweeper import start_periodic_sweep
+from .models import Post, User
+from .routers import end_request
+
+
+@receiver(post_migrate)
+def ensure_search_index(sender, using, **kwargs):
+    """
+    Make sure full text index of post is ready after every migrate.
+    Sqlite drops the fts triggers when a later migration rebuilds post table.
+    """
+    connection = connections[using]
+    if sender.name == "bulletinboard" and POST_TABLE in connection.introspection.table_names():
+        create_search_index(connection)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_list_of_post(sender, instance, using, **kwargs):
+    """
+    Drop cached post list pages of post owner when post is saved (soft delete too) or deleted
+    """
+    invalidate_post_list_on_commit(instance.created_user_id, using=using)
+
+
+@receiver(post_save, sender=User)
+def invalidate_post_list_of_user(sender, instance, created, update_fields, using, **kwargs):
+    """
+    Drop cached post list pages of new user (id of deleted user can be used again),
+    drop all pages when user is changed (user name is shown on post list).
+    Login only updates last_login, it does not change post list.
+    """
+    if created:
+        invalidate_post_list_on_commit(instance.id, using=using)
+    elif not (update_fields and set(update_fields) <= {"last_login"}):
+        invalidate_post_list_on_commit(using=using)
+
+
+@receiver(post_save, sender=Post)
+def count_created_post(sender, instance, created, using, **kwargs):
+    """
+    Count new live post in list counters (same transaction with insert)
+    """
+    if created and instance.is_live:
+        add_count(post_scopes(instance.created_user_id), 1, using=using)
+
+
+@receiver(post_save, sender=User)
+def count_created_user(sender, instance, created, using, **kwargs):
+    """
+    Count new live user in list counters (same transaction with insert)
+    """
+    if created and instance.is_live:
+        add_count(user_scopes(instance.created_user_id), 1, using=using)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_deleted_post(sender, instance, using, **kwargs):
+    """
+    Remove live post from list counters when post row is deleted
+    """
+    if instance.is_live:
+        add_count(post_scopes(instance.created_user_id), -1, using=using)
+
+
+@receiver(post_delete, sender=User)
+def uncount_deleted_user(sender, instance, using, **kwargs):
+    """
+    Remove live user from list counters when user row is deleted
+    """
+    if instance.is_live:
+        add_count(user_scopes(instance.created_user_id), -1, using=using)
+
+
+@receiver(request_finished)
+def end_replica_routing(sender, **kwargs):
+    """
+    Queries after the request (e.g. background thread of same thread pool) use primary database
+    """
+    end_request()
+
+
+@receiver(request_started)
+def start_tmp_sweeper(sender, **kwargs):
+    """
+    Start temp upload sweeper thread at first request of the process (TMP_SWEEP_INTERVAL),
+    not in ready() which runs for management commands too
+    """
+    start_periodic_sweep()
@@ -1,4 +1,50 @@
+// detail data of current list page, filled by one batch request on page load
+const postDetails = {};
+const userDetails = {};
+
+function prefetchDetails(url, details, attr) {
+  const ids = $("[" + attr + "]").map(function () {
+    return $(this).attr(attr);
+  }).get();
+  if (ids.length === 0) {
+    return;
+  }
+  $.ajax({
+    type: 'GET',
+    url: url,
+    data: {
+      'ids': ids.join(",")
+    },
+    success: function (response) {
+      Object.assign(details, JSON.parse(response));
+    }
+  })
+}
+
+function prefetchPostDetails() {
+  prefetchDetails("/post/details/", postDetails, "data-post-id");
+}
+
+function prefetchUserDetails() {
+  prefetchDetails("/user/details/", userDetails, "data-user-id");
+}
+
+function showPostDetail(data) {
+  let status = data.fields.status === "1" ? 'Active' : 'Not Active';
+  $("#title").html(data.fields.title);
+  $("#description").html(data.fields.description);
+  $("#status").html(status);
+  $("#created_date").html(data.fields.created_at);
+  $("#created_user").html(data.created_user_name);
+  $("#updated_date").html(data.fields.updated_at);
+  $("#updated_user").html(data.updated_user_name);
+}
+
 function goToPostDetail(post) {
+  if (postDetails[post]) {
+    showPostDetail(postDetails[post]);
+    return;
+  }
   $.ajax({
     type: 'GET',
     url: "/post/detail",
@@ -6,15 +52,7 @@ function goToPostDetail(post) {
       'post_id': post
     },
     success: function (response) {
-      const data = JSON.parse(response);
-      let status = data.fields.status === "1" ? 'Active' : 'Not Active';
-      $("#title").html(data.fields.title);
-      $("#description").html(data.fields.description);
-      $("#status").html(status);
-      $("#created_date").html(data.fields.created_at);
-      $("#created_user").html(data.created_user_name);
-      $("#updated_date").html(data.fields.updated_at);
-      $("#updated_user").html(data.updated_user_name);
+      showPostDetail(JSON.parse(response));
     },
     error: function (response) {
       alert(response["responseJSON"]["error"]);
@@ -22,7 +60,31 @@ function goToPostDetail(post) {
   })
 }
 
+function showUserDetail(data) {
+  let type = data.fields.type === "0" ? 'Admin' : 'User';
+  if (data.fields.profile) {
+    $('#user-profile-dialog').attr("src", data.profile_thumbnail || '/media/' + data.fields.profile)
+  } else {
+    $('#user-detail-profile').html("<p class='glyphicon glyphicon-user profile-icon'></p>")
+    $('#user-profile-dialog').hide()
+  }
+  $("#user-name").html(data.fields.name);
+  $("#user-type").html(type);
+  $("#user-email").html(data.fields.email);
+  $("#user-phone").html(data.fields.phone);
+  $("#user-dob").html(data.fields.dob);
+  $("#user-address").html(data.fields.address);
+  $("#created_date").html(data.fields.created_at);
+  $("#created_user").html(data.created_user_name);
+  $("#updated_date").html(data.fields.updated_at);
+  $("#updated_user").html(data.updated_user_name);
+}
+
 function goToUserDetail(user) {
+  if (userDetails[user]) {
+    showUserDetail(userDetails[user]);
+    return;
+  }
   $.ajax({
     type: 'GET',
     url: "/user/detail",
@@ -30,25 +92,7 @@ function goToUserDetail(user) {
       'user_id': user
     },
     success: function (response) {
-      const data = JSON.parse(response);
-      let type = data.fields.type === "0" ? 'Admin' : 'User';
-      console.log(data.fields.profile)
-      if (data.fields.profile) {
-        $('#user-profile-dialog').attr("src", '/media/' + data.fields.profile)
-      } else {
-        $('#user-detail-profile').html("<p class='glyphicon glyphicon-user profile-icon'></p>")
-        $('#user-profile-dialog').hide()
-      }
-      $("#user-name").html(data.fields.name);
-      $("#user-type").html(type);
-      $("#user-email").html(data.fields.email);
-      $("#user-phone").html(data.fields.phone);
-      $("#user-dob").html(data.fields.dob);
-      $("#user-address").html(data.fields.address);
-      $("#created_date").html(data.fields.created_at);
-      $("#created_user").html(data.created_user_name);
-      $("#updated_date").html(data.fields.updated_at);
-      $("#updated_user").html(data.updated_user_name);
+      showUserDetail(JSON.parse(response));
     },
     error: function (response) {
       alert(response["responseJSON"]["error"]);
@@ -137,23 +181,19 @@ function userDelete() {
   })
 }
 
-function downloadCSV(postList) {
-  $.ajax({
-    type: 'GET',
-    url: "/post/list/download",
-    data: {},
-    success: function (response) {
-      let hiddenElement = document.createElement('a');
-      const today = new Date();
-      const date = today.getFullYear().toString() + (today.getMonth() + 1).toString() + today.getDate().toString() +
-        today.getHours().toString() + today.getMinutes().toString() + today.getSeconds().toString();
-      hiddenElement.href = 'data:text/csv;charset=utf-8,' + encodeURI(response);
-      hiddenElement.target = '_blank';
-      hiddenElement.download = 'post_list' + date + '_' + '.csv';
-      hiddenElement.click();
-    },
-    error: function (response) {
-      alert(response["responseJSON"]["error"]);
-    }
-  })
-}
\ No newline at end of file
+function downloadCSV() {
+  // browser saves the streamed response directly (file name is given by server)
+  window.location.href = "/post/list/download";
+}
+function selectAll(name, checked) {
+  $("input[name='" + name + "']").prop("checked", checked);
+}
+
+function confirmBulkDelete(name, label) {
+  var count = $("input[name='" + name + "']:checked").length;
+  if (count == 0) {
+    alert("Please select " + label + " to delete.");
+    return false;
+  }
+  return confirm("Delete " + count + " selected " + label + "?");
+}
@@ -0,0 +1,13 @@
+from django import template
+
+from ..functions.thumbnails import thumbnail_url
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(profile, size="medium"):
+    """
+    URL of profile thumbnail for img tag (e.g. {{ profile|thumbnail:"large" }})
+    """
+    return thumbnail_url(profile, size)
@@ -12,20 +12,29 @@ urlpatterns = [
     path("post/create/", views.postCreate, name="post-create"),
     path("post/<int:pk>/", views.postUpdate, name="post-update"),
     path("post/detail/", views.post_detail, name="post-detail"),
+    path("post/details/", views.post_details, name="post-details"),
     path("post/delete/confirm/", views.post_delete_confirm,
          name="post-delete-confirm"),
     path("post/delete/", views.post_delete, name="post-delete"),
+    path("post/bulk-delete/", views.post_bulk_delete, name="post-bulk-delete"),
     path("users/", views.userList, name="user-list"),
     path("user/create/", views.userCreate, name="user-create"),
     path("profile/", views.userProfile, name="user-profile"),
     path("user/<int:pk>/", views.userUpdate, name="user-update"),
     path("user/detail/", views.user_detail, name="user-detail"),
+    path("user/details/", views.user_details, name="user-details"),
     path("user/delete/confirm/", views.user_delete_confirm,
          name="user-delete-confirm"),
     path("user/delete/", views.user_delete, name="user-delete"),
+    path("user/bulk-delete/", views.user_bulk_delete, name="user-bulk-delete"),
     path("csv/import/", views.csv_import, name="csv-import"),
+    path("csv/import/<int:pk>/", views.csv_import_progress,
+         name="csv-import-progress"),
+    path("csv/import/<int:pk>/status/", views.csv_import_status,
+         name="csv-import-status"),
     path("post/list/download", views.download_post_list_csv,
          name="post-list-download"),
+    path("db/pool/", views.db_pool_stats, name="db-pool-stats"),
     path("password-reset/", views.user_password_reset, name="password-reset"),
     re_path(r"^accounts/register/$", views.signup, name="create_account"),
 ]
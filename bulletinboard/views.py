@@ -1,21 +1,46 @@
 import csv
 import datetime
 import json
+import logging
+from itertools import islice
+from django.conf import settings
 from django.contrib.auth import authenticate, login
 from django.contrib import messages
-from django.http.response import HttpResponseRedirect, HttpResponse
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.http.response import HttpResponseRedirect, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
 from django.utils import timezone
 from django.shortcuts import get_object_or_404, redirect, render
-from django.db.models import Q
-from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.functions import Substr
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.contrib.auth.hashers import make_password, check_password
-from django.core import serializers
+from django.views.decorators.http import require_safe
+from django.core.serializers.json import DjangoJSONEncoder
 
+from .backends.pool import pool_stats
 from .form import PostForm, PostSearchForm, SignUpForm, UserEditForm, UserForm, UserSearchForm, csvForm, passwordResetForm
-from .models import Post, User
-from .functions.helpers import check_route, handle_uploaded_file, remove_temp, save_temp
+from .models import CsvImportJob, Post, User
+from .routers import PRIMARY, read_replica
+from .functions.confirm import ConfirmTokenUsed, confirm_token, read_confirm_token, use_confirm_token
+from .functions.counters import list_count, post_scope, user_scope
+from .functions.csv_export import stream_post_csv
+from .functions.csv_import import InvalidCsvRow, check_csv_row, import_posts, read_csv_upload, rows_per_second
+from .functions.details import detail_structs, parse_ids
+from .functions.helpers import remove_temp, save_temp
+from .functions.import_jobs import job_progress, queue_import_job
+from .functions.media_serve import is_preview, media_response
+from .functions.media_store import release, release_on_commit, store_temp
+from .functions.pagination import CountedPaginator, KeysetPaginator
+from .functions.post_cache import cache_page, get_cached_page, page_cache_key
+from .functions.search import search_posts
+from .functions.soft_delete import MAX_BULK_DELETE, deactivate_users, soft_delete_posts
+from .functions.thumbnails import add_profile_thumbnails, image_error
+
+logger = logging.getLogger(__name__)
 
 
 def user_login(request):
@@ -26,8 +51,7 @@ def user_login(request):
     """
     if request.method == "POST":
         email = request.POST["email"]
-        email_user = User.objects.filter(
-            email=email, delete_user_id=None, deleted_at=None)
+        email_user = User.live.filter(email=email)
         if email_user:
             password = request.POST["password"]
             authUser = authenticate(request, username=email, password=password)
@@ -42,6 +66,7 @@ def user_login(request):
 
 
 @login_required
+@read_replica
 def index(request):
     """
     Post list
@@ -53,29 +78,50 @@ def index(request):
     query = Q()
     if user.type == "1":
         query.add(Q(created_user_id__exact=user.id), Q.AND)
-    query.add(Q(delete_user_id=None), Q.AND)
-    query.add(Q(deleted_at=None), Q.AND)
-    post_search_form = PostSearchForm()
-    post_list = Post.objects.all().filter(query).order_by("-updated_at")
+    keyword = request.GET.get("keyword", "")
+    post_search_form = PostSearchForm(initial={"keyword": keyword})
+    live_posts = Post.live.filter(query)
+    post_list = live_posts.select_related("user").annotate(
+        excerpt=Substr("description", 1, 31)
+    ).only("id", "title", "updated_at", "user__name").order_by("-updated_at")
     if (request.method == "POST"):
         if "_search" in request.POST:
             post_search_form = PostSearchForm(request.POST)
             if post_search_form.is_valid():
-                search = post_search_form.cleaned_data.get("keyword")
-                search_q = Q()
-                search_q.add(Q(title__icontains=search), Q.OR)
-                search_q.add(Q(description__icontains=search), Q.OR)
-                post_list = post_list.filter(search_q).order_by("-updated_at")
+                keyword = post_search_form.cleaned_data.get("keyword")
         elif "_create" in request.POST:
             return HttpResponseRedirect(reverse("post-create"))
-
-    paginator = Paginator(post_list, 5)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
-    return render(request, "index.html", {"page_obj": page_obj, "form": post_search_form})
+    post_list, ordering = search_posts(post_list, keyword, connections[post_list.db])
+
+    if getattr(settings, "POST_LIST_PAGINATION", "keyset") == "keyset":
+        paginator = KeysetPaginator(post_list, 5, ordering=ordering)
+        cursor = request.GET.get("cursor")
+        page_obj = cache_key = None
+        if not keyword:
+            # search result is not cached
+            cache_key = page_cache_key(user, cursor)
+            page_obj = get_cached_page(cache_key, paginator)
+        if page_obj is None:
+            paginator.count = list_count(post_scope(user), live_posts, keyword, post_list)
+            page_obj = paginator.get_page(cursor)
+            if cache_key:
+                replica_lag = 0 if post_list.db == PRIMARY else getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+                cache_page(cache_key, page_obj, min_age=replica_lag)
+    else:
+        paginator = CountedPaginator(post_list.order_by(*ordering), 5,
+                                     list_count(post_scope(user), live_posts, keyword, post_list))
+        page_number = request.GET.get("page")
+        page_obj = paginator.get_page(page_number)
+    context = {
+        "page_obj": page_obj,
+        "form": post_search_form,
+        "keyword": keyword,
+    }
+    return render(request, "index.html", context)
 
 
 @login_required
+@read_replica
 def userList(request):
     """
     User list
@@ -88,9 +134,8 @@ def userList(request):
     q = Q()
     if user.type == "1":
         q.add(Q(created_user_id__exact=user.id), Q.AND)
-    q.add(Q(delete_user_id=None), Q.AND)
-    q.add(Q(deleted_at=None), Q.AND)
-    user_list = User.objects.filter(q).order_by("-updated_at")
+    user_list = live_users = User.live.filter(q).order_by("-updated_at")
+    search = ""
     if (request.method == "POST"):
         search_form = UserSearchForm(request.POST)
         if search_form.is_valid():
@@ -108,13 +153,14 @@ def userList(request):
             if to_date:
                 or_q.add(Q(created_at__lte=to_date), Q.AND)
             user_list = user_list.filter(or_q).order_by("-updated_at")
-
-    for user_data in user_list:
-        user_data.type = "Admin" if user_data.type == "0" else "User"
-        list_data = User.objects.get(pk=user_data.created_user_id)
-        user_data.created_user = list_data.name if hasattr(
-            list_data, "name") else ""
-    paginator = Paginator(user_list, 5)
+            if or_q:
+                search = "|".join(str(value or "") for value in (name, email, from_date, to_date))
+
+    created_user = User.objects.filter(pk=OuterRef("created_user_id"))
+    user_list = user_list.annotate(
+        created_user_name=Subquery(created_user.values("name")[:1]))
+    paginator = CountedPaginator(user_list, 5, list_count(
+        user_scope(user), live_users, search, user_list))
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
     return render(request, "bulletinboard/user_list.html", {"page_obj": page_obj, "form": search_form})
@@ -129,13 +175,15 @@ def postCreate(request):
     return render post create form at initial
     """
     form = PostForm()
-    check_route("post", request.META.get("HTTP_REFERER"), request)
+    token = ""
     user = get_object_or_404(User, pk=request.user.id)
     if request.method == "POST":
-        form = PostForm(request.POST)
+        # confirmed data of token is saved, readonly fields changed in browser are ignored
+        pending = read_confirm_token(request)
+        form = PostForm(request.POST if pending is None else pending)
         if form.is_valid():
             if "_save" in request.POST:
-                if request.session.get("save_confirm_page") == True:
+                if pending is not None:
                     new_post = Post(
                         title=form.cleaned_data.get("title"),
                         description=form.cleaned_data.get("description"),
@@ -146,8 +194,13 @@ def postCreate(request):
                         created_at=timezone.now(),
                         updated_at=timezone.now()
                     )
-                    new_post.save()
-                    request.session["save_confirm_page"] = False
+                    try:
+                        with transaction.atomic():
+                            use_confirm_token(request)
+                            new_post.save()
+                    except ConfirmTokenUsed:
+                        # double submit, post is saved by the first request
+                        pass
                     return HttpResponseRedirect(reverse("index"))
                 else:
                     formData = {
@@ -157,14 +210,14 @@ def postCreate(request):
                     form = PostForm(initial=formData)
                     form.fields["title"].widget.attrs["readonly"] = True
                     form.fields["description"].widget.attrs["readonly"] = True
-                    request.session["save_confirm_page"] = True
+                    token = confirm_token(request, formData)
             elif "_cancel" in request.POST:
-                request.session["save_confirm_page"] = False
                 return HttpResponseRedirect(reverse("post-create"))
     context = {
         "form": form,
         "operation": "create",
-        "save_confirm_page": request.session.get("save_confirm_page")
+        "save_confirm_page": bool(token),
+        "confirm_token": token,
     }
     return render(request, "bulletinboard/post-create.html", context)
 
@@ -180,29 +233,35 @@ def postUpdate(request, pk):
     edit_post = get_object_or_404(Post, pk=pk)
     form = PostForm(initial={"title": edit_post.title,
                     "description": edit_post.description})
-    check_route("post", request.META.get("HTTP_REFERER"), request)
+    token = ""
+    status = edit_post.status
     if request.method == "POST":
-        form = PostForm(request.POST)
+        # confirmed data of token is saved, readonly fields changed in browser are ignored
+        pending = read_confirm_token(request)
+        form = PostForm(request.POST if pending is None else pending)
         if form.is_valid():
             if "_save" in request.POST:
-                if request.session.get("save_confirm_page") == True:
+                if pending is not None:
                     user = get_object_or_404(User, pk=request.user.id)
                     edit_post.title = form.cleaned_data.get("title")
                     edit_post.description = form.cleaned_data.get(
                         "description")
-                    edit_post.status = request.session.get("status")
+                    edit_post.status = pending.get("status")
                     edit_post.user = user
                     edit_post.updated_user_id = user.id
                     edit_post.updated_at = timezone.now()
-                    edit_post.save()
-                    request.session["save_confirm_page"] = False
+                    try:
+                        with transaction.atomic():
+                            use_confirm_token(request)
+                            edit_post.save()
+                    except ConfirmTokenUsed:
+                        pass
                     return HttpResponseRedirect(reverse("index"))
                 else:
                     if len(request.POST.getlist("post_status")) > 0:
                         status = "1"
                     else:
                         status = "0"
-                    request.session["status"] = status
                     formData = {
                         "title": form.cleaned_data.get("title"),
                         "description": form.cleaned_data.get("description"),
@@ -211,21 +270,22 @@ def postUpdate(request, pk):
                     form = PostForm(initial=formData)
                     form.fields["title"].widget.attrs["readonly"] = True
                     form.fields["description"].widget.attrs["readonly"] = True
-                    request.session["save_confirm_page"] = True
+                    token = confirm_token(request, formData)
             elif "_cancel" in request.POST:
-                request.session["save_confirm_page"] = False
                 return HttpResponseRedirect(reverse("post-update", kwargs={"pk": pk}))
     context = {
         "id": pk,
         "form": form,
         "operation": "edit",
-        "save_confirm_page": request.session.get("save_confirm_page"),
-        "status": request.session.get("status")
+        "save_confirm_page": bool(token),
+        "confirm_token": token,
+        "status": status
     }
     return render(request, "bulletinboard/post-create.html", context)
 
 
 @login_required
+@read_replica
 def post_detail(request):
     """
     Display for post detail dialog
@@ -233,15 +293,28 @@ def post_detail(request):
     Return: request post data to ajax func and show dialog
     """
     post_id = request.GET["post_id"]
-    obj = Post.objects.get(pk=post_id)
-    created_user_name = obj.user.name
-    updated_user = User.objects.get(pk=obj.updated_user_id)
-    data = serializers.serialize("json", [obj, ])
-    struct = json.loads(data)
-    struct[0]["created_user_name"] = created_user_name
-    struct[0]["updated_user_name"] = updated_user.name
-    data = json.dumps(struct[0])
-    return HttpResponse(data)
+    data = detail_structs(Post.objects.filter(pk=post_id))
+    if not data:
+        raise Http404("No post matches the given query.")
+    return HttpResponse(json.dumps(data[0], cls=DjangoJSONEncoder))
+
+
+@login_required
+@read_replica
+def post_details(request):
+    """
+    Detail data of many posts for detail dialogs of post list page
+    Param: request (client request), ids (comma separated post ids)
+    Return: json of post id and detail data in one query (posts not in user's post list are left out)
+    """
+    user = request.user
+    # same posts as post list (live posts, user sees own posts only)
+    query = Q()
+    if user.type == "1":
+        query.add(Q(created_user_id__exact=user.id), Q.AND)
+    ids = parse_ids(request.GET.get("ids", ""))
+    data = detail_structs(Post.live.filter(query, pk__in=ids))
+    return HttpResponse(json.dumps({row["pk"]: row for row in data}, cls=DjangoJSONEncoder))
 
 
 @login_required
@@ -252,11 +325,10 @@ def post_delete_confirm(request):
     Return: request post data to ajax func and show delete confrim dialog
     """
     post_id = request.GET["post_id"]
-    obj = Post.objects.get(pk=post_id)
-    data = serializers.serialize("json", [obj, ])
-    struct = json.loads(data)
-    data = json.dumps(struct[0])
-    return HttpResponse(data)
+    data = detail_structs(Post.objects.filter(pk=post_id))
+    if not data:
+        raise Http404("No post matches the given query.")
+    return HttpResponse(json.dumps(data[0], cls=DjangoJSONEncoder))
 
 
 @login_required
@@ -268,9 +340,27 @@ def post_delete(request):
     """
     post_id = request.GET["post_id"]
     obj = get_object_or_404(Post, pk=post_id)
-    obj.delete_user_id = request.user.id
-    obj.deleted_at = timezone.now()
-    obj.save()
+    # row is locked before the counter is decreased, concurrent delete of same post counts once
+    soft_delete_posts(Post.live.filter(pk=obj.pk), request.user.id)
+    return HttpResponseRedirect(reverse("index"))
+
+
+@login_required
+def post_bulk_delete(request):
+    """
+    For bulk delete of selected posts in post list
+    Param: request (client request), post_ids (selected post ids of POST request)
+    Return: soft delete selected posts with one update and render post list
+    """
+    if request.method == "POST":
+        user = get_object_or_404(User, pk=request.user.id)
+        post_ids = [int(post_id) for post_id in request.POST.getlist("post_ids")
+                    if post_id.isdigit()][:MAX_BULK_DELETE]
+        posts = Post.live.filter(pk__in=post_ids)
+        if user.type == "1":
+            posts = posts.filter(created_user_id=user.id)
+        deleted = soft_delete_posts(posts, user.id)
+        messages.info(request, "{} posts are deleted.".format(deleted))
     return HttpResponseRedirect(reverse("index"))
 
 
@@ -283,75 +373,98 @@ def userCreate(request):
     return render user create form at initial
     """
     form = UserForm()
-    check_route("user", request.META.get("HTTP_REFERER"), request)
+    token = ""
     profile = ""
     if request.method == "POST":
+        pending = read_confirm_token(request)
         if "_save" in request.POST:
             form = UserForm(request.POST, request.FILES)
-            if form.is_valid():
-                if request.session.get("save_confirm_page") == True:
-                    try:
-                        handle_uploaded_file(request.session.get("profile"))
-                        user = get_object_or_404(User, pk=request.user.id)
-                        new_user = User(
-                            name=form.cleaned_data.get("name"),
-                            email=form.cleaned_data.get("email"),
-                            password=make_password(
-                                form.cleaned_data.get("password")),
-                            type=form.cleaned_data.get("type"),
-                            phone=form.cleaned_data.get("phone"),
-                            dob=form.cleaned_data.get("dob"),
-                            address=form.cleaned_data.get("address"),
-                            profile="upload/"+request.session.get("profile"),
-                            created_user_id=user.id,
-                            updated_user_id=user.id,
-                            created_at=timezone.now(),
-                            updated_at=timezone.now()
-                        )
+            if pending is not None:
+                # confirmed data of token is saved, readonly fields changed in browser are ignored
+                image = ""
+                try:
+                    user = get_object_or_404(User, pk=request.user.id)
+                    new_user = User(
+                        name=pending["name"],
+                        email=pending["email"],
+                        password=pending["password"],
+                        type=pending["type"],
+                        phone=pending["phone"],
+                        dob=pending["dob"],
+                        address=pending["address"],
+                        created_user_id=user.id,
+                        updated_user_id=user.id,
+                        created_at=timezone.now(),
+                        updated_at=timezone.now()
+                    )
+                    # image is stored before the transaction, it is reserved until the user refers to it
+                    image = store_temp(pending["profile"])
+                    new_user.profile = image
+                    with transaction.atomic():
+                        use_confirm_token(request)
                         new_user.save()
-                        request.session["save_confirm_page"] = False
-                        remove_temp(request.session.get("profile"))
-                        return HttpResponseRedirect(reverse("user-list"))
-                    except Exception as error:
-                        request.session["save_confirm_page"] = False
-                        form.add_error(None, str(error))
+                    remove_temp(pending["profile"])
+                    return HttpResponseRedirect(reverse("user-list"))
+                except ConfirmTokenUsed:
+                    return HttpResponseRedirect(reverse("user-list"))
+                except Exception as error:
+                    form.add_error(None, str(error))
+                    # token is not used by rolled back save, confirm page can be saved again
+                    token = request.POST["confirm_token"]
+                    profile = pending["profile"]
+                finally:
+                    # image of rolled back save is removed, saved one is kept by its user
+                    if image:
+                        release(image, reserved=True)
+            elif form.is_valid():
+                profile_error = image_error(request.FILES["profile"]) if "profile" in request.FILES else None
+                if profile_error:
+                    form.add_error("profile", profile_error)
+                elif "profile" in request.FILES:
+                    profile = save_temp(request.FILES["profile"])
+                    formData = {
+                        "name": form.cleaned_data.get("name"),
+                        "email": form.cleaned_data.get("email"),
+                        "password": form.cleaned_data.get("password"),
+                        "passwordConfirm": form.cleaned_data.get("passwordConfirm"),
+                        "type": form.cleaned_data.get("type"),
+                        "phone": form.cleaned_data.get("phone"),
+                        "dob": form.cleaned_data.get("dob"),
+                        "address": form.cleaned_data.get("address"),
+                    }
+                    form = UserForm(initial=formData)
+                    # token is readable in the page, only the password hash is kept
+                    # password hash is kept in database, not in the page
+                    token = confirm_token(request, {
+                        "name": formData["name"],
+                        "email": formData["email"],
+                        "type": formData["type"],
+                        "phone": formData["phone"],
+                        "dob": formData["dob"],
+                        "address": formData["address"],
+                        "profile": profile,
+                    }, secrets={"password": make_password(formData["password"])})
+                    form.fields["name"].widget.attrs["readonly"] = True
+                    form.fields["email"].widget.attrs["readonly"] = True
+                    form.fields["password"].widget.attrs["readonly"] = True
+                    form.fields["passwordConfirm"].widget.attrs["readonly"] = True
+                    form.fields["type"].widget.attrs["readonly"] = True
+                    form.fields["phone"].widget.attrs["readonly"] = True
+                    form.fields["dob"].widget.attrs["readonly"] = True
+                    form.fields["address"].widget.attrs["readonly"] = True
+                    form.fields["profile"].widget.attrs["readonly"] = True
                 else:
-                    if "profile" in request.FILES:
-                        profile = save_temp(request.FILES["profile"])
-                        formData = {
-                            "name": form.cleaned_data.get("name"),
-                            "email": form.cleaned_data.get("email"),
-                            "password": form.cleaned_data.get("password"),
-                            "passwordConfirm": form.cleaned_data.get("passwordConfirm"),
-                            "type": form.cleaned_data.get("type"),
-                            "phone": form.cleaned_data.get("phone"),
-                            "dob": form.cleaned_data.get("dob"),
-                            "address": form.cleaned_data.get("address"),
-                        }
-                        form = UserForm(initial=formData)
-                        request.session["save_confirm_page"] = True
-                        request.session["profile"] = profile
-                        form.fields["name"].widget.attrs["readonly"] = True
-                        form.fields["email"].widget.attrs["readonly"] = True
-                        form.fields["password"].widget.attrs["readonly"] = True
-                        form.fields["passwordConfirm"].widget.attrs["readonly"] = True
-                        form.fields["type"].widget.attrs["readonly"] = True
-                        form.fields["phone"].widget.attrs["readonly"] = True
-                        form.fields["dob"].widget.attrs["readonly"] = True
-                        form.fields["address"].widget.attrs["readonly"] = True
-                        form.fields["profile"].widget.attrs["readonly"] = True
-                    else:
-                        request.session["save_confirm_page"] = False
-                        form.add_error("profile", "profile can not be blank")
+                    form.add_error("profile", "profile can not be blank")
         else:
-            request.session["save_confirm_page"] = False
-            remove_temp(request.session.get("profile"))
+            if pending is not None:
+                remove_temp(pending["profile"])
             return HttpResponseRedirect(reverse("user-create"))
     context = {
         "form": form,
         "operation": "create",
         "profile": "tmp/"+profile,
-        "save_confirm_page": request.session.get("save_confirm_page")
+        "save_confirm_page": bool(token),
+        "confirm_token": token,
     }
     return render(request, "bulletinboard/user-create.html", context)
 
@@ -386,7 +499,7 @@ def userUpdate(request, pk):
     return render user update form at initial
     """
     req_user = get_object_or_404(User, pk=pk)
-    check_route("user", request.META.get("HTTP_REFERER"), request)
+    token = ""
     profile = req_user.profile
     tmp_file = profile
     formData = {
@@ -400,16 +513,15 @@ def userUpdate(request, pk):
     }
     form = UserEditForm(initial=formData)
     if request.method == "POST":
+        pending = read_confirm_token(request)
         if "_save" in request.POST:
-            form = UserEditForm(request.POST, request.FILES)
+            # confirmed data of token is saved, readonly fields changed in browser are ignored
+            form = UserEditForm(request.POST if pending is None else pending, request.FILES)
+            profile_error = None
+            if pending is None and "profile" in request.FILES:
+                profile_error = image_error(request.FILES["profile"])
             if form.is_valid():
-                if request.session.get("save_confirm_page") == True:
-                    image = ""
-                    if request.session.get("updated_image") == True:
-                        handle_uploaded_file(request.session.get("profile"))
-                        image = "upload/"+request.session.get("profile")
-                    else:
-                        image = request.session.get("profile")
+                if pending is not None:
                     user = get_object_or_404(User, pk=request.user.id)
                     user.name = form.cleaned_data.get("name")
                     user.email = form.cleaned_data.get("email")
@@ -417,21 +529,43 @@ def userUpdate(request, pk):
                     user.phone = form.cleaned_data.get("phone")
                     user.dob = form.cleaned_data.get("dob")
                     user.address = form.cleaned_data.get("address")
-                    user.profile = image
+                    old_image = user.profile
+                    if not pending["updated_image"]:
+                        user.profile = pending["profile"]
                     user.updated_user_id = user.id
                     user.updated_at = timezone.now()
-                    user.save()
-                    request.session["save_confirm_page"] = False
-                    if request.session.get("updated_image") == True:
-                        remove_temp(request.session.get("profile"))
-                    return HttpResponseRedirect(reverse("user-list"))
+                    image = ""
+                    try:
+                        if pending["updated_image"]:
+                            # image is stored before the transaction, it is reserved until the user refers to it
+                            image = store_temp(pending["profile"])
+                            user.profile = image
+                        with transaction.atomic():
+                            use_confirm_token(request)
+                            user.save()
+                        if image:
+                            remove_temp(pending["profile"])
+                        if old_image != user.profile:
+                            release_on_commit(old_image)
+                        return HttpResponseRedirect(reverse("user-list"))
+                    except ConfirmTokenUsed:
+                        return HttpResponseRedirect(reverse("user-list"))
+                    except Exception as error:
+                        form.add_error(None, str(error))
+                        # token is not used by rolled back save, confirm page can be saved again
+                        token = request.POST["confirm_token"]
+                        tmp_file = "tmp/{}".format(pending["profile"]) if pending["updated_image"] else profile
+                    finally:
+                        # image of rolled back save is removed, saved one is kept by its user
+                        if image:
+                            release(image, reserved=True)
+                elif profile_error:
+                    form.add_error("profile", profile_error)
                 else:
-                    if "profile" in request.FILES:
+                    updated_image = "profile" in request.FILES
+                    if updated_image:
                         profile = save_temp(request.FILES["profile"])
-                        request.session["updated_image"] = True
                         tmp_file = "tmp/{}".format(profile)
-                    else:
-                        request.session["updated_image"] = False
                     formData = {
                         "name": form.cleaned_data.get("name"),
                         "email": form.cleaned_data.get("email"),
@@ -442,8 +576,7 @@ def userUpdate(request, pk):
                         "profile": profile,
                     }
                     form = UserEditForm(initial=formData)
-                    request.session["save_confirm_page"] = True
-                    request.session["profile"] = profile
+                    token = confirm_token(request, dict(formData, updated_image=updated_image))
                     form.fields["name"].widget.attrs["readonly"] = True
                     form.fields["email"].widget.attrs["readonly"] = True
                     form.fields["type"].widget.attrs["readonly"] = True
@@ -452,21 +585,22 @@ def userUpdate(request, pk):
                     form.fields["address"].widget.attrs["readonly"] = True
                     form.fields["profile"].widget.attrs["disabled"] = True
         else:
-            request.session["save_confirm_page"] = False
-            if request.session.get("updated_image") == True:
-                remove_temp(request.session.get("profile"))
+            if pending is not None and pending["updated_image"]:
+                remove_temp(pending["profile"])
             return HttpResponseRedirect(reverse("user-update", kwargs={"pk": pk}))
     context = {
         "id": req_user.id,
         "form": form,
         "old_profile":  req_user.profile,
         "profile": tmp_file,
-        "save_confirm_page": request.session.get("save_confirm_page")
+        "save_confirm_page": bool(token),
+        "confirm_token": token,
     }
     return render(request, "bulletinboard/user-update.html", context)
 
 
 @login_required
+@read_replica
 def user_detail(request):
     """
     Display for user detail dialog.
@@ -474,15 +608,28 @@ def user_detail(request):
     Return: request user data to ajax func and show dialog.
     """
     user_id = request.GET["user_id"]
-    obj = User.objects.get(pk=user_id)
-    created_user = User.objects.get(pk=obj.created_user_id)
-    updated_user = User.objects.get(pk=obj.updated_user_id)
-    data = serializers.serialize("json", [obj, ])
-    struct = json.loads(data)
-    struct[0]["created_user_name"] = created_user.name
-    struct[0]["updated_user_name"] = updated_user.name
-    data = json.dumps(struct[0])
-    return HttpResponse(data)
+    data = add_profile_thumbnails(detail_structs(User.objects.filter(pk=user_id), exclude=("password",)))
+    if not data:
+        raise Http404("No user matches the given query.")
+    return HttpResponse(json.dumps(data[0], cls=DjangoJSONEncoder))
+
+
+@login_required
+@read_replica
+def user_details(request):
+    """
+    Detail data of many users for detail dialogs of user list page
+    Param: request (client request), ids (comma separated user ids)
+    Return: json of user id and detail data in one query (users not in user's user list are left out)
+    """
+    user = request.user
+    # same users as user list (live users, user sees created users only)
+    q = Q()
+    if user.type == "1":
+        q.add(Q(created_user_id__exact=user.id), Q.AND)
+    ids = parse_ids(request.GET.get("ids", ""))
+    data = add_profile_thumbnails(detail_structs(User.live.filter(q, pk__in=ids), exclude=("password",)))
+    return HttpResponse(json.dumps({row["pk"]: row for row in data}, cls=DjangoJSONEncoder))
 
 
 @login_required
@@ -493,11 +640,10 @@ def user_delete_confirm(request):
     Return: request user data to ajax func and show delete confrim dialog
     """
     user_id = request.GET["user_id"]
-    obj = get_object_or_404(User, pk=user_id)
-    data = serializers.serialize("json", [obj, ])
-    struct = json.loads(data)
-    data = json.dumps(struct[0])
-    return HttpResponse(data)
+    data = detail_structs(User.objects.filter(pk=user_id), exclude=("password",))
+    if not data:
+        raise Http404("No user matches the given query.")
+    return HttpResponse(json.dumps(data[0], cls=DjangoJSONEncoder))
 
 
 @login_required
@@ -509,24 +655,28 @@ def user_delete(request):
     """
     user_id = request.GET["user_id"]
     obj = get_object_or_404(User, pk=user_id)
-    obj.delete_user_id = request.user.id
-    obj.deleted_at = timezone.now()
-    obj.save()
+    deactivate_users(User.live.filter(pk=obj.pk), request.user.id)
     return HttpResponseRedirect(reverse("user-list"))
 
 
-def check_csv_row(data):
+@login_required
+def user_bulk_delete(request):
     """
-    For cvs import data validation
-    Param: data of csv
-    return: valid data of array or false value
+    For bulk delete of selected users in user list
+    Param: request (client request), user_ids (selected user ids of POST request)
+    Return: soft delete selected users and their posts and render user list
     """
-    arr_csv = []
-    for row in data:
-        if len(row) != 3:
-            return False
-        arr_csv.append(row)
-    return arr_csv
+    if request.method == "POST":
+        user = get_object_or_404(User, pk=request.user.id)
+        user_ids = [int(user_id) for user_id in request.POST.getlist("user_ids")
+                    if user_id.isdigit()][:MAX_BULK_DELETE]
+        users = User.live.filter(pk__in=user_ids).exclude(pk=user.id)
+        if user.type == "1":
+            users = users.filter(created_user_id=user.id)
+        deleted_users, deleted_posts = deactivate_users(users, user.id)
+        messages.info(request, "{} users and {} posts are deleted.".format(
+            deleted_users, deleted_posts))
+    return HttpResponseRedirect(reverse("user-list"))
 
 
 @login_required
@@ -544,30 +694,26 @@ def csv_import(request):
         if "csv_file" in request.FILES:
             user = get_object_or_404(User, pk=request.user.id)
             req_file = request.FILES["csv_file"]
-            if (req_file.content_type == "application/vnd.ms-excel"):
-                csv_path = save_temp(req_file)
-                with open("media/tmp/{}".format(csv_path)) as csv_file:
-                    csv_reader = csv.reader(csv_file, delimiter=",")
-                    valid_csv = check_csv_row(csv_reader)
-                    if valid_csv:
-                        for i, row in enumerate(valid_csv):
-                            if i != 0:
-                                csv_post = Post(
-                                    title=row[0],
-                                    description=row[1],
-                                    status=row[2],
-                                    user=user,
-                                    created_user_id=user.id,
-                                    updated_user_id=user.id,
-                                    created_at=timezone.now(),
-                                    updated_at=timezone.now()
-                                )
-                                csv_post.save()
-                        csv_file.close()
-                        remove_temp(csv_path)
-                        return HttpResponseRedirect(reverse("index"))
-                    else:
-                        message = "Post upload csv must have 3 columns"
+            if (req_file.content_type == "application/vnd.ms-excel"
+                    and req_file.size > getattr(settings, "CSV_IMPORT_ASYNC_THRESHOLD", 1024 * 1024)):
+                job = queue_import_job(req_file, user)
+                return HttpResponseRedirect(reverse("csv-import-progress", kwargs={"pk": job.id}))
+            elif (req_file.content_type == "application/vnd.ms-excel"):
+                rows = check_csv_row(read_csv_upload(req_file))
+                try:
+                    count, seconds = import_posts(
+                        islice(rows, 1, None), user, getattr(settings, "CSV_IMPORT_BATCH_SIZE", 1000))
+                except InvalidCsvRow as error:
+                    message = str(error)
+                except (UnicodeDecodeError, csv.Error):
+                    message = "Please choose csv format"
+                else:
+                    speed = rows_per_second(count, seconds)
+                    logger.info("csv import: %d posts in %.2f s (%.0f rows/sec)",
+                                count, seconds, speed)
+                    messages.info(
+                        request, f"{count} posts are imported ({speed:.0f} rows/sec).")
+                    return HttpResponseRedirect(reverse("index"))
             else:
                 message = "Please choose csv format"
         else:
@@ -580,23 +726,72 @@ def csv_import(request):
 
 
 @login_required
+def csv_import_progress(request, pk):
+    """
+    Progress page of background csv import.
+    Param: request (client request), pk (id of import job).
+    Return: render progress page which polls import status and go to post list when finished.
+    """
+    job = get_object_or_404(CsvImportJob, pk=pk, user_id=request.user.id)
+    context = {
+        "job": job,
+        "progress": job_progress(job),
+    }
+    return render(request, "bulletinboard/csv-import-progress.html", context=context)
+
+
+@login_required
+def csv_import_status(request, pk):
+    """
+    Status of background csv import for polling.
+    Param: request (client request), pk (id of import job).
+    Return: json of status, rows done, rows failed, percent and ETA
+    """
+    job = get_object_or_404(CsvImportJob, pk=pk, user_id=request.user.id)
+    return JsonResponse(job_progress(job))
+
+
+@login_required
+@read_replica
 def download_post_list_csv(request):
     """
     For csv download
-    Return: csv downloaded data
+    Return: csv downloaded data (streamed chunk by chunk)
     """
-    post_list = Post.objects.all().order_by("-updated_at")
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = "attachment; filename='post_list.csv'"
+    chunk_size = getattr(settings, "CSV_EXPORT_CHUNK_SIZE", 2000)
+    response = StreamingHttpResponse(
+        stream_post_csv(Post.objects.all(), chunk_size), content_type="text/csv")
+    response["Content-Disposition"] = 'attachment; filename="post_list{}.csv"'.format(
+        timezone.localtime().strftime("%Y%m%d%H%M%S"))
+    return response
 
-    writer = csv.writer(response)
-    writer.writerow(["id", "title", "description", "status", "created_user_id",
-                    "updated_user_id", "delete_user_id", "deleted_at", "created_at", "updated_at"])
 
-    for post in post_list:
-        writer.writerow([post.id, post.title, post.description, post.status, post.created_user_id,
-                        post.updated_user_id, post.delete_user_id, post.deleted_at, post.created_at, post.updated_at])
-    return response
+@login_required
+def db_pool_stats(request):
+    """
+    Database connection pool metrics of this process (admin only)
+    Param: request (client request)
+    Return: json of in use, idle connections and wait time of every database pool
+    """
+    user = get_object_or_404(User, pk=request.user.id)
+    if user.type != "0":
+        raise PermissionDenied
+    return JsonResponse(pool_stats())
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Media file (profile images, confirm page images) with conditional GET and Range support.
+    MediaMiddleware answers profile images before session and auth middleware, this view is the fallback
+    and serves confirm page images to logged in users.
+    Param: request (client request), path (path under MEDIA_URL)
+    Return: file, 304 if browser has same file or empty response for front proxy (MEDIA_ACCEL),
+    redirect to login page for confirm page image without login
+    """
+    if is_preview(path) and not request.user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    return media_response(request, path)
 
 
 @login_required
@@ -0,0 +1,25 @@
+import tempfile
+from django.test import override_settings
+
+
+class TempMediaMixin:
+    """
+    Temp media folder (self.media) used as MEDIA_ROOT of each test, removed after the test.
+    Other settings of the test class are set with media_settings.
+    """
+    media_settings = {}
+
+    def setUp(self):
+        """
+        Initial set up for temp media folder
+        """
+        # prepare
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media.name, **self.media_settings)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.media.cleanup()
+        super().tearDown()
@@ -0,0 +1,787 @@
+import datetime
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from unittest import skipIf
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.models import Session
+from django.core import signing
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.utils import ConnectionHandler, OperationalError
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from bulletinboard.backends.pool import ConnectionPool, PoolTimeout, get_pool
+from bulletinboard.backends.session import SessionStore, flush_sessions
+from bulletinboard.functions.confirm import (
+    CONFIRM_SALT, ConfirmSerializer, ConfirmTokenUsed, confirm_token, read_confirm_token, use_confirm_token)
+from bulletinboard.functions.csv_import import import_posts
+from bulletinboard.functions.helpers import copy_file, move_file, remove_temp, save_temp
+from bulletinboard.functions.media_store import is_stored, release, store_temp
+from bulletinboard.functions.tmp_sweeper import sweep_all, sweep_tmp_uploads
+from bulletinboard.functions.thumbnails import Image, add_profile_thumbnails, image_error, make_thumbnails, thumbnail_url
+from bulletinboard.models import CsvImportJob, Post, StoredMedia, User
+from bulletinboard.routers import ReplicaRouter, end_request, start_request
+
+from .mixins import TempMediaMixin
+
+
+class ImportPostsTest(TestCase):
+    def setUp(self):
+        """
+        Initial set up for bulk post import
+        """
+        # prepare
+        self.user = User.objects.create_user(
+            email="test@user.com", password="thePass129Z")
+
+    def test_import_in_batches(self):
+        """
+        Test csv rows are inserted by batch
+        """
+        # prepare
+        rows = [["title {}".format(i), "description {}".format(i), "1"]
+                for i in range(5)]
+        # execute
+        with CaptureQueriesContext(connection) as queries:
+            count, seconds = import_posts(rows, self.user, 2)
+        inserts = [query for query in queries.captured_queries
+                   if query["sql"].startswith("INSERT")]
+        # assertion
+        self.assertEqual(count, 5)
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(Post.objects.filter(created_user_id=self.user.id).count(), 5)
+        self.assertGreaterEqual(seconds, 0)
+
+    def test_import_share_timestamp(self):
+        """
+        Test every imported post has same created and updated time
+        """
+        # prepare
+        rows = [["title {}".format(i), "description", "0"] for i in range(3)]
+        # execute
+        import_posts(rows, self.user, 100)
+        # assertion
+        self.assertEqual(Post.objects.values("created_at", "updated_at").distinct().count(), 1)
+        self.assertEqual(Post.objects.filter(status="0").count(), 3)
+
+    def test_import_rollback(self):
+        """
+        Test no post is saved when a batch is failed
+        """
+        # prepare
+        rows = [["title", "description", "1"], ["title", "description", "0"]]
+        # execute
+        with self.assertRaises(Exception):
+            import_posts(iter_with_error(rows), self.user, 1)
+        # assertion
+        self.assertEqual(Post.objects.count(), 0)
+
+
+def iter_with_error(rows):
+    """
+    Yield rows and raise error at the end (like a broken upload)
+    """
+    yield from rows
+    raise ValueError("broken csv")
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def setUp(self):
+        """
+        Initial set up for connection pool of sqlite connections
+        """
+        # prepare
+        self.opened = []
+
+    def connect(self):
+        connection = sqlite3.connect(":memory:", check_same_thread=False)
+        self.opened.append(connection)
+        return connection
+
+    @staticmethod
+    def ping(connection):
+        connection.execute("SELECT 1")
+
+    def test_reuse_idle_connection(self):
+        """
+        Test released connection is used again and metrics are counted
+        """
+        # prepare
+        pool = ConnectionPool(max_size=2)
+        first = pool.acquire(self.connect, self.ping)
+        pool.release(first)
+        # execute
+        second = pool.acquire(self.connect, self.ping)
+        stats = pool.stats()
+        # assertion
+        self.assertIs(first, second)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(stats["in_use"], 1)
+        self.assertEqual(stats["idle"], 0)
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["created"], 1)
+
+    def test_health_check_on_checkout(self):
+        """
+        Test broken idle connection is closed and new connection is opened
+        """
+        # prepare
+        pool = ConnectionPool(max_size=2)
+        broken = pool.acquire(self.connect, self.ping)
+        pool.release(broken)
+        broken.close()
+        # execute
+        connection = pool.acquire(self.connect, self.ping)
+        # assertion
+        self.assertIsNot(connection, broken)
+        self.assertEqual(pool.stats()["health_failures"], 1)
+        self.assertEqual(pool.stats()["created"], 2)
+
+    def test_max_age(self):
+        """
+        Test too old connection is not used again
+        """
+        # prepare
+        pool = ConnectionPool(max_size=2, max_age=0)
+        old = pool.acquire(self.connect, self.ping)
+        pool.release(old)
+        # execute
+        connection = pool.acquire(self.connect, self.ping)
+        # assertion
+        self.assertIsNot(connection, old)
+        self.assertEqual(pool.stats()["idle"], 0)
+
+    def test_wait_for_free_connection(self):
+        """
+        Test checkout waits until other thread releases a connection
+        """
+        # prepare
+        pool = ConnectionPool(max_size=1, timeout=5)
+        connection = pool.acquire(self.connect, self.ping)
+        timer = threading.Timer(0.05, pool.release, [connection])
+        timer.start()
+        # execute
+        waited = pool.acquire(self.connect, self.ping)
+        timer.join()
+        stats = pool.stats()
+        # assertion
+        self.assertIs(waited, connection)
+        self.assertEqual(stats["waits"], 1)
+        self.assertGreater(stats["wait_time_max"], 0)
+
+    def test_timeout(self):
+        """
+        Test checkout fails when pool is full until timeout
+        """
+        # prepare
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.acquire(self.connect, self.ping)
+        # execute / assertion
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(self.connect, self.ping)
+        self.assertEqual(pool.stats()["in_use"], 1)
+
+
+class PooledBackendTest(SimpleTestCase):
+    def setUp(self):
+        """
+        Initial set up for pooled sqlite backend with a database file
+        """
+        # prepare
+        handle, self.path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.alias = "pool-test-{}".format(id(self))
+        self.databases_setting = {
+            "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+            self.alias: {
+                "ENGINE": "bulletinboard.backends.sqlite3",
+                "NAME": self.path,
+                "POOL": {"MAX_SIZE": 1, "TIMEOUT": 0.01},
+            },
+        }
+        self.connections = ConnectionHandler(self.databases_setting)
+
+    def tearDown(self):
+        self.connections.close_all()
+        get_pool(self.alias, {}).close_idle()
+        os.unlink(self.path)
+
+    def test_close_returns_connection_to_pool(self):
+        """
+        Test connection closed by django is used again by next connect
+        """
+        # prepare
+        wrapper = self.connections[self.alias]
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close()
+        # execute
+        wrapper.ensure_connection()
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        # assertion
+        self.assertIs(wrapper.connection, raw)
+        self.assertEqual(get_pool(self.alias, {}).stats()["created"], 1)
+
+    def test_pool_timeout_is_database_error(self):
+        """
+        Test full pool raises OperationalError of django
+        """
+        # prepare
+        self.connections[self.alias].ensure_connection()
+        other = ConnectionHandler(self.databases_setting)[self.alias]
+        # execute / assertion
+        with self.assertRaises(OperationalError):
+            other.ensure_connection()
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        """
+        Initial set up for replica router
+        """
+        # prepare
+        self.router = ReplicaRouter()
+
+    def tearDown(self):
+        end_request()
+
+    def test_read_replica_view(self):
+        """
+        Test read of read-only view goes to replica
+        """
+        # prepare
+        state = start_request()
+        state.read_replica = True
+        # execute / assertion
+        self.assertEqual(self.router.db_for_read(Post), "replica")
+        self.assertEqual(self.router.db_for_write(Post), "default")
+
+    def test_read_after_write(self):
+        """
+        Test read after write in same request goes to primary
+        """
+        # prepare
+        state = start_request()
+        state.read_replica = True
+        # execute
+        self.router.db_for_write(Post)
+        # assertion
+        self.assertTrue(state.wrote)
+        self.assertEqual(self.router.db_for_read(Post), "default")
+
+    def test_pinned_request(self):
+        """
+        Test request of browser which wrote recently reads from primary
+        """
+        # prepare
+        state = start_request(pinned=True)
+        state.read_replica = True
+        # execute / assertion
+        self.assertEqual(self.router.db_for_read(Post), "default")
+
+    def test_other_view(self):
+        """
+        Test view which is not read-only reads from primary
+        """
+        # prepare
+        start_request()
+        # execute / assertion
+        self.assertEqual(self.router.db_for_read(Post), "default")
+
+
+@override_settings(SESSION_DB_BATCH_SIZE=100, SESSION_DB_FLUSH_INTERVAL=3600)
+class ConfirmTokenTest(TestCase):
+    def setUp(self):
+        """
+        Initial set up for confirm page token
+        """
+        # prepare
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(email="test@user.com", password="thePass129Z")
+
+    def request(self, token=""):
+        request = self.factory.post("/user/create/", {"confirm_token": token})
+        request.user = self.user
+        return request
+
+    def test_token_used_once(self):
+        """
+        Test token is saved once and can be saved again when the save is rolled back
+        """
+        # prepare
+        token = confirm_token(self.request(), {"title": "a"})
+        # execute
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                use_confirm_token(self.request(token))
+                raise ValueError("save failed")
+        readable = read_confirm_token(self.request(token))
+        use_confirm_token(self.request(token))
+        # assertion
+        self.assertEqual(readable, {"title": "a"})
+        self.assertIsNone(read_confirm_token(self.request(token)))
+        with self.assertRaises(ConfirmTokenUsed):
+            use_confirm_token(self.request(token))
+
+    def test_secrets_not_in_token(self):
+        """
+        Test secrets are kept in database and given back with pending data
+        """
+        # prepare
+        password = make_password("thePass00911")
+        # execute
+        token = confirm_token(self.request(), {"name": "a"}, secrets={"password": password})
+        pending = read_confirm_token(self.request(token))
+        use_confirm_token(self.request(token))
+        # assertion
+        self.assertEqual(signing.loads(token, salt=CONFIRM_SALT, serializer=ConfirmSerializer)["data"], {"name": "a"})
+        self.assertEqual(pending, {"name": "a", "password": password})
+        self.assertIsNone(read_confirm_token(self.request(token)))
+
+
+@override_settings(SESSION_DB_FLUSH_INTERVAL=None, SESSION_BATCH_KEYS=("step",))
+class SessionStoreTest(TestCase):
+    def setUp(self):
+        """
+        Initial set up for cached session with batch write
+        """
+        # prepare
+        flush_sessions()
+        self.session = SessionStore()
+        self.session["step"] = "1"
+        self.session.save()
+
+    def test_unchanged_save_skipped(self):
+        """
+        Test save of same session data does not query database
+        """
+        # prepare
+        session = SessionStore(self.session.session_key)
+        session["step"] = "1"
+        # execute
+        with CaptureQueriesContext(connection) as queries:
+            session.save()
+        # assertion
+        self.assertEqual(len(queries), 0)
+
+    def test_changed_save_batched(self):
+        """
+        Test changed session is read from cache and written to database with next batch
+        """
+        # prepare
+        session = SessionStore(self.session.session_key)
+        session["step"] = "2"
+        # execute
+        with CaptureQueriesContext(connection) as queries:
+            session.save()
+            loaded = SessionStore(self.session.session_key).load()
+        written = flush_sessions()
+        # assertion
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(loaded["step"], "2")
+        self.assertEqual(written, 1)
+        stored = Session.objects.get(session_key=self.session.session_key)
+        self.assertEqual(stored.get_decoded()["step"], "2")
+
+    def test_batch_size_flush(self):
+        """
+        Test sessions are written in one batch when batch size is reached
+        """
+        # prepare
+        sessions = [SessionStore() for i in range(3)]
+        for session in sessions:
+            session.create()
+            session["step"] = "2"
+        # execute
+        with override_settings(SESSION_DB_BATCH_SIZE=3):
+            sessions[0].save()
+            sessions[1].save()
+            with CaptureQueriesContext(connection) as queries:
+                sessions[2].save()
+        # assertion
+        self.assertLessEqual(len(queries), 4)
+        for session in sessions:
+            stored = Session.objects.get(session_key=session.session_key)
+            self.assertEqual(stored.get_decoded()["step"], "2")
+
+    def test_database_fallback(self):
+        """
+        Test session is read from database when cache entry is evicted
+        """
+        # prepare
+        session = SessionStore(self.session.session_key)
+        session._cache.delete(session.cache_key)
+        # execute
+        loaded = session.load()
+        # assertion
+        self.assertEqual(loaded["step"], "1")
+
+    def test_deleted_session_not_written(self):
+        """
+        Test deleted session waiting for batch is not written to database
+        """
+        # prepare
+        session = SessionStore(self.session.session_key)
+        session["step"] = "2"
+        session.save()
+        # execute
+        session.delete()
+        flush_sessions()
+        # assertion
+        self.assertFalse(Session.objects.filter(session_key=self.session.session_key).exists())
+
+    def test_other_key_written_at_once(self):
+        """
+        Test change of key which is not in SESSION_BATCH_KEYS is written to database at once
+        """
+        # prepare
+        session = SessionStore(self.session.session_key)
+        session["step"] = "2"
+        session["cart"] = "1"
+        # execute
+        session.save()
+        # assertion
+        stored = Session.objects.get(session_key=self.session.session_key)
+        self.assertEqual(stored.get_decoded(), {"step": "2", "cart": "1"})
+
+    def test_login_written_to_database(self):
+        """
+        Test login is in database row at once, not only in the cache
+        """
+        # prepare
+        user = User.objects.create_user(email="test@user.com", password="thePass129Z")
+        # execute
+        with override_settings(SESSION_ENGINE="bulletinboard.backends.session"):
+            self.client.login(email="test@user.com", password="thePass129Z")
+        # assertion
+        stored = Session.objects.get(session_key=self.client.cookies["sessionid"].value)
+        self.assertEqual(stored.get_decoded()["_auth_user_id"], str(user.pk))
+
+    def test_logged_out_session_not_written_again(self):
+        """
+        Test batch does not write again a session deleted by another process (logout)
+        """
+        # prepare
+        session = SessionStore(self.session.session_key)
+        session["step"] = "2"
+        session.save()
+        Session.objects.filter(session_key=self.session.session_key).delete()
+        # execute
+        written = flush_sessions()
+        # assertion
+        self.assertEqual(written, 0)
+        self.assertFalse(Session.objects.filter(session_key=self.session.session_key).exists())
+
+
+@skipIf(Image is None, "Pillow is not installed")
+class ThumbnailTest(TempMediaMixin, SimpleTestCase):
+    media_settings = {"MEDIA_URL": "/media/", "THUMBNAIL_SIZES": {"medium": (150, 150), "large": (300, 300)}}
+
+    def setUp(self):
+        """
+        Initial set up for profile thumbnails in temp media folder
+        """
+        # prepare
+        super().setUp()
+        os.makedirs(os.path.join(self.media.name, "upload"))
+        self.profile = "upload/big.png"
+        Image.effect_noise((1600, 800), 64).convert("RGBA").save(
+            os.path.join(self.media.name, self.profile))
+
+    def test_make_thumbnails(self):
+        """
+        Test thumbnails fit in size box, keep aspect ratio and are smaller than original
+        """
+        # execute
+        names = make_thumbnails(self.profile)
+        # assertion
+        self.assertEqual(names, ["upload/thumbs/medium/big.png.jpg", "upload/thumbs/large/big.png.jpg"])
+        with Image.open(os.path.join(self.media.name, names[0])) as thumbnail:
+            self.assertEqual(thumbnail.size, (150, 75))
+            self.assertEqual(thumbnail.format, "JPEG")
+        original_size = os.path.getsize(os.path.join(self.media.name, self.profile))
+        self.assertLess(os.path.getsize(os.path.join(self.media.name, names[0])) * 10, original_size)
+
+    def test_thumbnail_url(self):
+        """
+        Test thumbnail url falls back to original image until thumbnail is made
+        """
+        # execute
+        before = thumbnail_url(self.profile)
+        make_thumbnails(self.profile)
+        after = thumbnail_url(self.profile, "large")
+        # assertion
+        self.assertEqual(before, "/media/upload/big.png")
+        self.assertEqual(after, "/media/upload/thumbs/large/big.png.jpg")
+        self.assertEqual(thumbnail_url(""), "")
+
+    def test_not_image(self):
+        """
+        Test file which is not an image makes no thumbnail
+        """
+        # prepare
+        with open(os.path.join(self.media.name, "upload", "text.jpg"), "w") as text:
+            text.write("not an image")
+        # execute / assertion
+        self.assertEqual(make_thumbnails("upload/text.jpg"), [])
+
+    def test_decompression_bomb(self):
+        """
+        Test image over Pillow pixel limit makes no thumbnail instead of raising error
+        """
+        # prepare
+        max_pixels = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = 1000
+        # execute
+        try:
+            names = make_thumbnails(self.profile)
+        finally:
+            Image.MAX_IMAGE_PIXELS = max_pixels
+        # assertion
+        self.assertEqual(names, [])
+
+    def test_image_error(self):
+        """
+        Test uploaded profile is checked by image header and pixel limit
+        """
+        # prepare
+        with open(os.path.join(self.media.name, self.profile), "rb") as image:
+            content = image.read()
+        upload = SimpleUploadedFile("big.png", content)
+        # execute / assertion
+        self.assertIsNone(image_error(upload))
+        self.assertEqual(upload.tell(), 0)
+        with override_settings(PROFILE_MAX_PIXELS=1000):
+            self.assertEqual(image_error(upload), "profile image must be at most 1000 pixels")
+        self.assertEqual(image_error(SimpleUploadedFile("text.jpg", b"not an image")),
+                         "profile must be an image")
+
+    def test_add_profile_thumbnails(self):
+        """
+        Test thumbnail url is added to user detail data
+        """
+        # prepare
+        make_thumbnails(self.profile)
+        rows = [{"fields": {"profile": self.profile}}, {"fields": {"profile": ""}}]
+        # execute
+        add_profile_thumbnails(rows)
+        # assertion
+        self.assertEqual(rows[0]["profile_thumbnail"], "/media/upload/thumbs/medium/big.png.jpg")
+        self.assertEqual(rows[1]["profile_thumbnail"], "")
+
+
+class TempUploadTest(TempMediaMixin, SimpleTestCase):
+    def read(self, *path):
+        with open(os.path.join(self.media.name, *path), "rb") as media_file:
+            return media_file.read()
+
+    def test_same_name_not_clobbered(self):
+        """
+        Test two uploads with same file name are saved as different temp files
+        """
+        # execute
+        first = save_temp(SimpleUploadedFile("photo.JPG", b"first"))
+        second = save_temp(SimpleUploadedFile("photo.JPG", b"second"))
+        # assertion
+        self.assertNotEqual(first, second)
+        self.assertTrue(first.endswith(".jpg"))
+        self.assertEqual(self.read("tmp", first), b"first")
+        self.assertEqual(self.read("tmp", second), b"second")
+
+    def test_unsafe_extension(self):
+        """
+        Test extension which is not alphanumeric is not used for temp file
+        """
+        # execute
+        name = save_temp(SimpleUploadedFile("photo.jpg;rm -rf", b"data"))
+        # assertion
+        self.assertRegex(name, "^[0-9a-f]{32}$")
+        self.assertEqual(self.read("tmp", name), b"data")
+
+    def test_move_file(self):
+        """
+        Test temp file is moved to upload folder
+        """
+        # prepare
+        name = save_temp(SimpleUploadedFile("photo.jpg", b"image data"))
+        # execute
+        move_file(os.path.join(self.media.name, "tmp", name), os.path.join(self.media.name, "upload", name))
+        # assertion
+        self.assertEqual(self.read("upload", name), b"image data")
+        self.assertFalse(os.path.exists(os.path.join(self.media.name, "tmp", name)))
+
+    def test_copy_file(self):
+        """
+        Test chunked copy (temp folder on another filesystem) leaves no partial file
+        """
+        # prepare
+        name = save_temp(SimpleUploadedFile("photo.jpg", b"x" * 3000000))
+        os.makedirs(os.path.join(self.media.name, "upload"))
+        # execute
+        copy_file(os.path.join(self.media.name, "tmp", name), os.path.join(self.media.name, "upload", name))
+        # assertion
+        self.assertEqual(self.read("upload", name), b"x" * 3000000)
+        self.assertEqual(os.listdir(os.path.join(self.media.name, "upload")), [name])
+
+
+class MediaStoreTest(TempMediaMixin, TestCase):
+    media_settings = {"MEDIA_STORE_GRACE": 60}
+
+    def store(self, content, name="photo.jpg"):
+        return store_temp(save_temp(SimpleUploadedFile(name, content)))
+
+    def make_old(self, name):
+        StoredMedia.objects.filter(name=name).update(linked_at=timezone.now() - datetime.timedelta(hours=1))
+
+    def test_same_content_stored_once(self):
+        """
+        Test same image uploaded twice is one file and temp files are kept for the confirm page
+        """
+        # execute
+        first = self.store(b"same image", "a.jpg")
+        second = self.store(b"same image", "b.JPG")
+        other = self.store(b"other image", "a.jpg")
+        # assertion
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertTrue(is_stored(first))
+        self.assertRegex(first, r"^upload/([0-9a-f]{2})/\1[0-9a-f]{62}\.jpg$")
+        self.assertEqual(len(os.listdir(os.path.join(self.media.name, "tmp"))), 3)
+        self.assertEqual(StoredMedia.objects.get(name=first).reserved, 2)
+
+    def test_release_referenced(self):
+        """
+        Test image of a saved user is kept when its reservation ends
+        """
+        # prepare
+        name = self.store(b"image")
+        User.objects.create(email="media@user.com", profile=name)
+        # execute / assertion
+        self.assertFalse(release(name, reserved=True))
+        self.assertTrue(os.path.exists(os.path.join(self.media.name, name)))
+        self.assertEqual(StoredMedia.objects.get(name=name).reserved, 0)
+
+    def test_release_rolled_back(self):
+        """
+        Test image of a rolled back user is deleted when its reservation ends
+        """
+        # prepare
+        name = self.store(b"image")
+        # execute / assertion
+        self.assertTrue(release(name, reserved=True))
+        self.assertFalse(os.path.exists(os.path.join(self.media.name, name)))
+        self.assertFalse(StoredMedia.objects.filter(name=name).exists())
+
+    def test_release_reserved_by_other_request(self):
+        """
+        Test image stored by another request which is still saving its user is not deleted
+        """
+        # prepare
+        name = self.store(b"image")
+        self.store(b"image")
+        # execute / assertion
+        self.assertFalse(release(name, reserved=True))
+        self.assertFalse(release(name))
+        self.assertTrue(os.path.exists(os.path.join(self.media.name, name)))
+
+    def test_release_stale_reservation(self):
+        """
+        Test reservation older than grace time (stopped request) does not keep the image
+        """
+        # prepare
+        name = self.store(b"image")
+        self.make_old(name)
+        # execute / assertion
+        self.assertTrue(release(name))
+        self.assertFalse(os.path.exists(os.path.join(self.media.name, name)))
+
+    def test_release_legacy_file(self):
+        """
+        Test image which is not content addressed is not deleted
+        """
+        # execute / assertion
+        self.assertFalse(release("upload/photo.jpg"))
+
+
+class TmpSweeperTest(TempMediaMixin, TestCase):
+    def setUp(self):
+        """
+        Initial set up for temp upload sweeper in temp media folder
+        """
+        # prepare
+        super().setUp()
+        os.makedirs(os.path.join(self.media.name, "tmp"))
+
+    def make_file(self, name, size=10, age=7200):
+        path = os.path.join(self.media.name, "tmp", name)
+        with open(path, "wb") as tmp:
+            tmp.write(b"x" * size)
+        changed = time.time() - age
+        os.utime(path, (changed, changed))
+        return path
+
+    def test_old_files_deleted(self):
+        """
+        Test files older than ttl are deleted and reclaimed bytes are reported
+        """
+        # prepare
+        old = self.make_file("old.jpg", size=100)
+        new = self.make_file("new.jpg", age=10)
+        hidden = self.make_file(".gitkeep", size=0)
+        # execute
+        deleted, reclaimed = sweep_tmp_uploads(ttl=3600, batch_size=10)
+        # assertion
+        self.assertEqual((deleted, reclaimed), (1, 100))
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(new))
+        self.assertTrue(os.path.exists(hidden))
+
+    def test_active_import_kept(self):
+        """
+        Test csv file of queued import job is not deleted
+        """
+        # prepare
+        user = User.objects.create_user(email="sweep@user.com", password="thePass129Z")
+        queued = self.make_file("import-queued.csv")
+        done = self.make_file("import-done.csv")
+        CsvImportJob.objects.create(user=user, file_path="tmp/import-queued.csv", status="0")
+        CsvImportJob.objects.create(user=user, file_path="tmp/import-done.csv", status="2")
+        # execute
+        sweep_tmp_uploads(ttl=3600, batch_size=10)
+        # assertion
+        self.assertTrue(os.path.exists(queued))
+        self.assertFalse(os.path.exists(done))
+
+    def test_bounded_batches(self):
+        """
+        Test one sweep deletes at most batch size files and sweep_all repeats batches
+        """
+        # prepare
+        for i in range(5):
+            self.make_file("old-{}.jpg".format(i))
+        # execute
+        first = sweep_tmp_uploads(ttl=3600, batch_size=2)
+        rest = sweep_all(ttl=3600, batch_size=2)
+        # assertion
+        self.assertEqual(first, (2, 20))
+        self.assertEqual(rest, (3, 30, 2))
+        self.assertEqual(os.listdir(os.path.join(self.media.name, "tmp")), [])
+
+    def test_remove_temp(self):
+        """
+        Test temp file of cancelled confirm page is removed from media root
+        """
+        # prepare
+        path = self.make_file("cancelled.jpg")
+        # execute
+        remove_temp("cancelled.jpg")
+        remove_temp("cancelled.jpg")
+        # assertion
+        self.assertFalse(os.path.exists(path))
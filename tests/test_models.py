@@ -1,3 +1,6 @@
+from unittest import skipUnless
+from django.db import connection
+from django.db.models import Q
 from django.utils import timezone
 from django.test import TestCase
 from bulletinboard.models import Post, User
@@ -251,3 +254,97 @@ class PostModelTest(TestCase):
         expected_object_name = f'{post.title}'
         # assertion
         self.assertEqual(str(post), expected_object_name)
+
+
+class PostListIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Set up posts of two owners for post list query plan
+        """
+        # prepare
+        for i in range(20):
+            Post.objects.create(
+                title="index title {}".format(i),
+                description="Hello index!!",
+                status="1",
+                created_user_id=(i % 2) + 1,
+                updated_user_id=(i % 2) + 1,
+                created_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+
+    def explain_post_list(self, query):
+        """
+        Return query plan of post list query (same filter as post list view)
+        """
+        post_list = Post.live.filter(query).order_by("-updated_at")
+        return post_list.explain()
+
+    @skipUnless(connection.vendor in ("sqlite", "mysql"), "plan check for sqlite and mysql")
+    def test_owner_post_list_use_index(self):
+        """
+        Test post list of normal user use owner index
+        """
+        # execute
+        plan = self.explain_post_list(Q(created_user_id=1))
+        # assertion
+        self.assertIn("post_owner_live_idx", plan)
+
+    @skipUnless(connection.vendor in ("sqlite", "mysql"), "plan check for sqlite and mysql")
+    def test_admin_post_list_use_index(self):
+        """
+        Test post list of admin user use live post index
+        """
+        # execute
+        plan = self.explain_post_list(Q())
+        # assertion
+        self.assertIn("post_live_idx", plan)
+
+    @skipUnless(connection.vendor in ("sqlite", "mysql"), "plan check for sqlite and mysql")
+    def test_owner_user_list_use_index(self):
+        """
+        Test user list of normal user use owner index
+        """
+        # execute
+        plan = User.live.filter(created_user_id=1).order_by("-updated_at").explain()
+        # assertion
+        self.assertIn("user_owner_live_idx", plan)
+
+
+class LiveManagerTest(TestCase):
+    def setUp(self):
+        """
+        Set up a live post
+        """
+        # prepare
+        self.post = Post.objects.create(
+            title="live title",
+            description="Hello live!!",
+            status="1",
+            created_user_id=1,
+            updated_user_id=1,
+            created_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+
+    def test_new_post_is_live(self):
+        """
+        Test new post is in live manager
+        """
+        # assertion
+        self.assertTrue(self.post.is_live)
+        self.assertEqual(list(Post.live.all()), [self.post])
+
+    def test_soft_deleted_post_is_not_live(self):
+        """
+        Test soft deleted post is removed from live manager but kept in objects
+        """
+        # execute
+        self.post.delete_user_id = 1
+        self.post.deleted_at = timezone.now()
+        self.post.save(update_fields=["delete_user_id", "deleted_at"])
+        # assertion
+        self.assertFalse(Post.objects.get(pk=self.post.pk).is_live)
+        self.assertEqual(Post.live.count(), 0)
+        self.assertEqual(Post.objects.count(), 1)
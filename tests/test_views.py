@@ -1,10 +1,31 @@
+import csv
 import datetime
+import json
+import os
+import tempfile
+from io import BytesIO
+from types import SimpleNamespace
+from unittest import skipIf, skipUnless
 from django.utils import timezone
+from django.utils.http import http_date
 from django.conf import settings
-from django.test import TestCase
+from django.core import serializers
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.backends.mysql.operations import DatabaseOperations as MysqlOperations
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from bulletinboard.models import Post, User
+from bulletinboard.functions.counters import get_count
+from bulletinboard.functions.import_jobs import requeue_stale_jobs, run_import_job
+from bulletinboard.functions.search import search_posts
+from bulletinboard.functions.soft_delete import deactivate_users
+from bulletinboard.functions.thumbnails import Image
+from bulletinboard.models import CsvImportJob, ListCounter, Post, User
+from bulletinboard.routers import PIN_COOKIE
+
+from .mixins import TempMediaMixin
 
 
 class LoginViewTest(TestCase):
@@ -158,6 +179,549 @@ class PostListViewTest(TestCase):
         self.assertEqual(response.url, "/post/create/")
 
 
+class PostListKeysetPaginationTest(TestCase):
+    def setUp(self):
+        """
+        Initial set up function for post list cursor pagination
+        """
+        # prepare
+        test_user = User.objects.create_user(
+            email="test@user.com", password="thePass129Z")
+        test_user.type = "0"
+        test_user.save()
+        for i in range(12):
+            Post.objects.create(
+                title="post {}".format(i),
+                description="cursor pagination post",
+                status="1",
+                user=test_user,
+                created_user_id=test_user.id,
+                updated_user_id=test_user.id,
+                created_at=timezone.now(),
+                updated_at=timezone.now() - datetime.timedelta(days=i % 3),
+            )
+        self.expected = list(Post.objects.order_by(
+            "-updated_at", "-id").values_list("id", flat=True))
+        self.client.login(email="test@user.com", password="thePass129Z")
+
+    def test_next_pages(self):
+        """
+        Test walking every page by next cursor
+        """
+        # execute
+        ids = []
+        sizes = []
+        response = self.client.get(reverse("index"))
+        while True:
+            page_obj = response.context["page_obj"]
+            ids += [post.id for post in page_obj]
+            sizes.append(len(page_obj))
+            if not page_obj.has_next():
+                break
+            response = self.client.get(
+                reverse("index"), {"cursor": page_obj.next_cursor})
+        # assertion
+        self.assertEqual(sizes, [5, 5, 2])
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(response.context["page_obj"].number, 3)
+
+    def test_previous_page(self):
+        """
+        Test going back to previous page by previous cursor
+        """
+        # prepare
+        first = self.client.get(reverse("index")).context["page_obj"]
+        second = self.client.get(
+            reverse("index"), {"cursor": first.next_cursor}).context["page_obj"]
+        # execute
+        response = self.client.get(
+            reverse("index"), {"cursor": second.previous_cursor})
+        page_obj = response.context["page_obj"]
+        # assertion
+        self.assertEqual([post.id for post in page_obj], self.expected[:5])
+        self.assertEqual(page_obj.number, 1)
+        self.assertFalse(page_obj.has_previous())
+        self.assertTrue(page_obj.has_next())
+
+    def test_invalid_cursor(self):
+        """
+        Test invalid cursor show first page
+        """
+        # execute
+        response = self.client.get(reverse("index"), {"cursor": "xxxxx"})
+        # assertion
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [post.id for post in response.context["page_obj"]], self.expected[:5])
+
+    def test_no_count_query(self):
+        """
+        Test cursor page does not run COUNT query
+        """
+        # prepare
+        first = self.client.get(reverse("index")).context["page_obj"]
+        # execute
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("index"), {"cursor": first.next_cursor})
+        # assertion
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries.captured_queries))
+        self.assertFalse(
+            any("OFFSET" in query["sql"] for query in queries.captured_queries))
+
+    @override_settings(POST_LIST_PAGINATION="offset")
+    def test_offset_pagination(self):
+        """
+        Test page number pagination is still available by setting
+        """
+        # execute
+        response = self.client.get(reverse("index"), {"page": 3})
+        # assertion
+        self.assertEqual(len(response.context["page_obj"]), 2)
+        self.assertEqual(response.context["page_obj"].paginator.num_pages, 3)
+
+
+class PostListQueryCountTest(TestCase):
+    def setUp(self):
+        """
+        Initial set up function for post list query count
+        """
+        # prepare
+        test_user = User.objects.create_user(
+            email="test@user.com", password="thePass129Z")
+        test_user.type = "0"
+        test_user.save()
+        self.client.login(email="test@user.com", password="thePass129Z")
+
+    def create_posts(self, count):
+        """
+        Create posts and each post has different posted user
+        """
+        for i in range(count):
+            author = User.objects.create(
+                name="author {}".format(i),
+                email="author{}@gmail.com".format(i),
+                password="passwordTest11",
+                created_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+            Post.objects.create(
+                title="post {}".format(i),
+                description="description of post {} ".format(i) * 5,
+                status="1",
+                user=author,
+                created_user_id=author.id,
+                updated_user_id=author.id,
+                created_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+
+    def test_query_count_one_post(self):
+        """
+        Test post list query count with one post in page
+        """
+        # prepare
+        self.client.get(reverse("index"))  # post counter is counted at first view
+        self.create_posts(1)
+        # execute
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("index"))
+        # assertion
+        self.assertEqual(len(response.context["page_obj"]), 1)
+
+    def test_query_count_full_page(self):
+        """
+        Test post list query count is same with full page
+        """
+        # prepare
+        self.client.get(reverse("index"))  # post counter is counted at first view
+        self.create_posts(7)
+        # execute
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("index"))
+        # assertion
+        self.assertEqual(len(response.context["page_obj"]), 5)
+        self.assertContains(response, "author 6")
+        self.assertContains(response, "description of post 6 descript")
+        self.assertNotContains(response, "description of post 6 description")
+
+
+class PostListCacheTest(TestCase):
+    def setUp(self):
+        """
+        Initial set up function for post list cache
+        """
+        # prepare
+        self.test_user = User.objects.create_user(
+            email="test@user.com", password="thePass129Z")
+        self.test_user.name = "cache user"
+        self.test_user.type = "1"
+        self.test_user.save()
+        self.test_post = Post.objects.create(
+            title="cached post",
+            description="description of cached post",
+            status="1",
+            user=self.test_user,
+            created_user_id=self.test_user.id,
+            updated_user_id=self.test_user.id,
+            created_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        self.client.login(email="test@user.com", password="thePass129Z")
+
+    def test_post_list_cached(self):
+        """
+        Test second view of post list does not query posts
+        """
+        # prepare
+        self.client.get(reverse("index"))
+        # execute
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("index"))
+        # assertion
+        self.assertContains(response, "cached post")
+        self.assertContains(response, "cache user")
+
+    def test_post_save_invalidate(self):
+        """
+        Test post list cache is dropped when post is saved
+        """
+        # prepare
+        self.client.get(reverse("index"))
+        self.test_post.title = "changed post"
+        self.test_post.save()
+        # execute
+        response = self.client.get(reverse("index"))
+        # assertion
+        self.assertContains(response, "changed post")
+
+    def test_post_delete_invalidate(self):
+        """
+        Test post list cache is dropped when post is soft deleted
+        """
+        # prepare
+        self.client.get(reverse("index"))
+        self.client.get(reverse("post-delete"), {"post_id": self.test_post.id})
+        # execute
+        response = self.client.get(reverse("index"))
+        # assertion
+        self.assertNotContains(response, "cached post")
+
+    def test_csv_import_invalidate(self):
+        """
+        Test post list cache is dropped when posts are imported
+        """
+        # prepare
+        self.client.get(reverse("index"))
+        upload = SimpleUploadedFile(
+            "posts.csv", b"title,description,status\nimported post,imported,1\n",
+            content_type="application/vnd.ms-excel")
+        self.client.post(reverse("csv-import"), {"csv_file": upload})
+        # execute
+        response = self.client.get(reverse("index"))
+        # assertion
+        self.assertContains(response, "imported post")
+
+    def test_other_user_not_invalidated(self):
+        """
+        Test post of other user does not drop cached page of normal user
+        """
+        # prepare
+        self.client.get(reverse("index"))
+        Post.objects.create(
+            title="other post",
+            description="description of other post",
+            status="1",
+            created_user_id=self.test_user.id + 100,
+            updated_user_id=self.test_user.id + 100,
+            created_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        # execute
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("index"))
+        # assertion
+        self.assertContains(response, "cached post")
+
+    def test_search_not_cached(self):
+        """
+        Test search result is not cached
+        """
+        # prepare
+        self.client.get(reverse("index"), {"keyword": "cached"})
+        # execute
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("index"), {"keyword": "cached"})
+        # assertion
+        self.assertContains(response, "cached post")
+
+
+class ListCounterTest(TestCase):
+    def setUp(self):
+        """
+        Initial set up function for list counters
+        """
+        # prepare
+        self.test_user = User.objects.create_user(
+            email="test@user.com", password="thePass129Z")
+        self.test_user.type = "1"
+        self.test_user.save()
+        self.client.login(email="test@user.com", password="thePass129Z")
+        self.create_posts(6)
+
+    def create_posts(self, count):
+        """
+        Create posts of test user
+        """
+        posts = []
+        for i in range(count):
+            posts.append(Post.objects.create(
+                title="counted post {}".format(i),
+                description="description of counted post",
+                status="1",
+                user=self.test_user,
+                created_user_id=self.test_user.id,
+                updated_user_id=self.test_user.id,
+                created_at=timezone.now(),
+                updated_at=timezone.now(),
+            ))
+        return posts
+
+    def counter(self, scope):
+        return ListCounter.objects.get(scope=scope).value
+
+    def count_queries(self, queries):
+        return [query for query in queries.captured_queries if "COUNT(" in query["sql"]]
+
+    def test_counter_first_view(self):
+        """
+        Test post counter is counted once at first view and page count is shown
+        """
+        # prepare
+        self.client.get(reverse("index"))
+        self.create_posts(1)
+        # execute
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("index"))
+        # assertion
+        self.assertEqual(self.counter("post:user:{}".format(self.test_user.id)), 7)
+        self.assertEqual(self.count_queries(queries), [])
+        self.assertContains(response, "Page 1 of 2.")
+
+    def test_counter_soft_delete(self):
+        """
+        Test soft deleted post is removed from counter once
+        """
+        # prepare
+        self.client.get(reverse("index"))
+        post = Post.objects.filter(created_user_id=self.test_user.id).first()
+        # execute
+        self.client.get(reverse("post-delete"), {"post_id": post.id})
+        self.client.get(reverse("post-delete"), {"post_id": post.id})
+        # assertion
+        self.assertEqual(self.counter("post:user:{}".format(self.test_user.id)), 5)
+
+    def test_counter_import(self):
+        """
+        Test imported posts are added to counter
+        """
+        # prepare
+        self.client.get(reverse("index"))
+        upload = SimpleUploadedFile(
+            "posts.csv", b"title,description,status\na,a,1\nb,b,1\n",
+            content_type="application/vnd.ms-excel")
+        # execute
+        self.client.post(reverse("csv-import"), {"csv_file": upload})
+        # assertion
+        self.assertEqual(self.counter("post:user:{}".format(self.test_user.id)), 8)
+
+    def test_search_count_cached(self):
+        """
+        Test count of search result is counted again only when posts are added
+        """
+        # prepare
+        self.client.get(reverse("index"), {"keyword": "counted"})
+        # execute
+        with CaptureQueriesContext(connection) as cached:
+            response = self.client.get(reverse("index"), {"keyword": "counted"})
+        self.create_posts(1)
+        with CaptureQueriesContext(connection) as added:
+            added_response = self.client.get(reverse("index"), {"keyword": "counted"})
+        # assertion
+        self.assertEqual(self.count_queries(cached), [])
+        self.assertContains(response, "Page 1 of 2.")
+        self.assertEqual(len(self.count_queries(added)), 1)
+        self.assertContains(added_response, "Page 1 of 2.")
+
+    def test_user_list_counter(self):
+        """
+        Test user list page count is read from counter
+        """
+        # prepare
+        self.client.get(reverse("user-list"))
+        User.objects.create(
+            name="member",
+            email="member@gmail.com",
+            password="passwordTest11",
+            created_user_id=self.test_user.id,
+            updated_user_id=self.test_user.id,
+        )
+        # execute
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("user-list"))
+        live_count = User.objects.filter(
+            created_user_id=self.test_user.id, delete_user_id=None, deleted_at=None).count()
+        # assertion
+        self.assertEqual(self.counter("user:user:{}".format(self.test_user.id)), live_count)
+        self.assertEqual(self.count_queries(queries), [])
+        self.assertEqual(response.context["page_obj"].paginator.count, live_count)
+
+
+class PostSearchTest(TestCase):
+    def setUp(self):
+        """
+        Initial set up function for post full text search
+        """
+        # prepare
+        self.test_user = User.objects.create_user(
+            email="test@user.com", password="thePass129Z")
+        self.test_user.type = "0"
+        self.test_user.save()
+        self.in_description = self.create_post(
+            "weekly notice", "meeting about the bulletinboard release")
+        self.in_title = self.create_post(
+            "bulletinboard release", "new version is ready")
+        self.create_post("lunch", "friday lunch menu")
+        self.client.login(email="test@user.com", password="thePass129Z")
+
+    def create_post(self, title, description):
+        """
+        Create post of test user
+        """
+        return Post.objects.create(
+            title=title,
+            description=description,
+            status="1",
+            user=self.test_user,
+            created_user_id=self.test_user.id,
+            updated_user_id=self.test_user.id,
+            created_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+
+    def search(self, keyword):
+        """
+        Search post list and return ids of result
+        """
+        response = self.client.post(
+            reverse("index"), {"_search": True, "keyword": keyword})
+        return [post.id for post in response.context["page_obj"]]
+
+    def test_relevance_order(self):
+        """
+        Test title match is ordered before description match
+        """
+        # execute
+        ids = self.search("bulletinboard release")
+        # assertion
+        self.assertEqual(ids, [self.in_title.id, self.in_description.id])
+
+    def test_prefix_match(self):
+        """
+        Test search by beginning of word
+        """
+        # execute
+        ids = self.search("bulletin")
+        # assertion
+        self.assertEqual(len(ids), 2)
+
+    def test_update_post_is_synced(self):
+        """
+        Test search index follows post update
+        """
+        # prepare
+        self.in_title.title = "renamed"
+        self.in_title.save()
+        # execute
+        ids = self.search("renamed")
+        # assertion
+        self.assertEqual(ids, [self.in_title.id])
+        self.assertNotIn(self.in_title.id, self.search("bulletinboard"))
+
+    def test_soft_deleted_post_is_not_found(self):
+        """
+        Test soft deleted post is not in search result
+        """
+        # prepare
+        self.client.get(reverse("post-delete"), {"post_id": self.in_title.id})
+        # execute
+        ids = self.search("release")
+        # assertion
+        self.assertEqual(ids, [self.in_description.id])
+
+    def test_bulk_created_post_is_synced(self):
+        """
+        Test search index follows bulk insert (csv import)
+        """
+        # prepare
+        Post.objects.bulk_create([Post(
+            title="imported", description="from csv file", status="1",
+            user=self.test_user, created_user_id=self.test_user.id, updated_user_id=self.test_user.id,
+            created_at=timezone.now(), updated_at=timezone.now())])
+        # execute
+        ids = self.search("csv")
+        # assertion
+        self.assertEqual(len(ids), 1)
+
+    def test_keyword_pagination(self):
+        """
+        Test search keyword is kept on next page
+        """
+        # prepare
+        for i in range(6):
+            self.create_post("lunch {}".format(i), "another lunch menu")
+        first = self.client.get(reverse("index"), {"keyword": "lunch"})
+        # execute
+        second = self.client.get(reverse("index"), {
+            "keyword": "lunch", "cursor": first.context["page_obj"].next_cursor})
+        # assertion
+        self.assertEqual(len(first.context["page_obj"]), 5)
+        self.assertEqual(len(second.context["page_obj"]), 2)
+        self.assertEqual(second.context["page_obj"].number, 2)
+
+    @skipUnless(connection.vendor == "sqlite", "sqlite fts5 search")
+    def test_sqlite_match_once(self):
+        """
+        Test fts table is joined once and rank is read from the join (no MATCH subquery per row)
+        """
+        # execute
+        with CaptureQueriesContext(connection) as queries:
+            self.search("bulletinboard release")
+        match_queries = [query["sql"] for query in queries.captured_queries if "MATCH" in query["sql"]]
+        # assertion
+        self.assertTrue(match_queries)
+        for sql in match_queries:
+            self.assertEqual(sql.count("MATCH"), 1)
+            self.assertNotIn("SELECT -bm25", sql)
+
+    def test_mysql_match_against_sql(self):
+        """
+        Test mysql search filters and ranks by MATCH AGAINST in boolean mode (short words are skipped)
+        """
+        # prepare
+        mysql = SimpleNamespace(vendor="mysql", ops=MysqlOperations(None))
+        # execute
+        post_list, ordering = search_posts(Post.live.all(), "to bulletinboard rel", mysql)
+        sql = str(post_list.query)
+        # assertion
+        match = "MATCH (`bulletinboard_post`.title, `bulletinboard_post`.description) " \
+                "AGAINST (+bulletinboard* +rel* IN BOOLEAN MODE)"
+        # rank column and filter of rank
+        self.assertEqual(sql.count(match), 2)
+        self.assertIn("({}) > 0".format(match), sql)
+        self.assertEqual(ordering, ("-rank", "-updated_at", "-id"))
+
+
 class UserListViewTest(TestCase):
     def setUp(self):
         """
@@ -237,6 +801,68 @@ class UserListViewTest(TestCase):
         )
 
 
+class UserListQueryCountTest(TestCase):
+    def setUp(self):
+        """
+        Initial set up function for user list query count
+        """
+        # prepare
+        self.admin = User.objects.create_user(
+            email="admin@user.com", password="thePass129Z")
+        self.admin.name = "admin creator"
+        self.admin.type = "0"
+        self.admin.save()
+        self.client.login(email="admin@user.com", password="thePass129Z")
+
+    def create_users(self, count, start=0):
+        """
+        Create users which are created by admin
+        """
+        for i in range(start, start + count):
+            User.objects.create(
+                name="member {}".format(i),
+                email="member{}@gmail.com".format(i),
+                password="passwordTest11",
+                type="1",
+                created_user_id=self.admin.id,
+                updated_user_id=self.admin.id,
+                created_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+
+    def test_query_count_is_constant(self):
+        """
+        Test user list query count does not depend on user count
+        """
+        # prepare
+        self.client.get(reverse("user-list"))  # user counter is counted at first view
+        self.create_users(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse("user-list"))
+        self.create_users(20, start=2)
+        # execute
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(reverse("user-list"))
+        # assertion
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(response.context["page_obj"]), 5)
+
+    def test_created_user_and_type(self):
+        """
+        Test created user name and type label in user list
+        """
+        # prepare
+        self.create_users(1)
+        # execute
+        response = self.client.get(reverse("user-list"))
+        member = [user for user in response.context["page_obj"]
+                  if user.email == "member0@gmail.com"][0]
+        # assertion
+        self.assertEqual(member.created_user_name, "admin creator")
+        self.assertEqual(member.type, "1")
+        self.assertContains(response, "<td>User</td>", html=True)
+
+
 class PostCreateViewTest(TestCase):
     def setUp(self):
         """
@@ -296,18 +922,110 @@ class PostCreateViewTest(TestCase):
         """
         # prepare
         self.client.login(email="test@user.com", password="thePass129Z")
-        session = self.client.session
-        session['save_confirm_page'] = True
-        session.save()
+        confirm = self.client.post(
+            reverse('post-create'),
+            {"_save": True, "title": "test title",
+             "description": "this is description"}
+        )
         # execute
         response = self.client.post(
             reverse('post-create'),
             {"_save": True, "title": "test title",
-             "description": "this is description"}
+             "description": "this is description",
+             "confirm_token": confirm.context["confirm_token"]}
         )
         # assertion
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response.url, reverse("index"))
+        self.assertTrue(Post.objects.filter(title="test title").exists())
+
+    def test_post_create_confirm_without_session_write(self):
+        """
+        Test confirm and save steps of post create do not write the session
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        session_data = self.client.session.load()
+        # execute
+        confirm = self.client.post(
+            reverse('post-create'),
+            {"_save": True, "title": "test title",
+             "description": "this is description"}
+        )
+        self.client.post(
+            reverse('post-create'),
+            {"_save": True, "title": "test title",
+             "description": "this is description",
+             "confirm_token": confirm.context["confirm_token"]}
+        )
+        # assertion
+        self.assertTrue(confirm.context["save_confirm_page"])
+        self.assertEqual(self.client.session.load(), session_data)
+
+    def test_post_create_token_used_once(self):
+        """
+        Test second save with same confirm token creates nothing
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        confirm = self.client.post(
+            reverse('post-create'),
+            {"_save": True, "title": "test title",
+             "description": "this is description"}
+        )
+        data = {"_save": True, "title": "test title", "description": "this is description",
+                "confirm_token": confirm.context["confirm_token"]}
+        self.client.post(reverse('post-create'), data)
+        # execute
+        response = self.client.post(reverse('post-create'), data)
+        # assertion
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Post.objects.filter(title="test title").count(), 1)
+
+    def test_post_create_changed_token(self):
+        """
+        Test changed confirm token is not saved and confirm page is shown again
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        confirm = self.client.post(
+            reverse('post-create'),
+            {"_save": True, "title": "test title",
+             "description": "this is description"}
+        )
+        # execute
+        response = self.client.post(
+            reverse('post-create'),
+            {"_save": True, "title": "test title",
+             "description": "this is description",
+             "confirm_token": confirm.context["confirm_token"] + "x"}
+        )
+        # assertion
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["save_confirm_page"])
+        self.assertFalse(Post.objects.filter(title="test title").exists())
+
+    def test_post_create_saves_confirmed_data(self):
+        """
+        Test readonly fields changed after confirm page are not saved
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        confirm = self.client.post(
+            reverse('post-create'),
+            {"_save": True, "title": "test title",
+             "description": "this is description"}
+        )
+        # execute
+        self.client.post(
+            reverse('post-create'),
+            {"_save": True, "title": "changed title",
+             "description": "this is description",
+             "confirm_token": confirm.context["confirm_token"]}
+        )
+        # assertion
+        self.assertTrue(Post.objects.filter(title="test title").exists())
+        self.assertFalse(Post.objects.filter(title="changed title").exists())
 
     def test_post_create_form_cancel(self):
         """
@@ -315,9 +1033,6 @@ class PostCreateViewTest(TestCase):
         """
         # prepare
         self.client.login(email="test@user.com", password="thePass129Z")
-        session = self.client.session
-        session['save_confirm_page'] = True
-        session.save()
         # execute
         self.client.get(reverse('post-create'))
         res_cancel = self.client.post(reverse("post-create"), {"_cancel": True, "title": "test title",
@@ -417,16 +1132,26 @@ class UserCreateViewTest(TestCase):
         """
         # prepare
         self.client.login(email="test@user.com", password="thePass129Z")
-        session = self.client.session
-        session['save_confirm_page'] = True
-        session["profile"] = "sample_img.jpg"
-        session.save()
         with open(str(settings.BASE_DIR)+"\\media\\test\\sample_img.jpg", "rb") as profile:
+            confirm = self.client.post(
+                reverse('user-create'),
+                {
+                    "_save": True,
+                    "name": "test name",
+                    "email": "test@user.com",
+                    "password": "thePass00911",
+                    "passwordConfirm": "thePass00911",
+                    "type": "0",
+                    "phone": "09222292",
+                    "profile": profile
+                }
+            )
             # execute
             response = self.client.post(
                 reverse('user-create'),
                 {
                     "_save": True,
+                    "confirm_token": confirm.context["confirm_token"],
                     "name": "test name",
                     "email": "test@user.com",
                     "password": "thePass00911",
@@ -445,9 +1170,6 @@ class UserCreateViewTest(TestCase):
         """
         # prepare
         self.client.login(email="test@user.com", password="thePass129Z")
-        session = self.client.session
-        session['save_confirm_page'] = True
-        session.save()
         self.client.get(reverse('user-create'))
         with open(str(settings.BASE_DIR)+"\\media\\test\\sample_img.jpg", "rb") as profile:
             # execute
@@ -470,32 +1192,95 @@ class UserCreateViewTest(TestCase):
 
     def test_user_create_form_create(self):
         """
-        Test new user create
+        Test new user create
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        with open(str(settings.BASE_DIR)+"\\media\\test\\sample_img.jpg", "rb") as profile:
+            confirm = self.client.post(
+                reverse('user-create'),
+                {
+                    "_save": True,
+                    "name": "test name",
+                    "email": "testemail@gmail.com",
+                    "password": "thePass00911",
+                    "passwordConfirm": "thePass00911",
+                    "type": "0",
+                    "phone": "09222292",
+                    "profile": profile
+                }
+            )
+            # execute
+            response = self.client.post(
+                reverse('user-create'),
+                {
+                    "_save": True,
+                    "confirm_token": confirm.context["confirm_token"],
+                    "name": "test name",
+                    "email": "testemail@gmail.com",
+                    "password": "thePass00911",
+                    "passwordConfirm": "thePass00911",
+                    "type": "0",
+                    "phone": "09222292",
+                    "profile": profile
+                }
+            )
+            # assertion
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(response.url, reverse("user-list"))
+
+    @skipIf(Image is None, "Pillow is not installed")
+    def test_user_create_failed_save_stores_nothing(self):
+        """
+        Test stored profile image is released when confirmed user can not be saved
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        image = BytesIO()
+        Image.new("RGB", (40, 20)).save(image, "PNG")
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            data = {
+                "_save": True,
+                "name": "test name",
+                "email": "testemail@gmail.com",
+                "password": "thePass00911",
+                "passwordConfirm": "thePass00911",
+                "type": "0",
+                "phone": "09222292",
+            }
+            confirm = self.client.post(reverse("user-create"), dict(
+                data, profile=SimpleUploadedFile("photo.png", image.getvalue())))
+            User.objects.create_user(email="testemail@gmail.com", password="thePass00911")
+            # execute
+            response = self.client.post(reverse("user-create"), dict(
+                data, confirm_token=confirm.context["confirm_token"]))
+            # assertion
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([files for _, _, files in os.walk(os.path.join(media, "upload")) if files], [])
+            self.assertEqual(len(os.listdir(os.path.join(media, "tmp"))), 1)
+
+    @skipIf(Image is None, "Pillow is not installed")
+    def test_user_create_not_image(self):
+        """
+        Test file which is not an image is rejected before the confirm page
         """
         # prepare
         self.client.login(email="test@user.com", password="thePass129Z")
-        session = self.client.session
-        session['save_confirm_page'] = True
-        session["profile"] = "sample_img.jpg"
-        session.save()
-        with open(str(settings.BASE_DIR)+"\\media\\test\\sample_img.jpg", "rb") as profile:
-            # execute
-            response = self.client.post(
-                reverse('user-create'),
-                {
-                    "_save": True,
-                    "name": "test name",
-                    "email": "testemail@gmail.com",
-                    "password": "thePass00911",
-                    "passwordConfirm": "thePass00911",
-                    "type": "0",
-                    "phone": "09222292",
-                    "profile": profile
-                }
-            )
-            # assertion
-            self.assertEqual(response.status_code, 302)
-            self.assertEqual(response.url, reverse("user-list"))
+        # execute
+        response = self.client.post(reverse("user-create"), {
+            "_save": True,
+            "name": "test name",
+            "email": "testemail@gmail.com",
+            "password": "thePass00911",
+            "passwordConfirm": "thePass00911",
+            "type": "0",
+            "phone": "09222292",
+            "profile": SimpleUploadedFile("photo.jpg", b"not an image"),
+        })
+        # assertion
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context["save_confirm_page"])
+        self.assertEqual(response.context["form"].errors["profile"], ["profile must be an image"])
 
 
 class PostUpdateViewTest(TestCase):
@@ -589,19 +1374,52 @@ class PostUpdateViewTest(TestCase):
         """
         # prepare
         self.client.login(email="test@user.com", password="thePass129Z")
-        session = self.client.session
-        session['save_confirm_page'] = True
-        session['status'] = "0"
-        session.save()
+        confirm = self.client.post(
+            reverse('post-update',  kwargs={'pk': self.test_post.id}),
+            {"_save": True, "title": "update title",
+             "description": "this is update description"}
+        )
         # execute
         response = self.client.post(
             reverse('post-update',  kwargs={'pk': self.test_post.id}),
             {"_save": True, "title": "update title",
-             "description": "this is update description", "post_status": "0"}
+             "description": "this is update description", "post_status": "0",
+             "confirm_token": confirm.context["confirm_token"]}
         )
         # assertion
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response.url, reverse("index"))
+        self.test_post.refresh_from_db()
+        self.assertEqual(self.test_post.title, "update title")
+        self.assertEqual(self.test_post.status, "0")
+
+    def test_post_update_token_of_other_post(self):
+        """
+        Test confirm token of another post is not saved
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        other_post = Post.objects.create(
+            title="other title", description="other", status="1",
+            created_user_id=self.test_post.created_user_id,
+            updated_user_id=self.test_post.created_user_id,
+            created_at=timezone.now(), updated_at=timezone.now())
+        confirm = self.client.post(
+            reverse('post-update',  kwargs={'pk': other_post.id}),
+            {"_save": True, "title": "update title",
+             "description": "this is update description"}
+        )
+        # execute
+        response = self.client.post(
+            reverse('post-update',  kwargs={'pk': self.test_post.id}),
+            {"_save": True, "title": "update title",
+             "description": "this is update description",
+             "confirm_token": confirm.context["confirm_token"]}
+        )
+        # assertion
+        self.assertEqual(response.status_code, 200)
+        self.test_post.refresh_from_db()
+        self.assertEqual(self.test_post.title, "test title")
 
     def test_post_update_form_cancel(self):
         """
@@ -609,9 +1427,6 @@ class PostUpdateViewTest(TestCase):
         """
         # prepare
         self.client.login(email="test@user.com", password="thePass129Z")
-        session = self.client.session
-        session['save_confirm_page'] = True
-        session.save()
         self.client.get(
             reverse('post-update', kwargs={'pk': self.test_post.id}),)
         # execute
@@ -669,6 +1484,102 @@ class PostDetail(TestCase):
         # assertion
         self.assertEqual(response.status_code, 200)
 
+    def test_post_detail_data(self):
+        """
+        Test post detail json data (same structure of django serializer) in one query
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        post = Post.objects.get(pk=self.test_post.id)
+        expected = json.loads(serializers.serialize("json", [post]))[0]
+        # execute
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("post-detail"), {"post_id": self.test_post.id})
+        data = json.loads(response.content)
+        post_queries = [query for query in queries.captured_queries
+                        if "bulletinboard_post" in query["sql"]]
+        # assertion
+        self.assertEqual(len(post_queries), 1)
+        self.assertEqual(data["model"], expected["model"])
+        self.assertEqual(data["pk"], expected["pk"])
+        self.assertEqual(data["fields"], expected["fields"])
+        self.assertEqual(data["created_user_name"], "")
+        self.assertEqual(data["updated_user_name"], "")
+
+    def test_post_detail_not_found(self):
+        """
+        Test post detail of not existing post
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        # execute
+        response = self.client.get(reverse("post-detail"), {"post_id": 0})
+        # assertion
+        self.assertEqual(response.status_code, 404)
+
+    def test_post_details_batch(self):
+        """
+        Test detail data of many posts in one request and one query
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        other = Post.objects.create(
+            title="second detail",
+            description="Hello again!!",
+            status="0",
+            created_user_id=self.test_post.created_user_id,
+            updated_user_id=self.test_post.updated_user_id,
+            created_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        # execute
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("post-details"), {
+                "ids": "{},{},x,0".format(self.test_post.id, other.id)})
+        data = json.loads(response.content)
+        post_queries = [query for query in queries.captured_queries
+                        if "bulletinboard_post" in query["sql"]]
+        # assertion
+        self.assertEqual(len(post_queries), 1)
+        self.assertEqual(set(data), {str(self.test_post.id), str(other.id)})
+        self.assertEqual(data[str(other.id)]["fields"]["title"], "second detail")
+        self.assertEqual(data[str(other.id)]["fields"]["status"], "0")
+
+    def test_post_details_scope(self):
+        """
+        Test batch detail data has only live posts of user's post list
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        other_user = User.objects.create_user(email="other@user.com", password="thePass129Z")
+        other = Post.objects.create(
+            title="other user post",
+            description="Hello again!!",
+            status="1",
+            created_user_id=other_user.id,
+            updated_user_id=other_user.id,
+            created_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        deleted = Post.objects.create(
+            title="deleted post",
+            description="Hello again!!",
+            status="1",
+            created_user_id=self.test_post.created_user_id,
+            updated_user_id=self.test_post.updated_user_id,
+            created_at=timezone.now(),
+            updated_at=timezone.now(),
+            delete_user_id=self.test_post.created_user_id,
+            deleted_at=timezone.now(),
+        )
+        # execute
+        response = self.client.get(reverse("post-details"), {
+            "ids": "{},{},{}".format(self.test_post.id, other.id, deleted.id)})
+        data = json.loads(response.content)
+        # assertion
+        self.assertEqual(set(data), {str(self.test_post.id)})
+
 
 class PostDeleteConfirmTest(TestCase):
     def setUp(self):
@@ -738,6 +1649,102 @@ class PostDeleteConfirmTest(TestCase):
         self.assertEqual(response.url, reverse("index"))
 
 
+class PostBulkDeleteTest(TestCase):
+    def setUp(self):
+        """
+        Initial set up for post bulk delete (posts of two owners)
+        """
+        # prepare
+        self.admin = User.objects.create_user(
+            email="admin@user.com", password="thePass129Z")
+        self.admin.type = "0"
+        self.admin.save()
+        self.member = User.objects.create_user(
+            email="member@user.com", password="thePass129Z")
+        self.member.type = "1"
+        self.member.save()
+        self.posts = []
+        for i, owner in enumerate([self.admin, self.member, self.member, self.member]):
+            self.posts.append(Post.objects.create(
+                title="bulk post {}".format(i),
+                description="Hello bulk!!",
+                status="1",
+                user=owner,
+                created_user_id=owner.id,
+                updated_user_id=owner.id,
+                created_at=timezone.now(),
+                updated_at=timezone.now(),
+            ))
+
+    def bulk_delete(self, posts):
+        return self.client.post(reverse("post-bulk-delete"), {
+            "post_ids": [post.id for post in posts]})
+
+    def test_bulk_delete_one_update(self):
+        """
+        Test selected posts of many owners are deleted with one update and counters are decreased
+        """
+        # prepare
+        self.client.login(email="admin@user.com", password="thePass129Z")
+        self.client.get(reverse("index"))
+        get_count("post:user:{}".format(self.member.id),
+                  Post.live.filter(created_user_id=self.member.id))
+        # execute
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk_delete(self.posts[:3])
+        post_updates = [query for query in queries.captured_queries
+                        if query["sql"].startswith('UPDATE "bulletinboard_post"')
+                        or query["sql"].startswith("UPDATE `bulletinboard_post`")]
+        # assertion
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(post_updates), 1)
+        self.assertEqual(list(Post.live.values_list("title", flat=True)), ["bulk post 3"])
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).delete_user_id, self.admin.id)
+        self.assertEqual(ListCounter.objects.get(scope="post:all").value, 1)
+        self.assertEqual(ListCounter.objects.get(
+            scope="post:user:{}".format(self.member.id)).value, 1)
+
+    def test_bulk_delete_invalidate_cache(self):
+        """
+        Test cached post list is dropped after bulk delete
+        """
+        # prepare
+        self.client.login(email="admin@user.com", password="thePass129Z")
+        self.client.get(reverse("index"))
+        # execute
+        self.bulk_delete(self.posts[1:])
+        response = self.client.get(reverse("index"))
+        # assertion
+        self.assertContains(response, "bulk post 0")
+        self.assertNotContains(response, "bulk post 1")
+        self.assertContains(response, "Page 1 of 1.")
+
+    def test_bulk_delete_own_posts_only(self):
+        """
+        Test normal user can not delete posts of other user
+        """
+        # prepare
+        self.client.login(email="member@user.com", password="thePass129Z")
+        # execute
+        self.bulk_delete(self.posts[:2])
+        # assertion
+        self.assertTrue(Post.objects.get(pk=self.posts[0].pk).is_live)
+        self.assertFalse(Post.objects.get(pk=self.posts[1].pk).is_live)
+
+    def test_bulk_delete_get(self):
+        """
+        Test get request does not delete posts
+        """
+        # prepare
+        self.client.login(email="admin@user.com", password="thePass129Z")
+        # execute
+        response = self.client.get(reverse("post-bulk-delete"), {
+            "post_ids": [self.posts[0].id]})
+        # assertion
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Post.live.count(), 4)
+
+
 class UserProfileTest(TestCase):
     def setUp(self):
         """
@@ -801,97 +1808,369 @@ class UserDetail(TestCase):
 
     def test_user_detail_without_login(self):
         """
-        Test user detial dialog without login
+        Test user detial dialog without login
+        """
+        # execute
+        response = self.client.get(
+            reverse("user-detail"), {"user_id": self.user.id})
+        # assertion
+        self.assertEqual(response.status_code, 302)
+
+    def test_user_detail(self):
+        """
+        Test user detail dialog after login success
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        # execute
+        response = self.client.get(
+            reverse("user-detail"), {"user_id": self.user.id})
+        # assertion
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_detail_data(self):
+        """
+        Test user detail json data has created and updated user name but no password
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        User.objects.filter(email="test@user.com").update(name="creator")
+        # execute
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse("user-detail"), {"user_id": self.user.id})
+        data = json.loads(response.content)
+        # assertion
+        self.assertEqual(data["pk"], self.user.id)
+        self.assertEqual(data["fields"]["name"], "test001")
+        self.assertEqual(data["fields"]["type"], "0")
+        self.assertEqual(data["fields"]["profile"], "fake/path")
+        self.assertEqual(data["profile_thumbnail"], settings.MEDIA_URL + "fake/path")
+        self.assertEqual(data["fields"]["dob"],
+                         User.objects.get(pk=self.user.id).dob.isoformat())
+        self.assertNotIn("password", data["fields"])
+        self.assertEqual(data["created_user_name"], "creator")
+        self.assertEqual(data["updated_user_name"], "creator")
+
+    def test_user_details_batch(self):
+        """
+        Test detail data of many users in one request
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        # execute
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("user-details"), {
+                "ids": "{},{}".format(self.user.id, self.user.created_user_id)})
+        data = json.loads(response.content)
+        # assertion
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[str(self.user.id)]["fields"]["email"], "test001@gmail.com")
+        self.assertNotIn("password", data[str(self.user.id)]["fields"])
+
+    def test_user_details_scope(self):
+        """
+        Test batch detail data has only live users of user's user list
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        other = User.objects.create(email="other@gmail.com", password="passwordTest11",
+                                    created_user_id=self.user.id, updated_user_id=self.user.id)
+        deleted = User.objects.create(email="deleted@gmail.com", password="passwordTest11",
+                                      created_user_id=self.user.created_user_id,
+                                      updated_user_id=self.user.created_user_id,
+                                      delete_user_id=self.user.created_user_id, deleted_at=timezone.now())
+        # execute
+        response = self.client.get(reverse("user-details"), {
+            "ids": "{},{},{}".format(self.user.id, other.id, deleted.id)})
+        data = json.loads(response.content)
+        # assertion
+        self.assertEqual(set(data), {str(self.user.id)})
+
+
+class UserDeleteTest(TestCase):
+    def setUp(self):
+        """
+        Initial set up for user delete
+        """
+        # prepare
+        test_user = User.objects.create_user(
+            email="test@user.com", password="thePass129Z")
+        test_user.type = "1"
+        test_user.save()
+        self.user = User.objects.create(
+            name="deleteUser",
+            email="deleteuser@gmail.com",
+            password="passwordTest11",
+            profile="fake/path",
+            type="0",
+            phone="01234543",
+            address="yangon",
+            dob=timezone.now(),
+            created_user_id=test_user.id,
+            updated_user_id=test_user.id,
+            created_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        self.user.save()
+
+    def test_user_delete_confirm_without_login(self):
+        """
+        Test user delete confirm page without login
+        """
+        # execute
+        response = self.client.get(
+            reverse("user-delete-confirm"), {"user_id": self.user.id})
+        # assertion
+        self.assertEqual(response.status_code, 302)
+
+    def test_user_delete_without_login(self):
+        """
+        Test user delete without login
+        """
+        # execute
+        response = self.client.get(
+            reverse("user-delete"), {"user_id": self.user.id})
+        # assertion
+        self.assertEqual(response.status_code, 302)
+
+    def test_user_delete_confirm(self):
+        """
+        Test user delete confirm page after login success
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        # execute
+        response = self.client.get(
+            reverse("user-delete-confirm"), {"user_id": self.user.id})
+        # assertion
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_delete(self):
+        """
+        Test user delete after login success
+        """
+        # prepare
+        self.client.login(email="test@user.com", password="thePass129Z")
+        # execute
+        response = self.client.get(
+            reverse("user-delete"), {"user_id": self.user.id})
+        # assertion
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, "/users/")
+
+
+class UserBulkDeleteTest(TestCase):
+    def setUp(self):
+        """
+        Initial set up for user bulk delete (members with posts)
+        """
+        # prepare
+        self.admin = User.objects.create_user(
+            email="admin@user.com", password="thePass129Z")
+        self.admin.type = "0"
+        self.admin.save()
+        self.members = [self.create_member(i) for i in range(3)]
+        self.client.login(email="admin@user.com", password="thePass129Z")
+
+    def create_member(self, index):
+        return User.objects.create(
+            name="member {}".format(index),
+            email="member{}@gmail.com".format(index),
+            password="passwordTest11",
+            type="1",
+            created_user_id=self.admin.id,
+            updated_user_id=self.admin.id,
+        )
+
+    def create_posts(self, owner, count):
+        Post.objects.bulk_create([Post(
+            title="post of {} {}".format(owner.name, i),
+            description="Hello member!!",
+            status="1",
+            user=owner,
+            created_user_id=owner.id,
+            updated_user_id=owner.id,
+            created_at=timezone.now(),
+            updated_at=timezone.now(),
+        ) for i in range(count)])
+
+    def test_bulk_delete_users_and_posts(self):
+        """
+        Test selected users and all their posts are deleted and counters are updated
+        """
+        # prepare
+        self.create_posts(self.members[0], 2)
+        self.create_posts(self.members[1], 3)
+        self.create_posts(self.members[2], 1)
+        self.client.get(reverse("index"))
+        self.client.get(reverse("user-list"))
+        # execute
+        response = self.client.post(reverse("user-bulk-delete"), {
+            "user_ids": [self.members[0].id, self.members[1].id, self.admin.id]})
+        # assertion
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(User.live.exclude(pk=self.admin.pk)), [self.members[2]])
+        self.assertEqual(list(Post.live.values_list("title", flat=True)), ["post of member 2 0"])
+        self.assertEqual(ListCounter.objects.get(scope="post:all").value, 1)
+        self.assertEqual(ListCounter.objects.get(scope="user:all").value,
+                         User.live.count())
+        response = self.client.get(reverse("index"))
+        self.assertNotContains(response, "post of member 0")
+        self.assertContains(response, "post of member 2 0")
+
+    def test_query_count_does_not_depend_on_posts(self):
+        """
+        Test deactivation query count is same for user with many posts
+        """
+        # prepare
+        self.create_posts(self.members[0], 1)
+        self.create_posts(self.members[1], 50)
+        users = User.live.filter(pk=self.members[0].pk)
+        with CaptureQueriesContext(connection) as few:
+            few_counts = deactivate_users(users, self.admin.id)
+        users = User.live.filter(pk=self.members[1].pk)
+        # execute
+        with CaptureQueriesContext(connection) as many:
+            many_counts = deactivate_users(users, self.admin.id)
+        # assertion
+        self.assertEqual(few_counts, (1, 1))
+        self.assertEqual(many_counts, (1, 50))
+        self.assertEqual(len(few), len(many))
+
+    def test_user_delete_cascade(self):
+        """
+        Test single user delete also deletes posts of user
+        """
+        # prepare
+        self.create_posts(self.members[0], 2)
+        # execute
+        self.client.get(reverse("user-delete"), {"user_id": self.members[0].id})
+        # assertion
+        self.assertFalse(User.objects.get(pk=self.members[0].pk).is_live)
+        self.assertEqual(Post.live.filter(created_user_id=self.members[0].id).count(), 0)
+
+    def test_normal_user_bulk_delete(self):
+        """
+        Test normal user can only delete users created by the user
         """
+        # prepare
+        member = self.members[0]
+        member.set_password("thePass129Z")
+        member.save()
+        created = User.objects.create(
+            name="created", email="created@gmail.com", password="passwordTest11",
+            created_user_id=member.id, updated_user_id=member.id)
+        self.client.login(email="member0@gmail.com", password="thePass129Z")
         # execute
-        response = self.client.get(
-            reverse("user-detail"), {"user_id": self.user.id})
+        self.client.post(reverse("user-bulk-delete"), {
+            "user_ids": [created.id, self.members[1].id]})
         # assertion
-        self.assertEqual(response.status_code, 302)
+        self.assertFalse(User.objects.get(pk=created.pk).is_live)
+        self.assertTrue(User.objects.get(pk=self.members[1].pk).is_live)
 
-    def test_user_detail(self):
+
+class DbPoolStatsTest(TestCase):
+    def setUp(self):
         """
-        Test user detail dialog after login success
+        Initial set up for database pool metrics
         """
         # prepare
+        self.test_user = User.objects.create_user(
+            email="test@user.com", password="thePass129Z")
         self.client.login(email="test@user.com", password="thePass129Z")
+
+    def test_pool_stats_admin(self):
+        """
+        Test admin can see pool metrics
+        """
+        # prepare
+        self.test_user.type = "0"
+        self.test_user.save()
         # execute
-        response = self.client.get(
-            reverse("user-detail"), {"user_id": self.user.id})
+        response = self.client.get(reverse("db-pool-stats"))
         # assertion
         self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(json.loads(response.content), dict)
 
+    def test_pool_stats_user(self):
+        """
+        Test normal user can not see pool metrics
+        """
+        # prepare
+        self.test_user.type = "1"
+        self.test_user.save()
+        # execute
+        response = self.client.get(reverse("db-pool-stats"))
+        # assertion
+        self.assertEqual(response.status_code, 403)
+
+
+@skipUnless("replica" in settings.DATABASES, "needs a second database \"replica\" in DATABASES")
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReadReplicaTest(TestCase):
+    databases = {"default", "replica"} if "replica" in settings.DATABASES else {"default"}
 
-class UserDeleteTest(TestCase):
     def setUp(self):
         """
-        Initial set up for user delete
+        Initial set up for read replica routing (replica is a separate database without replication,
+        so rows only in primary show where the view read from)
         """
         # prepare
-        test_user = User.objects.create_user(
+        self.test_user = User.objects.create_user(
             email="test@user.com", password="thePass129Z")
-        test_user.type = "1"
-        test_user.save()
-        self.user = User.objects.create(
-            name="deleteUser",
-            email="deleteuser@gmail.com",
-            password="passwordTest11",
-            profile="fake/path",
-            type="0",
-            phone="01234543",
-            address="yangon",
-            dob=timezone.now(),
-            created_user_id=test_user.id,
-            updated_user_id=test_user.id,
+        self.test_user.type = "0"
+        self.test_user.save()
+        User.objects.using("replica").create(
+            pk=self.test_user.pk, email=self.test_user.email, password=self.test_user.password, type="0")
+        ListCounter.objects.using("replica").create(scope="post:all", value=0)
+        self.test_post = Post.objects.create(
+            title="primary post",
+            description="only in primary",
+            status="1",
+            created_user_id=self.test_user.id,
+            updated_user_id=self.test_user.id,
             created_at=timezone.now(),
             updated_at=timezone.now(),
         )
-        self.user.save()
-
-    def test_user_delete_confirm_without_login(self):
-        """
-        Test user delete confirm page without login
-        """
-        # execute
-        response = self.client.get(
-            reverse("user-delete-confirm"), {"user_id": self.user.id})
-        # assertion
-        self.assertEqual(response.status_code, 302)
+        self.client.login(email="test@user.com", password="thePass129Z")
 
-    def test_user_delete_without_login(self):
+    def test_list_read_from_replica(self):
         """
-        Test user delete without login
+        Test post list reads from replica
         """
         # execute
-        response = self.client.get(
-            reverse("user-delete"), {"user_id": self.user.id})
+        response = self.client.get(reverse("index"))
         # assertion
-        self.assertEqual(response.status_code, 302)
+        self.assertNotContains(response, "primary post")
+        self.assertNotIn(PIN_COOKIE, response.cookies)
 
-    def test_user_delete_confirm(self):
+    def test_count_on_primary_not_pinned(self):
         """
-        Test user delete confirm page after login success
+        Test counter which is not ready is counted on primary without pinning the browser to primary
         """
         # prepare
-        self.client.login(email="test@user.com", password="thePass129Z")
+        ListCounter.objects.using("replica").all().delete()
         # execute
-        response = self.client.get(
-            reverse("user-delete-confirm"), {"user_id": self.user.id})
+        response = self.client.get(reverse("index"))
         # assertion
-        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(ListCounter.objects.using("default").get(scope="post:all").value, 1)
 
-    def test_user_delete(self):
+    def test_read_your_writes(self):
         """
-        Test user delete after login success
+        Test post list reads from primary after a write of the browser
         """
         # prepare
-        self.client.login(email="test@user.com", password="thePass129Z")
+        response = self.client.get(reverse("post-delete"), {"post_id": self.test_post.id})
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.test_post.delete_user_id = None
+        self.test_post.deleted_at = None
+        self.test_post.save()
         # execute
-        response = self.client.get(
-            reverse("user-delete"), {"user_id": self.user.id})
+        response = self.client.get(reverse("index"))
         # assertion
-        self.assertEqual(response.status_code, 302)
-        self.assertEqual(response.url, "/users/")
+        self.assertContains(response, "primary post")
 
 
 class CsvDownloadTest(TestCase):
@@ -938,6 +2217,34 @@ class CsvDownloadTest(TestCase):
         # assertion
         self.assertEqual(response.status_code, 200)
 
+    @override_settings(CSV_EXPORT_CHUNK_SIZE=2)
+    def test_csv_download_streaming(self):
+        """
+        Test csv download is streamed and every post is written once in order
+        """
+        # prepare
+        for i in range(4):
+            Post.objects.create(
+                title="stream {}".format(i),
+                description="Hello, world!!",
+                status="1",
+                created_user_id=1,
+                updated_user_id=1,
+                created_at=timezone.now(),
+                updated_at=timezone.now() - datetime.timedelta(days=i % 2),
+            )
+        self.client.login(email="test@user.com", password="thePass129Z")
+        # execute
+        response = self.client.get(reverse("post-list-download"))
+        lines = list(csv.reader(
+            b"".join(response.streaming_content).decode().splitlines()))
+        # assertion
+        self.assertTrue(response.streaming)
+        self.assertEqual(lines[0][0], "id")
+        self.assertEqual([int(line[0]) for line in lines[1:]], list(
+            Post.objects.order_by("-updated_at", "-id").values_list("id", flat=True)))
+        self.assertEqual(lines[1][2], "Hello, world!!")
+
 
 class UserPasswordResetTest(TestCase):
     def setUp(self):
@@ -1104,6 +2411,213 @@ class CsvImportViewTest(TestCase):
             self.assertEqual(response.url, reverse("index"))
 
 
+class CsvStreamImportTest(TestCase):
+    def setUp(self):
+        """
+        Initial set up for csv import from upload stream
+        """
+        # prepare
+        test_user = User.objects.create_user(
+            email="test@user.com", password="thePass129Z")
+        test_user.type = "1"
+        test_user.save()
+        self.client.login(email="test@user.com", password="thePass129Z")
+
+    def upload(self, content):
+        """
+        Post csv content as uploaded csv file
+        """
+        csv_file = SimpleUploadedFile(
+            "posts.csv", content.encode("utf-8"), content_type="application/vnd.ms-excel")
+        return self.client.post(reverse("csv-import"), {"csv_file": csv_file})
+
+    def test_csv_import(self):
+        """
+        Test csv import without temp file
+        """
+        # prepare
+        tmp_files = set(os.listdir(os.path.join(settings.MEDIA_ROOT, "tmp")))
+        # execute
+        response = self.upload(
+            "title,description,status\ntitle1,description1,1\n\"title, 2\",description2,0\n")
+        # assertion
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, reverse("index"))
+        self.assertEqual(
+            list(Post.objects.order_by("id").values_list("title", "status")),
+            [("title1", "1"), ("title, 2", "0")])
+        self.assertEqual(
+            set(os.listdir(os.path.join(settings.MEDIA_ROOT, "tmp"))), tmp_files)
+
+    @override_settings(CSV_IMPORT_BATCH_SIZE=2)
+    def test_csv_import_invalid_row_rollback(self):
+        """
+        Test invalid row after inserted batches saves nothing
+        """
+        # execute
+        response = self.upload(
+            "title,description,status\na,b,1\nc,d,1\ne,f,1\ng,h\n")
+        # assertion
+        self.assertEqual(
+            response.context["err_message"], "Post upload csv must have 3 columns")
+        self.assertEqual(Post.objects.count(), 0)
+
+    def test_csv_import_empty_file(self):
+        """
+        Test csv import with empty file
+        """
+        # execute
+        response = self.upload("\n")
+        # assertion
+        self.assertEqual(
+            response.context["err_message"], "Post upload csv must have 3 columns")
+
+    def test_csv_import_multi_chunk(self):
+        """
+        Test csv bigger than one upload chunk with multibyte characters
+        """
+        # prepare
+        lines = ["title,description,status"]
+        lines += ["ポスト{},説明{},1".format(i, i) for i in range(5000)]
+        # execute
+        response = self.upload("\n".join(lines))
+        # assertion
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Post.objects.count(), 5000)
+        self.assertTrue(Post.objects.filter(title="ポスト4999", description="説明4999").exists())
+
+
+@override_settings(CSV_IMPORT_ASYNC_THRESHOLD=10)
+class CsvImportJobTest(TestCase):
+    def setUp(self):
+        """
+        Initial set up for background csv import
+        """
+        # prepare
+        test_user = User.objects.create_user(
+            email="test@user.com", password="thePass129Z")
+        test_user.type = "1"
+        test_user.save()
+        self.client.login(email="test@user.com", password="thePass129Z")
+
+    def upload(self, content=b"title,description,status\na,b,1\ne,f,0\n"):
+        """
+        Upload csv file bigger than async threshold and return the queued job
+        """
+        csv_file = SimpleUploadedFile(
+            "posts.csv", content, content_type="application/vnd.ms-excel")
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post(
+                reverse("csv-import"), {"csv_file": csv_file})
+        return response, callbacks, CsvImportJob.objects.get()
+
+    def test_upload_is_queued(self):
+        """
+        Test big upload is queued and redirected to progress page
+        """
+        # execute
+        response, callbacks, job = self.upload()
+        # assertion
+        self.assertRedirects(response, reverse(
+            "csv-import-progress", kwargs={"pk": job.id}))
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(job.get_status_display(), "queued")
+        self.assertEqual(Post.objects.count(), 0)
+        self.assertTrue(os.path.exists(
+            os.path.join(settings.MEDIA_ROOT, job.file_path)))
+        os.unlink(os.path.join(settings.MEDIA_ROOT, job.file_path))
+
+    def test_run_job(self):
+        """
+        Test running queued job and polling status
+        """
+        # prepare
+        response, callbacks, job = self.upload()
+        # execute
+        run_import_job(job.id)
+        status = self.client.get(
+            reverse("csv-import-status", kwargs={"pk": job.id})).json()
+        # assertion
+        self.assertEqual(status["status"], "done")
+        self.assertEqual(status["rows_done"], 2)
+        self.assertEqual(status["rows_failed"], 0)
+        self.assertEqual(status["percent"], 100.0)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertFalse(os.path.exists(
+            os.path.join(settings.MEDIA_ROOT, job.file_path)))
+        self.assertFalse(run_import_job(job.id))
+
+    def test_invalid_row_fails_job(self):
+        """
+        Test file with a row without 3 columns fails without saving any post (same as import in request)
+        """
+        # prepare
+        response, callbacks, job = self.upload(b"title,description,status\na,b,1\nc,d\ne,f,0\n")
+        # execute
+        run_import_job(job.id)
+        status = self.client.get(
+            reverse("csv-import-status", kwargs={"pk": job.id})).json()
+        progress = self.client.get(
+            reverse("csv-import-progress", kwargs={"pk": job.id}))
+        # assertion
+        self.assertEqual(status["status"], "failed")
+        self.assertEqual(status["rows_done"], 0)
+        self.assertEqual(status["rows_failed"], 1)
+        self.assertEqual(status["error"], "Post upload csv must have 3 columns (1 rows, first at line 3)")
+        self.assertContains(progress, "Post upload csv must have 3 columns")
+        self.assertEqual(Post.objects.count(), 0)
+        self.assertFalse(os.path.exists(
+            os.path.join(settings.MEDIA_ROOT, job.file_path)))
+
+    def test_not_utf8_fails_job(self):
+        """
+        Test file which is not utf-8 fails without saving any post
+        """
+        # prepare
+        response, callbacks, job = self.upload(b"title,description,status\na,b,1\n\xff,f,0\n")
+        # execute
+        run_import_job(job.id)
+        job.refresh_from_db()
+        # assertion
+        self.assertEqual(job.get_status_display(), "failed")
+        self.assertEqual(job.error, "Please choose csv format")
+        self.assertEqual(Post.objects.count(), 0)
+
+    def test_requeue_stale_job(self):
+        """
+        Test job left running by a killed worker is queued again and imported
+        """
+        # prepare
+        response, callbacks, job = self.upload()
+        CsvImportJob.objects.filter(pk=job.id).update(
+            status="1", started_at=timezone.now() - datetime.timedelta(hours=2))
+        # execute
+        not_stale = requeue_stale_jobs(max_age=3 * 3600)
+        requeued = requeue_stale_jobs(max_age=3600)
+        run_import_job(job.id)
+        job.refresh_from_db()
+        # assertion
+        self.assertEqual(not_stale, 0)
+        self.assertEqual(requeued, 1)
+        self.assertEqual(job.get_status_display(), "done")
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_progress_of_other_user(self):
+        """
+        Test other user can not see import job
+        """
+        # prepare
+        response, callbacks, job = self.upload()
+        User.objects.create_user(email="other@user.com", password="thePass129Z")
+        self.client.login(email="other@user.com", password="thePass129Z")
+        # execute
+        response = self.client.get(
+            reverse("csv-import-progress", kwargs={"pk": job.id}))
+        # assertion
+        self.assertEqual(response.status_code, 404)
+        os.unlink(os.path.join(settings.MEDIA_ROOT, job.file_path))
+
+
 class UserEditViewTest(TestCase):
     def setUp(self):
         """
@@ -1199,10 +2713,6 @@ class UserEditViewTest(TestCase):
         """
         # prepare
         self.client.login(email="test@user.com", password="thePass129Z")
-        session = self.client.session
-        session['save_confirm_page'] = True
-        session["updated_image"] = True
-        session.save()
         self.client.get(reverse('user-update', kwargs={'pk': self.user.id}))
         with open(str(settings.BASE_DIR)+"\\media\\test\\sample_img.jpg", "rb") as profile:
             # execute
@@ -1230,16 +2740,22 @@ class UserEditViewTest(TestCase):
         """
         # prepare
         self.client.login(email="test@user.com", password="thePass129Z")
-        session = self.client.session
-        session['save_confirm_page'] = True
-        session["updated_image"] = False
-        session["profile"] = ""
-        session.save()
+        confirm = self.client.post(
+            reverse('user-update', kwargs={'pk': self.user.id}),
+            {
+                "_save": True,
+                "name": "test name",
+                "email": "test@user.com",
+                "type": "0",
+                "phone": "09222292",
+            }
+        )
         # execute
         response = self.client.post(
             reverse('user-update', kwargs={'pk': self.user.id}),
             {
                 "_save": True,
+                "confirm_token": confirm.context["confirm_token"],
                 "name": "test name",
                 "email": "test@user.com",
                 "type": "0",
@@ -1256,13 +2772,9 @@ class UserEditViewTest(TestCase):
         """
         # prepare
         self.client.login(email="test@user.com", password="thePass129Z")
-        session = self.client.session
-        session['save_confirm_page'] = False
-        session["updated_image"] = True
-        session.save()
         with open(str(settings.BASE_DIR)+"\\media\\test\\sample_img.jpg", "rb") as profile:
             # execute
-            self.client.post(
+            confirm = self.client.post(
                 reverse('user-update', kwargs={'pk': self.user.id}),
                 {
                     "_save": True,
@@ -1273,13 +2785,11 @@ class UserEditViewTest(TestCase):
                     "profile": profile
                 }
             )
-            session['save_confirm_page'] = True
-            session["profile"] = "sample_img.jpg"
-            session.save()
             res = self.client.post(
                 reverse('user-update', kwargs={'pk': self.user.id}),
                 {
                     "_save": True,
+                    "confirm_token": confirm.context["confirm_token"],
                     "name": "test name",
                     "email": "testupdate@gmail.com",
                     "type": "0",
@@ -1289,3 +2799,161 @@ class UserEditViewTest(TestCase):
             # assertion
             self.assertEqual(res.status_code, 302)
             self.assertEqual(res.url, reverse("user-list"))
+
+
+class MediaServeTest(TempMediaMixin, TestCase):
+    media_settings = {"MEDIA_ACCEL": None}
+
+    def setUp(self):
+        """
+        Initial set up for media serving in temp media folder
+        """
+        # prepare
+        super().setUp()
+        os.makedirs(os.path.join(self.media.name, "upload", "ab"))
+        with open(os.path.join(self.media.name, "upload", "photo.jpg"), "wb") as photo:
+            photo.write(b"0123456789")
+        self.stored = "upload/ab/ab" + "0" * 62 + ".jpg"
+        with open(os.path.join(self.media.name, self.stored), "wb") as photo:
+            photo.write(b"stored")
+
+    def test_media_file(self):
+        """
+        Test media file has validators and no database query (session is not loaded)
+        """
+        # execute
+        with self.assertNumQueries(0):
+            response = self.client.get("/media/upload/photo.jpg")
+        # assertion
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+
+    def test_if_none_match(self):
+        """
+        Test same ETag is answered with 304
+        """
+        # prepare
+        etag = self.client.get("/media/upload/photo.jpg")["ETag"]
+        # execute
+        response = self.client.get("/media/upload/photo.jpg", HTTP_IF_NONE_MATCH=etag)
+        # assertion
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_modified_since(self):
+        """
+        Test file not modified since the date is answered with 304
+        """
+        # prepare
+        modified = os.path.getmtime(os.path.join(self.media.name, "upload", "photo.jpg"))
+        # execute
+        response = self.client.get("/media/upload/photo.jpg", HTTP_IF_MODIFIED_SINCE=http_date(modified + 60))
+        # assertion
+        self.assertEqual(response.status_code, 304)
+
+    def test_range(self):
+        """
+        Test byte range and suffix range are answered with 206
+        """
+        # execute
+        response = self.client.get("/media/upload/photo.jpg", HTTP_RANGE="bytes=2-5")
+        suffix = self.client.get("/media/upload/photo.jpg", HTTP_RANGE="bytes=-3")
+        # assertion
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"2345")
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+        self.assertEqual(b"".join(suffix.streaming_content), b"789")
+
+    def test_range_not_satisfiable(self):
+        """
+        Test range after end of file is answered with 416
+        """
+        # execute
+        response = self.client.get("/media/upload/photo.jpg", HTTP_RANGE="bytes=20-")
+        # assertion
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10")
+
+    def test_if_range_changed(self):
+        """
+        Test range of changed file (other If-Range ETag) sends whole file
+        """
+        # execute
+        response = self.client.get("/media/upload/photo.jpg", HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"old"')
+        # assertion
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+
+    def test_stored_file_immutable(self):
+        """
+        Test content addressed file is cached forever with content hash ETag
+        """
+        # execute
+        response = self.client.get("/media/" + self.stored)
+        # assertion
+        self.assertEqual(response["ETag"], '"ab{}"'.format("0" * 62))
+        self.assertIn("immutable", response["Cache-Control"])
+
+    def test_outside_media(self):
+        """
+        Test path outside of media root and hidden files are not served
+        """
+        # execute / assertion
+        self.assertEqual(self.client.get("/media/../manage.py").status_code, 404)
+        self.assertEqual(self.client.get("/media/upload/.hidden").status_code, 404)
+        self.assertEqual(self.client.get("/media/upload/missing.jpg").status_code, 404)
+
+    def test_private_media(self):
+        """
+        Test confirm page preview needs login and csv import files are never served
+        """
+        # prepare
+        os.makedirs(os.path.join(self.media.name, "tmp"))
+        preview = "tmp/" + "c" * 32 + ".jpg"
+        upload = "tmp/import-" + "d" * 32 + ".csv"
+        for name in (preview, upload):
+            with open(os.path.join(self.media.name, name), "wb") as temp:
+                temp.write(b"temp")
+        User.objects.create_user(email="test@user.com", password="thePass129Z")
+        # execute
+        anonymous = self.client.get("/media/" + preview)
+        anonymous_upload = self.client.get("/media/" + upload)
+        self.client.login(email="test@user.com", password="thePass129Z")
+        response = self.client.get("/media/" + preview)
+        logged_in_upload = self.client.get("/media/" + upload)
+        # assertion
+        self.assertEqual(anonymous.status_code, 302)
+        self.assertTrue(anonymous.url.startswith(settings.LOGIN_URL))
+        self.assertEqual(anonymous_upload.status_code, 404)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"temp")
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertEqual(logged_in_upload.status_code, 404)
+
+    def test_accel_redirect(self):
+        """
+        Test file transfer is given to front proxy with X-Accel-Redirect
+        """
+        # execute
+        with override_settings(MEDIA_ACCEL="x-accel-redirect", MEDIA_ACCEL_PREFIX="/protected-media/"):
+            response = self.client.get("/media/upload/photo.jpg")
+        # assertion
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/upload/photo.jpg")
+        self.assertEqual(response.content, b"")
+        self.assertIn("ETag", response)
+
+    def test_view_without_middleware(self):
+        """
+        Test media view serves file when media middleware is not used
+        """
+        # execute
+        with self.modify_settings(MIDDLEWARE={"remove": "bulletinboard.middleware.MediaMiddleware"}):
+            response = self.client.get(reverse("media", kwargs={"path": "upload/photo.jpg"}))
+        # assertion
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")